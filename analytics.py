@@ -0,0 +1,199 @@
+"""
+Columnar analytics over many stored architecture reports.
+
+Reports produced by ``ArchitectureReportGenerator.generate_detailed_report``
+are flattened once into long pandas tables (one row per recommendation
+count, risk sentence or component) and every aggregate is then computed
+with vectorized pandas/NumPy operations instead of per-report loops. The
+tables have the columns of ``exporters.report_schemas``, so Parquet written
+by the exporters loads here and ``to_parquet`` output loads there.
+"""
+
+import io
+import json
+import zipfile
+from itertools import chain
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from exporters import REPORT_TABLES, report_key, report_schemas
+
+
+RISK_KEYWORDS = ["risk", "challenge", "concern", "issue", "problem"]
+PRIORITY_ORDER = ["Low", "Medium", "High", "Critical"]
+TABLES = REPORT_TABLES
+
+
+class ReportAnalytics:
+    """Aggregate views over a collection of detailed architecture reports"""
+
+    def __init__(self, reports: pd.DataFrame, recommendations: pd.DataFrame,
+                 risks: pd.DataFrame, components: pd.DataFrame):
+        self.reports = reports
+        self.recommendations = recommendations
+        self.risks = risks
+        self.components = components
+
+    @classmethod
+    def from_reports(cls, reports: Iterable[Dict]) -> "ReportAnalytics":
+        """Flatten detailed report dicts into columnar tables"""
+        reports = list(reports)
+        metadata = [r.get("metadata", {}) for r in reports]
+        report_ids = np.array([report_key(m) for m in metadata], dtype=object)
+
+        reports_df = pd.DataFrame({
+            "report_id": report_ids,
+            "timestamp": pd.to_datetime([m.get("timestamp") for m in metadata], errors="coerce").astype("datetime64[ns]"),
+            "user_request": [m.get("user_request", "") for m in metadata],
+            "categories": [list(m.get("categories", [])) for m in metadata],
+            "priority": pd.Categorical([m.get("priority") for m in metadata], categories=PRIORITY_ORDER),
+            "total_agents": np.fromiter((m.get("total_agents", 0) for m in metadata), dtype=np.int64, count=len(metadata)),
+            "total_recommendations": np.fromiter(
+                (m.get("total_recommendations", 0) for m in metadata), dtype=np.int64, count=len(metadata)
+            ),
+        })
+
+        # One row per (report, agent) with the agent's recommendation count
+        summaries = [r.get("agent_summaries", {}) for r in reports]
+        rec_lengths = np.fromiter((len(s) for s in summaries), dtype=np.int64, count=len(summaries))
+        agent_data = list(chain.from_iterable(s.values() for s in summaries))
+        recommendations_df = pd.DataFrame({
+            "report_id": np.repeat(report_ids, rec_lengths),
+            "agent": list(chain.from_iterable(s.keys() for s in summaries)),
+            "role": [a.get("role") for a in agent_data],
+            "focus_area": [a.get("focus_area") for a in agent_data],
+            "count": np.fromiter(
+                (a.get("count", len(a.get("recommendations", []))) for a in agent_data),
+                dtype=np.int64, count=len(agent_data)
+            ),
+            "recommendations": [list(a.get("recommendations", [])) for a in agent_data],
+        })
+
+        # One row per extracted risk sentence
+        risk_lists = [r.get("risk_assessment", []) for r in reports]
+        risk_lengths = np.fromiter((len(r) for r in risk_lists), dtype=np.int64, count=len(risk_lists))
+        risks_df = pd.DataFrame({
+            "report_id": np.repeat(report_ids, risk_lengths),
+            "text": np.array(list(chain.from_iterable(risk_lists)), dtype=object),
+        })
+
+        # One row per component mention, when components were stored with the report
+        component_maps = [r.get("components", {}) for r in reports]
+        type_lengths = np.fromiter((len(c) for c in component_maps), dtype=np.int64, count=len(component_maps))
+        item_counts = np.fromiter(
+            (len(items) for c in component_maps for items in c.values()),
+            dtype=np.int64, count=int(type_lengths.sum())
+        )
+        component_types = np.array(list(chain.from_iterable(c.keys() for c in component_maps)), dtype=object)
+        components_df = pd.DataFrame({
+            "report_id": np.repeat(np.repeat(report_ids, type_lengths), item_counts),
+            "component_type": np.repeat(component_types, item_counts),
+            "description": np.array(
+                list(chain.from_iterable(items for c in component_maps for items in c.values())), dtype=object
+            ),
+        })
+
+        return cls(reports_df, recommendations_df, risks_df, components_df)
+
+    @classmethod
+    def from_json_files(cls, paths: Iterable[str]) -> "ReportAnalytics":
+        """Load reports exported as JSON (one report per file, or JSON Lines)"""
+        reports = []
+        for path in paths:
+            text = Path(path).read_text(encoding="utf-8")
+            if str(path).endswith(".jsonl"):
+                reports.extend(json.loads(line) for line in text.splitlines() if line.strip())
+            else:
+                reports.append(json.loads(text))
+        return cls.from_reports(reports)
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "ReportAnalytics":
+        """Load tables written by ``to_parquet``, ``ParquetReportWriter`` or the Parquet zip export (requires pyarrow)"""
+        path = Path(path)
+        if path.is_file():
+            with zipfile.ZipFile(path) as archive:
+                tables = {name: pd.read_parquet(io.BytesIO(archive.read(f"{name}.parquet"))) for name in TABLES}
+        else:
+            tables = {name: pd.read_parquet(path / f"{name}.parquet") for name in TABLES}
+        reports = tables["reports"]
+        reports["timestamp"] = pd.to_datetime(reports["timestamp"]).astype("datetime64[ns]")
+        reports["priority"] = pd.Categorical(reports["priority"], categories=PRIORITY_ORDER)
+        reports["categories"] = reports["categories"].map(list)
+        reports[["total_agents", "total_recommendations"]] = reports[["total_agents", "total_recommendations"]].astype(np.int64)
+        recommendations = tables["recommendations"]
+        recommendations["count"] = recommendations["count"].astype(np.int64)
+        recommendations["recommendations"] = recommendations["recommendations"].map(list)
+        return cls(**tables)
+
+    def to_parquet(self, directory: str) -> None:
+        """Persist the columnar tables to disk with the exporter schemas (requires pyarrow)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        frames = {name: getattr(self, name) for name in TABLES}
+        frames["reports"] = frames["reports"].assign(
+            timestamp=frames["reports"]["timestamp"].dt.floor("s"),
+            priority=frames["reports"]["priority"].astype(object).where(frames["reports"]["priority"].notna(), None),
+        )
+        for name, schema in report_schemas().items():
+            table = pa.Table.from_pandas(frames[name][schema.names], schema=schema, preserve_index=False)
+            pq.write_table(table, directory / f"{name}.parquet")
+
+    def _report_column(self, column: str, report_ids: pd.Series) -> np.ndarray:
+        """Values of a ``reports`` column aligned to a list of report ids"""
+        by_id = self.reports.drop_duplicates("report_id").set_index("report_id")[column]
+        return by_id.reindex(report_ids).to_numpy()
+
+    def component_frequency(self, by_request_category: bool = False) -> pd.DataFrame:
+        """Count component mentions per component type, optionally split by request category"""
+        if not by_request_category:
+            counts = self.components["component_type"].value_counts()
+            reports_with = self.components.drop_duplicates(["report_id", "component_type"])["component_type"].value_counts()
+            frame = pd.DataFrame({"mentions": counts, "reports": reports_with})
+            frame["report_share"] = frame["reports"] / max(len(self.reports), 1)
+            return frame.sort_values("mentions", ascending=False)
+
+        categories = self.reports[["report_id", "categories"]].explode("categories").dropna()
+        merged = self.components.merge(categories, on="report_id")
+        return pd.crosstab(merged["categories"], merged["component_type"])
+
+    def risk_keyword_trends(self, freq: str = "D", keywords: Optional[List[str]] = None) -> pd.DataFrame:
+        """Count risk sentences mentioning each keyword per time period"""
+        keywords = keywords or RISK_KEYWORDS
+        # An empty text column comes out as float, and undated risks can't be bucketed by period
+        lowered = self.risks["text"].astype(str).str.lower()
+        timestamps = pd.DatetimeIndex(self._report_column("timestamp", self.risks["report_id"]), name="period")
+        dated = ~timestamps.isna()
+        if not dated.any():
+            return pd.DataFrame(columns=keywords, index=pd.DatetimeIndex([], name="period"), dtype=np.int64)
+        hits = pd.DataFrame(
+            {keyword: lowered.str.contains(keyword, regex=False).to_numpy()[dated] for keyword in keywords},
+            index=timestamps[dated]
+        )
+        return hits.groupby(pd.Grouper(freq=freq)).sum().astype(np.int64)
+
+    def recommendation_counts(self) -> pd.DataFrame:
+        """Total recommendations per agent and priority"""
+        priorities = self._report_column("priority", self.recommendations["report_id"])
+        frame = self.recommendations.assign(priority=pd.Categorical(priorities, categories=PRIORITY_ORDER))
+        return frame.pivot_table(
+            index="agent", columns="priority", values="count",
+            aggfunc="sum", fill_value=0, observed=False
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Headline numbers for the loaded report collection"""
+        return {
+            "total_reports": int(len(self.reports)),
+            "total_recommendations": int(self.recommendations["count"].sum()),
+            "total_risks": int(len(self.risks)),
+            "total_components": int(len(self.components)),
+            "first_report": self.reports["timestamp"].min(),
+            "last_report": self.reports["timestamp"].max(),
+        }
@@ -13,10 +13,9 @@ from anthropic import Anthropic
 import os
 from dotenv import load_dotenv
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import pandas as pd
 import datetime
-import networkx as nx
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import plotly.express as px
@@ -24,6 +23,22 @@ from plotly.subplots import make_subplots
 import numpy as np
 import io
 import base64
+import uuid
+from exporters import EXPORTERS, generate_markdown_report
+from conversation import ConversationRunner, TurnFailedError
+from hedging import HEDGE_ENABLED
+from scheduler import SCHEDULER
+from transcripts import TRANSCRIPTS, CompressedTranscript
+from patterns import default_index, grounding_context
+from slo import ANSWER_CACHE, SLO_CONTROLLER
+from variants import VariantRunner, compare_variants, expand_variants
+from profiling import PROFILER, admin_authorized, session_label
+from compaction import TURN_TOKEN_BUDGET, build_compactor
+from layout import RING_TYPES, layout_signature, radial_layout, spoke_segments
+from worker_pool import JobQueue
+from roster import RosterPlanner
+from structured_output import STRUCTURED_OUTPUT_INSTRUCTIONS, parse_structured_response, strip_structured_block
+import plotly.io as pio
 
 # Load environment variables
 load_dotenv()
@@ -31,21 +46,25 @@ load_dotenv()
 class AnthropicConfig:
     """Configuration for Anthropic API with AutoGen"""
     
+    DEFAULT_MAX_TOKENS = 2000
+
     @staticmethod
-    def get_config():
+    def get_config(max_tokens: Optional[int] = None):
         return {
             "model": "claude-3-5-sonnet-20240620",
             "api_key": os.getenv("ANTHROPIC_API_KEY"),
             "api_type": "anthropic",
             "temperature": 0.7,
-            "max_tokens": 2000,
+            "max_tokens": max_tokens or AnthropicConfig.DEFAULT_MAX_TOKENS,
         }
 
 class ArchitectureAgents:
     """Define all the architecture agents from your diagram"""
     
-    def __init__(self):
-        self.config = AnthropicConfig.get_config()
+    def __init__(self, structured_output: bool = False, max_tokens: Optional[int] = None):
+        self.config = AnthropicConfig.get_config(max_tokens)
+        self.structured_output = structured_output
+        self.max_tokens = self.config["max_tokens"]
         self.agents = {}
         self.setup_agents()
     
@@ -118,16 +137,30 @@ class ArchitectureAgents:
             code_execution_config=False,
             system_message="You represent the business requirements and user needs."
         )
+        
+        # Ask specialists to append a machine-readable summary to each answer
+        if self.structured_output:
+            for key in ["head_of_architecture", "cloud_architect", "oss_architect", "lead_architect"]:
+                agent = self.agents[key]
+                agent.update_system_message(agent.system_message + STRUCTURED_OUTPUT_INSTRUCTIONS)
 
-    def create_group_chat(self):
-        """Create the group chat manager from your diagram"""
+    def create_group_chat(self, roster: Optional[List[str]] = None):
+        """Create the group chat manager from your diagram
         
-        agent_list = list(self.agents.values())
+        ``roster`` limits the chat to the named specialists (see ``RosterPlanner``);
+        by default every specialist takes part.
+        """
+        
+        agent_list = [
+            agent for agent in self.agents.values()
+            if roster is None or agent.name in roster or agent is self.agents["user_proxy"]
+        ]
+        specialist_count = len(agent_list) - 1
         
         group_chat = autogen.GroupChat(
             agents=agent_list,
             messages=[],
-            max_round=5,  # One round per agent (4 agents + 1 user proxy)
+            max_round=specialist_count + 1,  # One round per specialist plus the user proxy
             speaker_selection_method="round_robin"
         )
         
@@ -138,8 +171,8 @@ class ArchitectureAgents:
             for msg in messages:
                 if msg.get("name") and msg.get("name") != "BusinessUser":
                     agent_responses.add(msg.get("name"))
-            # Terminate when all 4 agents have spoken
-            return len(agent_responses) >= 4
+            # Terminate when every specialist on the roster has spoken
+            return len(agent_responses) >= specialist_count
         
         group_chat_manager = autogen.GroupChatManager(
             groupchat=group_chat,
@@ -156,6 +189,15 @@ class ArchitectureAgents:
         
         return group_chat_manager, group_chat
 
+def agent_messages(messages: List[Dict]) -> List[Dict]:
+    """The specialists' answers, without the BusinessUser opening
+
+    The opening holds the request, its categories and the reference pattern
+    catalog; report sections mined from it would echo the request instead of
+    the team's advice.
+    """
+    return [msg for msg in messages if msg.get("name") != "BusinessUser"]
+
 class ArchitectureReportGenerator:
     """Generate comprehensive reports from agent conversations"""
     
@@ -178,6 +220,12 @@ class ArchitectureReportGenerator:
             
             if agent_name == "BusinessUser" or not content.strip():
                 continue
+            
+            # Use the structured summary when present, otherwise mine the free text
+            structured = parse_structured_response(content)
+            if structured is not None:
+                recommendations[agent_name] = structured["recommendations"][:10]
+                continue
                 
             # Extract key points from each agent's response
             key_points = self._extract_key_points(content)
@@ -253,6 +301,7 @@ class ArchitectureReportGenerator:
         
         report = {
             "metadata": {
+                "report_id": uuid.uuid4().hex,
                 "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "user_request": user_request,
                 "categories": categories,
@@ -295,13 +344,17 @@ class ArchitectureReportGenerator:
     def _extract_insights(self, messages: List[Dict]) -> List[str]:
         """Extract key insights from the conversation"""
         insights = []
-        all_content = " ".join([msg.get("content", "") for msg in messages])
+        all_content = " ".join([msg.get("content", "") for msg in agent_messages(messages)])
         
         # Look for insight keywords
         insight_keywords = ["insight", "key finding", "important", "critical", "essential", "crucial", "significant"]
         
-        for msg in messages:
+        for msg in agent_messages(messages):
             content = msg.get("content", "")
+            structured = parse_structured_response(content)
+            if structured is not None:
+                insights.extend(structured["insights"])
+                continue
             if any(keyword in content.lower() for keyword in insight_keywords):
                 # Extract sentences containing insight keywords
                 sentences = content.split('.')
@@ -329,8 +382,12 @@ class ArchitectureReportGenerator:
         """Extract risk assessment from messages"""
         risks = []
         
-        for msg in messages:
+        for msg in agent_messages(messages):
             content = msg.get("content", "")
+            structured = parse_structured_response(content)
+            if structured is not None:
+                risks.extend(structured["risks"])
+                continue
             if any(keyword in content.lower() for keyword in ["risk", "challenge", "concern", "issue", "problem", "limitation"]):
                 # Extract risk-related sentences
                 sentences = content.split('.')
@@ -345,8 +402,12 @@ class ArchitectureReportGenerator:
         """Extract cost considerations from messages"""
         costs = []
         
-        for msg in messages:
+        for msg in agent_messages(messages):
             content = msg.get("content", "")
+            structured = parse_structured_response(content)
+            if structured is not None:
+                costs.extend(structured["costs"])
+                continue
             if any(keyword in content.lower() for keyword in ["cost", "budget", "price", "expensive", "cheap", "affordable", "optimization"]):
                 # Extract cost-related sentences
                 sentences = content.split('.')
@@ -371,6 +432,17 @@ class DynamicGraphGenerator:
             'monitoring': '#98D8C8',
             'user': '#F7DC6F'
         }
+        # Color key and marker size for each component type in the architecture diagram
+        self.diagram_styles = {
+            'cloud_services': ('cloud', 15),
+            'databases': ('database', 12),
+            'apis': ('api', 8),
+            'microservices': ('service', 10),
+            'storage': ('storage', 10),
+            'security': ('security', 10),
+            'monitoring': ('monitoring', 10),
+            'user_interfaces': ('user', 10)
+        }
     
     def extract_architecture_components(self, messages: List[Dict]) -> Dict[str, List[str]]:
         """Extract architecture components from agent messages"""
@@ -397,7 +469,13 @@ class DynamicGraphGenerator:
             'user_interfaces': ['ui', 'frontend', 'web', 'mobile', 'react', 'angular', 'vue']
         }
         
-        for msg in messages:
+        for msg in agent_messages(messages):
+            structured = parse_structured_response(msg.get("content", ""))
+            if structured is not None:
+                for component_type, items in structured["components"].items():
+                    components[component_type].extend(items)
+                continue
+            
             content = msg.get("content", "").lower()
             agent_name = msg.get("name", "")
             
@@ -419,77 +497,27 @@ class DynamicGraphGenerator:
     def create_architecture_diagram(self, components: Dict[str, List[str]], user_request: str) -> go.Figure:
         """Create an interactive architecture diagram using Plotly"""
         
-        # Create a network graph
-        G = nx.Graph()
-        
-        # Add central node for the main application
-        G.add_node("Main Application", node_type="application", size=20, color=self.colors['service'])
-        
-        # Add components as nodes
-        node_positions = {}
-        node_info = {}
-        
-        # Position nodes in a circular layout around the main application
-        center_x, center_y = 0, 0
-        radius = 3
-        
-        # Add cloud services
-        for i, service in enumerate(components['cloud_services']):
-            angle = (2 * 3.14159 * i) / max(len(components['cloud_services']), 1)
-            x = center_x + radius * 1.5 * np.cos(angle)
-            y = center_y + radius * 1.5 * np.sin(angle)
-            node_id = f"Cloud_{i}"
-            G.add_node(node_id, node_type="cloud", size=15, color=self.colors['cloud'])
-            node_positions[node_id] = (x, y)
-            node_info[node_id] = service[:50] + "..." if len(service) > 50 else service
-            G.add_edge("Main Application", node_id)
-        
-        # Add databases
-        for i, db in enumerate(components['databases']):
-            angle = (2 * 3.14159 * i) / max(len(components['databases']), 1)
-            x = center_x + radius * 2 * np.cos(angle)
-            y = center_y + radius * 2 * np.sin(angle)
-            node_id = f"DB_{i}"
-            G.add_node(node_id, node_type="database", size=12, color=self.colors['database'])
-            node_positions[node_id] = (x, y)
-            node_info[node_id] = db[:50] + "..." if len(db) > 50 else db
-            G.add_edge("Main Application", node_id)
-        
-        # Add microservices
-        for i, service in enumerate(components['microservices']):
-            angle = (2 * 3.14159 * i) / max(len(components['microservices']), 1)
-            x = center_x + radius * 1 * np.cos(angle)
-            y = center_y + radius * 1 * np.sin(angle)
-            node_id = f"Service_{i}"
-            G.add_node(node_id, node_type="microservice", size=10, color=self.colors['service'])
-            node_positions[node_id] = (x, y)
-            node_info[node_id] = service[:50] + "..." if len(service) > 50 else service
-            G.add_edge("Main Application", node_id)
-        
-        # Add APIs
-        for i, api in enumerate(components['apis']):
-            angle = (2 * 3.14159 * i) / max(len(components['apis']), 1)
-            x = center_x + radius * 0.5 * np.cos(angle)
-            y = center_y + radius * 0.5 * np.sin(angle)
-            node_id = f"API_{i}"
-            G.add_node(node_id, node_type="api", size=8, color=self.colors['api'])
-            node_positions[node_id] = (x, y)
-            node_info[node_id] = api[:50] + "..." if len(api) > 50 else api
-            G.add_edge("Main Application", node_id)
-        
-        # Set main application position
-        node_positions["Main Application"] = (center_x, center_y)
-        node_info["Main Application"] = "Main Application"
-        
-        # Create edge traces
-        edge_x = []
-        edge_y = []
-        for edge in G.edges():
-            x0, y0 = node_positions[edge[0]]
-            x1, y1 = node_positions[edge[1]]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
+        # Node positions come from the cached vectorized layout for this component mix
+        signature = layout_signature(components)
+        layout = radial_layout(signature)
+        
+        # Per-ring styling, expanded to per-node arrays by indexing with the ring ids
+        ring_colors = np.array([self.colors[self.diagram_styles[t][0]] for t in RING_TYPES], dtype=object)
+        ring_sizes = np.array([self.diagram_styles[t][1] for t in RING_TYPES])
+        node_text = ["Main Application"] + [
+            item[:50] + "..." if len(item) > 50 else item
+            for component_type in RING_TYPES
+            for item in components.get(component_type, [])
+        ]
+        
+        # The main application sits at the centre, ahead of the ring nodes
+        node_x = np.concatenate(([0.0], layout["x"]))
+        node_y = np.concatenate(([0.0], layout["y"]))
+        node_colors = np.concatenate(([self.colors['service']], ring_colors[layout["ring"]]))
+        node_sizes = np.concatenate(([20], ring_sizes[layout["ring"]]))
         
+        # Create edge trace: one NaN-separated spoke per component
+        edge_x, edge_y = spoke_segments(layout["x"], layout["y"])
         edge_trace = go.Scatter(
             x=edge_x, y=edge_y,
             line=dict(width=2, color='#888'),
@@ -497,24 +525,10 @@ class DynamicGraphGenerator:
             mode='lines'
         )
         
-        # Create node traces
-        node_x = []
-        node_y = []
-        node_text = []
-        node_colors = []
-        node_sizes = []
-        
-        for node in G.nodes():
-            x, y = node_positions[node]
-            node_x.append(x)
-            node_y.append(y)
-            node_text.append(node_info[node])
-            node_colors.append(G.nodes[node]['color'])
-            node_sizes.append(G.nodes[node]['size'])
-        
+        # Labels stay readable for small diagrams; large ones rely on hover text
         node_trace = go.Scatter(
             x=node_x, y=node_y,
-            mode='markers+text',
+            mode='markers+text' if len(node_x) <= 40 else 'markers',
             hoverinfo='text',
             text=node_text,
             textposition="middle center",
@@ -528,8 +542,7 @@ class DynamicGraphGenerator:
         # Create the figure
         fig = go.Figure(data=[edge_trace, node_trace],
                        layout=go.Layout(
-                           title=f'Architecture Diagram: {user_request[:50]}...',
-                           titlefont_size=16,
+                           title=dict(text=f'Architecture Diagram: {user_request[:50]}...', font=dict(size=16)),
                            showlegend=False,
                            hovermode='closest',
                            margin=dict(b=20,l=5,r=5,t=40),
@@ -542,7 +555,7 @@ class DynamicGraphGenerator:
                                font=dict(color="gray", size=12)
                            )],
                            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                           yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                           yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, scaleanchor="x"),
                            plot_bgcolor='white'
                        ))
         
@@ -572,8 +585,7 @@ class DynamicGraphGenerator:
         )])
         
         fig.update_layout(
-            title="Architecture Components Distribution",
-            titlefont_size=16,
+            title=dict(text="Architecture Components Distribution", font=dict(size=16)),
             showlegend=True
         )
         
@@ -663,109 +675,190 @@ class DynamicGraphGenerator:
         
         return fig
 
-def generate_markdown_report(detailed_report: Dict, summary_table: pd.DataFrame) -> str:
-    """Generate a comprehensive markdown report"""
-    
-    metadata = detailed_report["metadata"]
+def format_request(user_request: str, categories: List[str], urgency: str, pattern_context: str = "") -> str:
+    """Format the user's request with its categories and priority for the agents
     
-    markdown_content = f"""# Multi-Agent Architecture Advisory Report
-
-**Generated:** {metadata['timestamp']}  
-**Request:** {metadata['user_request']}  
-**Categories:** {', '.join(metadata['categories'])}  
-**Priority:** {metadata['priority']}  
-**Total Agents:** {metadata['total_agents']}  
-**Total Recommendations:** {metadata['total_recommendations']}
-
----
-
-## 📋 Agent Recommendations Summary
+    ``pattern_context`` is the reference block from ``patterns.grounding_context``.
+    """
+    if pattern_context:
+        pattern_context = "\n" + pattern_context + "\n"
+    return f"""
+        **Architecture Request:** {user_request}
+        
+        **Categories:** {', '.join(categories) if categories else 'General'}
+        **Priority:** {urgency}
+        {pattern_context}
+        Please analyze this request and provide comprehensive architectural recommendations.
+        Consider multiple perspectives and ensure all relevant aspects are covered.
+        """
 
-| Agent | Role | Focus Area | Recommendation Count |
-|-------|------|------------|---------------------|
-"""
+def build_report(messages: List[Dict], user_request: str, categories: List[str], urgency: str,
+                 extra_metadata: Optional[Dict] = None) -> Tuple[pd.DataFrame, Dict]:
+    """Generate the summary table and detailed report (with components) for a conversation"""
+    report_generator = ArchitectureReportGenerator()
+    graph_generator = DynamicGraphGenerator()
+    if isinstance(messages, CompressedTranscript):
+        # Every extractor reads each message; decode once for this report instead of per read
+        messages = messages.to_dicts()
     
-    # Add summary table rows
-    for _, row in summary_table.iterrows():
-        markdown_content += f"| {row['Agent']} | {row['Role']} | {row['Focus Area']} | {row['Recommendation Count']} |\n"
+    summary_table = report_generator.generate_summary_table(messages, user_request, categories, urgency)
+    detailed_report = report_generator.generate_detailed_report(messages, user_request, categories, urgency)
+    detailed_report["components"] = graph_generator.extract_architecture_components(messages)
+    detailed_report["metadata"].update(extra_metadata or {})
     
-    markdown_content += "\n---\n\n## 🔍 Key Insights\n\n"
+    return summary_table, detailed_report
+
+def build_figures(detailed_report: Dict, user_request: str) -> Dict[str, go.Figure]:
+    """Build the Plotly figures shown under Dynamic Architecture Visualizations"""
+    graph_generator = DynamicGraphGenerator()
+    components = detailed_report["components"]
+    return {
+        "distribution": graph_generator.create_component_distribution_chart(components),
+        "timeline": graph_generator.create_implementation_timeline(detailed_report),
+        "diagram": graph_generator.create_architecture_diagram(components, user_request),
+    }
+
+def render_results(messages: List[Dict], summary_table: pd.DataFrame, detailed_report: Dict, figures: Dict[str, go.Figure],
+                   key: Optional[str] = None):
+    """Render the conversation, report, visualizations and exports
     
-    # Add key insights
-    if detailed_report["key_insights"]:
-        for i, insight in enumerate(detailed_report["key_insights"], 1):
-            markdown_content += f"{i}. {insight}\n"
-    else:
-        markdown_content += "No specific insights extracted from the conversation.\n"
+    ``key`` keeps widgets distinct when several results are rendered on one page.
+    """
+    widget_key = (lambda name: f"{key}_{name}") if key else (lambda name: None)
     
-    markdown_content += "\n---\n\n## ⚠️ Risk Assessment\n\n"
+    # Display results
+    st.header("💡 Architecture Recommendations")
     
-    # Add risk assessment
-    if detailed_report["risk_assessment"]:
-        for i, risk in enumerate(detailed_report["risk_assessment"], 1):
-            markdown_content += f"{i}. {risk}\n"
-    else:
-        markdown_content += "No specific risks identified in the conversation.\n"
+    # Show conversation history
+    for i, msg in enumerate(messages):
+        agent_name = msg.get("name", "Unknown")
+        content = msg.get("content", "")
+        
+        # Skip empty messages
+        if not content.strip():
+            continue
+        
+        # Create expandable sections for each agent response
+        with st.expander(f"💬 {agent_name} Response", expanded=(i == len(messages)-1)):
+            st.markdown(strip_structured_block(content))
     
-    markdown_content += "\n---\n\n## 💰 Cost Considerations\n\n"
+    if not messages:
+        return
     
-    # Add cost considerations
-    if detailed_report["cost_considerations"]:
-        for i, cost in enumerate(detailed_report["cost_considerations"], 1):
-            markdown_content += f"{i}. {cost}\n"
-    else:
-        markdown_content += "No specific cost considerations mentioned.\n"
+    # Catalog patterns the specialists cited by ID instead of re-explaining them
+    cited = default_index().cited_patterns(" ".join(msg.get("content", "") for msg in messages[1:]))
+    if cited:
+        with st.expander(f"📚 Referenced Patterns ({len(cited)})"):
+            for pattern in cited:
+                st.markdown(f"**[{pattern['id']}] {pattern['name']}** · {pattern['category']}  \n{pattern['summary']}")
     
-    markdown_content += "\n---\n\n## 📈 Implementation Roadmap\n\n"
+    st.header("📊 Comprehensive Architecture Report")
     
-    # Add implementation roadmap
-    for phase in detailed_report["implementation_roadmap"]:
-        markdown_content += f"### {phase['phase']}\n"
-        markdown_content += f"**Duration:** {phase['duration']}\n"
-        markdown_content += f"**Description:** {phase['description']}\n\n"
+    # Display summary table
+    st.subheader("📋 Agent Recommendations Summary")
+    st.dataframe(
+        summary_table,
+        use_container_width=True,
+        hide_index=True
+    )
     
-    markdown_content += "\n---\n\n## 📊 Detailed Agent Recommendations\n\n"
+    # Display detailed report sections
+    col1, col2 = st.columns(2)
     
-    # Add detailed agent recommendations
-    for agent_name, agent_data in detailed_report["agent_summaries"].items():
-        markdown_content += f"### {agent_name} - {agent_data['role']}\n"
-        markdown_content += f"**Focus Area:** {agent_data['focus_area']}\n"
-        markdown_content += f"**Recommendation Count:** {agent_data['count']}\n\n"
+    with col1:
+        st.subheader("🔍 Key Insights")
+        if detailed_report["key_insights"]:
+            for i, insight in enumerate(detailed_report["key_insights"], 1):
+                st.write(f"{i}. {insight}")
+        else:
+            st.info("No specific insights extracted from the conversation.")
         
-        if agent_data['recommendations']:
-            markdown_content += "**Key Recommendations:**\n"
-            for i, rec in enumerate(agent_data['recommendations'], 1):
-                markdown_content += f"{i}. {rec}\n"
+        st.subheader("⚠️ Risk Assessment")
+        if detailed_report["risk_assessment"]:
+            for i, risk in enumerate(detailed_report["risk_assessment"], 1):
+                st.write(f"{i}. {risk}")
+        else:
+            st.info("No specific risks identified in the conversation.")
+    
+    with col2:
+        st.subheader("💰 Cost Considerations")
+        if detailed_report["cost_considerations"]:
+            for i, cost in enumerate(detailed_report["cost_considerations"], 1):
+                st.write(f"{i}. {cost}")
         else:
-            markdown_content += "No specific recommendations provided.\n"
+            st.info("No specific cost considerations mentioned.")
         
-        markdown_content += "\n---\n\n"
+        st.subheader("📈 Implementation Roadmap")
+        roadmap_df = pd.DataFrame(detailed_report["implementation_roadmap"])
+        st.dataframe(roadmap_df, use_container_width=True, hide_index=True)
     
-    markdown_content += f"""
-## 📊 Report Summary
-
-This comprehensive architecture report was generated by analyzing the multi-agent conversation between {metadata['total_agents']} specialized architecture agents. The report includes {metadata['total_recommendations']} total recommendations across various architectural domains.
-
-### Report Sections:
-- **Agent Recommendations Summary**: Overview of each agent's contributions
-- **Key Insights**: Critical findings from the conversation
-- **Risk Assessment**: Identified risks and challenges
-- **Cost Considerations**: Financial implications and optimizations
-- **Implementation Roadmap**: Phased approach to implementation
-- **Detailed Agent Recommendations**: Comprehensive recommendations from each specialist
-
-### Next Steps:
-1. Review all agent recommendations carefully
-2. Prioritize recommendations based on business needs
-3. Develop detailed implementation plans
-4. Consider risk mitigation strategies
-5. Plan cost optimization approaches
-
----
-*Report generated by Multi-Agent Architecture Advisory System*
-"""
+    # Display dynamic graphs
+    st.header("📊 Dynamic Architecture Visualizations")
+    
+    components = detailed_report["components"]
+    
+    # Create tabs for different visualizations
+    tab1, tab2, tab3 = st.tabs(["📊 Component Distribution", "⏱️ Implementation Timeline", "🏗️ Architecture Diagram"])
+    
+    with tab1:
+        st.subheader("Architecture Components Distribution")
+        st.plotly_chart(figures["distribution"], use_container_width=True, key=widget_key("distribution"))
+        
+        # Show component details
+        st.subheader("📋 Identified Components")
+        for component_type, component_list in components.items():
+            if component_list:
+                with st.expander(f"{component_type.replace('_', ' ').title()} ({len(component_list)} items)"):
+                    for i, component in enumerate(component_list, 1):
+                        st.write(f"{i}. {component}")
+    
+    with tab2:
+        st.subheader("Implementation Timeline")
+        st.plotly_chart(figures["timeline"], use_container_width=True, key=widget_key("timeline"))
+    
+    with tab3:
+        st.subheader("Architecture Diagram")
+        st.plotly_chart(figures["diagram"], use_container_width=True, key=widget_key("diagram"))
+    
+    # Export functionality
+    st.subheader("📥 Export Report")
+    
+    export_columns = st.columns(len(EXPORTERS))
+    export_timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    for column, exporter in zip(export_columns, EXPORTERS.values()):
+        with column:
+            try:
+                export_data = exporter.export(detailed_report, summary_table)
+            except ImportError as e:
+                st.caption(f"{exporter.label} unavailable: {e}")
+                continue
+            st.download_button(
+                label=exporter.label,
+                data=export_data,
+                file_name=f"{exporter.file_prefix}_{export_timestamp}.{exporter.extension}",
+                mime=exporter.mime,
+                key=widget_key(f"export_{exporter.extension}")
+            )
+    
+    # Display metadata
+    st.subheader("📊 Report Metadata")
+    metadata = detailed_report["metadata"]
+    col1, col2, col3, col4 = st.columns(4)
     
-    return markdown_content
+    with col1:
+        st.metric("Total Agents", metadata["total_agents"])
+    with col2:
+        st.metric("Total Recommendations", metadata["total_recommendations"])
+    with col3:
+        st.metric("Categories", len(metadata["categories"]))
+    with col4:
+        st.metric("Priority", metadata["priority"])
+    if metadata.get("degradation_level"):
+        st.caption(
+            f"🚦 Produced in degraded mode: {metadata['degradation_mode'].replace('_', ' ')} "
+            f"(level {metadata['degradation_level']})"
+        )
 
 def main():
     st.set_page_config(
@@ -777,6 +870,10 @@ def main():
     st.title("🏗️ Multi-Agent Architecture Advisory System")
     st.markdown("*Powered by AutoGen + Anthropic Claude*")
     
+    # Hidden admin panel for on-call memory investigations, behind ARCHITECTURE_ADMIN_TOKEN
+    if st.query_params.get("admin") == "memory" and admin_authorized(st.query_params.get("admin_token")):
+        render_memory_panel()
+    
     # Sidebar for configuration
     with st.sidebar:
         st.header("⚙️ Configuration")
@@ -798,17 +895,100 @@ def main():
         - **OSS Architect**: Open source specialist
         - **Lead Architect**: General architecture expert
         """)
+        
+        st.header("🧠 Context Compaction")
+        compact_context = st.checkbox(
+            "Compact earlier answers for later speakers",
+            value=True,
+            help="Replace earlier specialist answers with their key points when a turn exceeds its token budget"
+        )
+        turn_token_budget = st.number_input(
+            "Token budget per turn",
+            min_value=500,
+            max_value=20000,
+            value=TURN_TOKEN_BUDGET,
+            step=250,
+            disabled=not compact_context
+        )
+        
+        st.header("🧭 Agent Roster")
+        force_full_panel = st.checkbox(
+            "Force full panel",
+            value=False,
+            help="Invoke every specialist instead of only those relevant to the request"
+        )
+        
+        st.header("🧾 Output Format")
+        structured_output = st.checkbox(
+            "Structured output mode",
+            value=False,
+            help="Specialists append a JSON summary that the report reads directly instead of mining the free text"
+        )
+        ground_patterns = st.checkbox(
+            "Ground agents with pattern references",
+            value=True,
+            help="Give specialists the most relevant catalog patterns so they cite them by ID instead of re-explaining them"
+        )
+        
+        st.header("🏭 Execution")
+        use_worker_pool = st.checkbox(
+            "Run in background worker pool",
+            value=os.getenv("ARCHITECTURE_USE_WORKERS", "").lower() in ("1", "true", "yes"),
+            help="Enqueue the conversation for `python worker_pool.py` workers instead of running it in this session"
+        )
+        hedge_requests = st.checkbox(
+            "Hedge slow agent calls",
+            value=HEDGE_ENABLED,
+            help="Send a duplicate request when an agent is slower than its observed p95 latency and keep the first reply"
+        )
+        team = st.text_input(
+            "Team",
+            value=os.getenv("ARCHITECTURE_TEAM", "default"),
+            help="API capacity is shared fairly across teams and users; see ARCHITECTURE_TEAM_WEIGHTS"
+        )
+        
+        with st.expander("⏱️ Scheduler queue waits"):
+            wait_stats = SCHEDULER.wait_stats_frame()
+            st.dataframe(wait_stats.round(2), use_container_width=True)
+            st.download_button(
+                "📥 Download wait stats (CSV)",
+                data=wait_stats.to_csv(),
+                file_name=f"scheduler_waits_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv"
+            )
+        
+        # Degradation level that new requests from this rerun will be served at
+        service_level = SLO_CONTROLLER.evaluate()
+        st.header("🚦 Service Level")
+        signals = service_level["signals"]
+        level_message = (
+            f"**{service_level['label']}** (level {service_level['level']}) · "
+            f"queue {signals['queue_depth']}, {signals['queued_jobs']} jobs queued, p95 turn {signals['p95_latency']:.1f}s, "
+            f"{signals['rate_limited']:.0%} rate limited"
+        )
+        if service_level["level"] == 0:
+            st.success(level_message)
+        elif service_level["llm"]:
+            st.warning(level_message)
+        else:
+            st.error(level_message)
     
     # Main interface
     if not api_key:
         st.warning("⚠️ Please enter your Anthropic API key in the sidebar to continue.")
         return
     
-    # Initialize agents
-    if 'agents_system' not in st.session_state:
+    # Identifies this browser session for fair sharing of API capacity
+    st.session_state.setdefault("session_user", uuid.uuid4().hex[:8])
+    if PROFILER.enabled:
+        PROFILER.account_session(st.session_state.session_user, st.session_state)
+    
+    # Initialize agents (rebuilt when the service level changes the answer length)
+    max_tokens = AnthropicConfig.get_config(service_level["max_tokens"])["max_tokens"]
+    agents_system = st.session_state.get("agents_system")
+    if agents_system is None or agents_system.structured_output != structured_output or agents_system.max_tokens != max_tokens:
         with st.spinner("Initializing AI Architecture Team..."):
-            st.session_state.agents_system = ArchitectureAgents()
-            st.session_state.group_chat_manager, st.session_state.group_chat = st.session_state.agents_system.create_group_chat()
+            st.session_state.agents_system = ArchitectureAgents(structured_output=structured_output, max_tokens=max_tokens)
     
     # Input section
     st.header("📝 Architecture Request")
@@ -822,14 +1002,32 @@ def main():
             height=120
         )
     
+    category_options = ["Cloud Architecture", "Open Source", "Scalability", "Security", "Cost Optimization", "Integration"]
+    priority_options = ["Low", "Medium", "High", "Critical"]
+    
     with col2:
         st.markdown("**Request Categories:**")
-        categories = st.multiselect(
-            "Select relevant areas:",
-            ["Cloud Architecture", "Open Source", "Scalability", "Security", "Cost Optimization", "Integration"]
-        )
+        categories = st.multiselect("Select relevant areas:", category_options)
         
-        urgency = st.selectbox("Priority Level:", ["Low", "Medium", "High", "Critical"])
+        urgency = st.selectbox("Priority Level:", priority_options)
+    
+    # Variants share one specialist pass; only the synthesis is re-run per variant
+    compare = st.checkbox(
+        "🔀 Compare category/priority variants",
+        help="Run the specialists once and the Lead Architect synthesis once per variant, then compare the reports"
+    )
+    variants = []
+    if compare:
+        vcol1, vcol2, vcol3 = st.columns(3)
+        with vcol1:
+            variant_priorities = st.multiselect("Priorities to compare:", priority_options, default=[urgency])
+        with vcol2:
+            alternative_a = st.multiselect("Alternative categories A:", category_options)
+        with vcol3:
+            alternative_b = st.multiselect("Alternative categories B:", category_options)
+        category_sets = [categories] + [alternative for alternative in (alternative_a, alternative_b) if alternative]
+        variants = expand_variants(category_sets, variant_priorities or [urgency])
+        st.caption(f"{len(variants)} variant(s)")
     
     # Process request
     if st.button("🚀 Get Architecture Recommendations", type="primary"):
@@ -837,179 +1035,232 @@ def main():
             st.error("Please enter an architecture request.")
             return
         
-        # Format the request with context
-        formatted_request = f"""
-        **Architecture Request:** {user_request}
-        
-        **Categories:** {', '.join(categories) if categories else 'General'}
-        **Priority:** {urgency}
-        
-        Please analyze this request and provide comprehensive architectural recommendations.
-        Consider multiple perspectives and ensure all relevant aspects are covered.
-        """
+        # Format the request with context and the most relevant catalog patterns
+        grounding_categories = list(dict.fromkeys(c for variant in variants for c in variant["categories"])) or categories
+        pattern_context, pattern_ids = grounding_context(user_request, grounding_categories) if ground_patterns else ("", [])
+        formatted_request = format_request(user_request, categories, urgency, pattern_context)
+        degradation_metadata = {"degradation_level": service_level["level"], "degradation_mode": service_level["name"]}
         
-        # Create conversation
-        with st.spinner("🤔 Architecture team is collaborating..."):
-            try:
-                # Initiate the conversation
-                st.session_state.agents_system.agents["user_proxy"].initiate_chat(
-                    st.session_state.group_chat_manager,
-                    message=formatted_request
+        cached = None
+        if service_level["name"] == "reject":
+            st.warning(
+                f"🚦 The architecture team is over capacity. Please retry in about {service_level['retry_after']:.0f}s."
+            )
+            return
+        if not service_level["llm"]:
+            cached = ANSWER_CACHE.lookup(user_request, categories)
+            if cached is None and not use_worker_pool:
+                st.warning(
+                    "🚦 Only cached answers are served right now and no earlier conversation matches this request. "
+                    f"Please retry in about {service_level['retry_after']:.0f}s or use the background worker pool."
                 )
-                
-                # Display results
-                st.header("💡 Architecture Recommendations")
-                
-                # Show conversation history
-                messages = st.session_state.group_chat.messages
-                
-                for i, msg in enumerate(messages):
-                    agent_name = msg.get("name", "Unknown")
-                    content = msg.get("content", "")
-                    
-                    # Skip empty messages
-                    if not content.strip():
-                        continue
-                    
-                    # Create expandable sections for each agent response
-                    with st.expander(f"💬 {agent_name} Response", expanded=(i == len(messages)-1)):
-                        st.markdown(content)
-                
-                # Generate and display comprehensive report
-                if messages:
-                    st.header("📊 Comprehensive Architecture Report")
-                    
-                    # Initialize report generator and graph generator
-                    report_generator = ArchitectureReportGenerator()
-                    graph_generator = DynamicGraphGenerator()
-                    
-                    # Generate summary table
-                    summary_table = report_generator.generate_summary_table(
-                        messages, user_request, categories, urgency
+                return
+        
+        if cached is not None:
+            # Serve the closest earlier conversation instead of calling the agents
+            messages, similarity = cached
+            st.info(f"🚦 Under load: showing the answer to a similar earlier request ({similarity:.0%} match).")
+            extra_metadata = dict(degradation_metadata, cached_similarity=round(similarity, 2))
+            summary_table, detailed_report = build_report(
+                messages, user_request, categories, urgency, extra_metadata=extra_metadata
+            )
+            render_results(messages, summary_table, detailed_report, build_figures(detailed_report, user_request))
+        elif len(variants) > 1:
+            if use_worker_pool:
+                st.info("Variant comparisons run in this session rather than in the worker pool.")
+            compactor = None
+            if compact_context:
+                compactor = build_compactor(
+                    ArchitectureReportGenerator()._extract_key_points,
+                    token_budget=int(turn_token_budget)
+                )
+            with st.spinner(f"🤔 Architecture team is comparing {len(variants)} variants..."):
+                try:
+                    run_variant_comparison(
+                        VariantRunner(
+                            st.session_state.agents_system,
+                            compactor=compactor,
+                            hedge=hedge_requests,
+                            user=st.session_state.session_user,
+                            team=team
+                        ),
+                        user_request, variants, pattern_context, pattern_ids, force_full_panel,
+                        service_level["max_specialists"], degradation_metadata
                     )
-                    
-                    # Display summary table
-                    st.subheader("📋 Agent Recommendations Summary")
-                    st.dataframe(
-                        summary_table,
-                        use_container_width=True,
-                        hide_index=True
+                except TurnFailedError as e:
+                    st.error(f"An error occurred: {str(e)}")
+                    st.info("Click the button again to resume from the last completed agent turn.")
+                except Exception as e:
+                    st.error(f"An error occurred: {str(e)}")
+                    st.info("Please check your API key and try again.")
+        elif use_worker_pool:
+            # Hand the conversation to the background worker pool
+            job_id = JobQueue().enqueue({
+                "user_request": user_request,
+                "categories": categories,
+                "urgency": urgency,
+                "turn_token_budget": int(turn_token_budget) if compact_context else None,
+                "structured_output": structured_output,
+                "force_full_panel": force_full_panel,
+                "hedge": hedge_requests,
+                "ground_patterns": ground_patterns,
+                "user": st.session_state.session_user,
+                "team": team,
+                "degradation_level": service_level["level"],
+            }, priority=urgency)
+            st.session_state.setdefault("worker_jobs", []).append({"id": job_id, "request": user_request})
+            st.success(f"📨 Queued as job #{job_id}. Results appear under Background Jobs once a worker finishes.")
+        else:
+            # Create conversation
+            with st.spinner("🤔 Architecture team is collaborating..."):
+                try:
+                    # Decide which specialists this request needs
+                    roster_plan = RosterPlanner().plan(
+                        user_request, categories, urgency, force_full_panel,
+                        max_specialists=service_level["max_specialists"]
                     )
-                    
-                    # Generate detailed report
-                    detailed_report = report_generator.generate_detailed_report(
-                        messages, user_request, categories, urgency
+                    # The group chat lives only for this run; the transcript is kept compressed below
+                    group_chat_manager, group_chat = st.session_state.agents_system.create_group_chat(
+                        roster=roster_plan["specialists"]
                     )
                     
-                    # Display detailed report sections
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader("🔍 Key Insights")
-                        if detailed_report["key_insights"]:
-                            for i, insight in enumerate(detailed_report["key_insights"], 1):
-                                st.write(f"{i}. {insight}")
-                        else:
-                            st.info("No specific insights extracted from the conversation.")
-                        
-                        st.subheader("⚠️ Risk Assessment")
-                        if detailed_report["risk_assessment"]:
-                            for i, risk in enumerate(detailed_report["risk_assessment"], 1):
-                                st.write(f"{i}. {risk}")
-                        else:
-                            st.info("No specific risks identified in the conversation.")
-                    
-                    with col2:
-                        st.subheader("💰 Cost Considerations")
-                        if detailed_report["cost_considerations"]:
-                            for i, cost in enumerate(detailed_report["cost_considerations"], 1):
-                                st.write(f"{i}. {cost}")
-                        else:
-                            st.info("No specific cost considerations mentioned.")
-                        
-                        st.subheader("📈 Implementation Roadmap")
-                        roadmap_df = pd.DataFrame(detailed_report["implementation_roadmap"])
-                        st.dataframe(roadmap_df, use_container_width=True, hide_index=True)
-                    
-                    # Generate and display dynamic graphs
-                    st.header("📊 Dynamic Architecture Visualizations")
-                    
-                    # Extract architecture components
-                    components = graph_generator.extract_architecture_components(messages)
-                    
-                    # Create tabs for different visualizations
-                    tab1, tab2 = st.tabs(["📊 Component Distribution", "⏱️ Implementation Timeline"])
-                    
-                    with tab1:
-                        st.subheader("Architecture Components Distribution")
-                        distribution_fig = graph_generator.create_component_distribution_chart(components)
-                        st.plotly_chart(distribution_fig, use_container_width=True)
-                        
-                        # Show component details
-                        st.subheader("📋 Identified Components")
-                        for component_type, component_list in components.items():
-                            if component_list:
-                                with st.expander(f"{component_type.replace('_', ' ').title()} ({len(component_list)} items)"):
-                                    for i, component in enumerate(component_list, 1):
-                                        st.write(f"{i}. {component}")
-                    
-                    with tab2:
-                        st.subheader("Implementation Timeline")
-                        timeline_fig = graph_generator.create_implementation_timeline(detailed_report)
-                        st.plotly_chart(timeline_fig, use_container_width=True)
-                    
-                    # Export functionality
-                    st.subheader("📥 Export Report")
+                    # Run the conversation turn by turn, resuming from any saved checkpoint
+                    compactor = None
+                    if compact_context:
+                        compactor = build_compactor(
+                            ArchitectureReportGenerator()._extract_key_points,
+                            token_budget=int(turn_token_budget)
+                        )
                     
-                    col1, col2, col3 = st.columns(3)
+                    runner = ConversationRunner(
+                        group_chat_manager,
+                        group_chat,
+                        compactor=compactor,
+                        hedge=hedge_requests,
+                        priority=urgency,
+                        user=st.session_state.session_user,
+                        team=team
+                    )
+                    runner.run(
+                        st.session_state.agents_system.agents["user_proxy"],
+                        formatted_request,
+                        scope=st.session_state.session_user
+                    )
                     
-                    with col1:
-                        # Export summary table as CSV
-                        csv_data = summary_table.to_csv(index=False)
-                        st.download_button(
-                            label="📊 Download Summary Table (CSV)",
-                            data=csv_data,
-                            file_name=f"architecture_summary_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv"
+                    roster_caption = f"🧭 Roster: {', '.join(roster_plan['specialists'])}"
+                    if roster_plan["skipped"]:
+                        roster_caption += (
+                            f" · skipped {', '.join(roster_plan['skipped'])} "
+                            f"({roster_plan['llm_calls_saved']} LLM call(s) saved)"
                         )
+                    st.caption(f"{roster_caption} · {roster_plan['reason']}")
                     
-                    with col2:
-                        # Export detailed report as JSON
-                        json_data = json.dumps(detailed_report, indent=2)
-                        st.download_button(
-                            label="📋 Download Detailed Report (JSON)",
-                            data=json_data,
-                            file_name=f"architecture_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                            mime="application/json"
-                        )
+                    if runner.resumed_turns:
+                        st.info(f"♻️ Resumed from checkpoint: reused {runner.resumed_turns} completed agent turn(s).")
                     
-                    with col3:
-                        # Export as Markdown
-                        markdown_report = generate_markdown_report(detailed_report, summary_table)
-                        st.download_button(
-                            label="📄 Download Report (Markdown)",
-                            data=markdown_report,
-                            file_name=f"architecture_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
-                            mime="text/markdown"
+                    if runner.turn_stats:
+                        input_tokens = sum(stat["input_tokens"] for stat in runner.turn_stats)
+                        sent_tokens = sum(stat["compacted_input_tokens"] for stat in runner.turn_stats)
+                        turn_latency = sum(stat["latency_seconds"] for stat in runner.turn_stats)
+                        queue_wait = sum(stat.get("queue_wait_seconds", 0.0) for stat in runner.turn_stats)
+                        output_tokens = sum(stat.get("output_tokens", 0) for stat in runner.turn_stats)
+                        st.caption(
+                            f"🧠 Estimated input tokens: {sent_tokens:,} sent of {input_tokens:,}, "
+                            f"output tokens: {output_tokens:,} "
+                            f"({len(runner.turn_stats)} turns, {turn_latency:.1f}s total turn latency, "
+                            f"{sum(stat.get('hedged', False) for stat in runner.turn_stats)} hedged, "
+                            f"{queue_wait:.1f}s queued for {urgency} capacity)"
                         )
                     
-                    # Display metadata
-                    st.subheader("📊 Report Metadata")
-                    metadata = detailed_report["metadata"]
-                    col1, col2, col3, col4 = st.columns(4)
+                    # Keep the transcript compressed in the process-wide store, not in session state
+                    transcript_key = TRANSCRIPTS.put(group_chat.messages)
+                    group_chat.messages.clear()
+                    extra_metadata = {
+                        "roster": roster_plan["specialists"],
+                        "llm_calls_saved": roster_plan["llm_calls_saved"],
+                        "grounding_patterns": pattern_ids,
+                        **degradation_metadata,
+                    }
+                    st.session_state.setdefault("transcripts", []).append({
+                        "key": transcript_key,
+                        "request": user_request,
+                        "categories": categories,
+                        "urgency": urgency,
+                        "extra_metadata": extra_metadata,
+                    })
                     
-                    with col1:
-                        st.metric("Total Agents", metadata["total_agents"])
-                    with col2:
-                        st.metric("Total Recommendations", metadata["total_recommendations"])
-                    with col3:
-                        st.metric("Categories", len(metadata["categories"]))
-                    with col4:
-                        st.metric("Priority", metadata["priority"])
-                
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
-                st.info("Please check your API key and try again.")
+                    # Generate and display comprehensive report
+                    messages = TRANSCRIPTS.get(transcript_key)
+                    summary_table, detailed_report = build_report(
+                        messages, user_request, categories, urgency, extra_metadata=extra_metadata
+                    )
+                    figures = build_figures(detailed_report, user_request)
+                    render_results(messages, summary_table, detailed_report, figures)
+                    
+                except TurnFailedError as e:
+                    st.error(f"An error occurred: {str(e)}")
+                    st.info("Click the button again to resume from the last completed agent turn.")
+                except Exception as e:
+                    st.error(f"An error occurred: {str(e)}")
+                    st.info("Please check your API key and try again.")
+        
+        # Allocation snapshot per request while memory profiling is on
+        PROFILER.record_request(
+            "request",
+            session=session_label(st.session_state.session_user),
+            variants=len(variants),
+            transcripts=TRANSCRIPTS.stats()
+        )
+    
+    # Background jobs submitted from this session
+    if st.session_state.get("worker_jobs"):
+        st.header("🗂️ Background Jobs")
+        job_queue = JobQueue()
+        for job_ref in reversed(st.session_state.worker_jobs):
+            job = job_queue.get(job_ref["id"])
+            status = job["status"] if job else "missing"
+            with st.expander(f"Job #{job_ref['id']} · {status} · {job_ref['request'][:60]}"):
+                if status == "failed":
+                    st.error(job["error"].strip().splitlines()[-1])
+                elif status == "done" and st.button("Show results", key=f"show_job_{job_ref['id']}"):
+                    st.session_state.shown_job = job_ref["id"]
+                elif status in ("queued", "running"):
+                    st.info("Waiting for a worker. Rerun the page to refresh the status.")
+                elif status == "batched":
+                    st.info("Running in a Message Batches run. Rerun the page to refresh the status.")
+        
+        shown_job = st.session_state.get("shown_job")
+        if shown_job:
+            job = job_queue.get(shown_job)
+            if job and job["status"] == "done":
+                result = job["result"]
+                render_results(
+                    result["messages"],
+                    pd.DataFrame(result["summary_table"]),
+                    result["detailed_report"],
+                    {name: pio.from_json(figure) for name, figure in result["figures"].items()}
+                )
+    
+    # Earlier conversations from this session, rebuilt from their compressed transcripts
+    if st.session_state.get("transcripts"):
+        st.header("🕘 Session History")
+        for entry in reversed(st.session_state.transcripts):
+            with st.expander(f"{entry['urgency']} · {entry['request'][:60]}"):
+                if st.button("Show report", key=f"show_transcript_{entry['key']}"):
+                    st.session_state.shown_transcript = entry["key"]
+        
+        shown_transcript = st.session_state.get("shown_transcript")
+        entry = next((e for e in st.session_state.transcripts if e["key"] == shown_transcript), None)
+        if entry:
+            messages = TRANSCRIPTS.get(entry["key"])
+            if messages is None:
+                st.info("This transcript is no longer available.")
+            else:
+                summary_table, detailed_report = build_report(
+                    messages, entry["request"], entry["categories"], entry["urgency"],
+                    extra_metadata=entry["extra_metadata"]
+                )
+                render_results(messages, summary_table, detailed_report, build_figures(detailed_report, entry["request"]))
     
     # Additional features
     st.header("🔧 Additional Features")
@@ -1018,7 +1269,7 @@ def main():
     
     with col1:
         if st.button("📊 Architecture Patterns"):
-            st.info("Coming soon: Interactive architecture pattern explorer")
+            st.session_state.show_pattern_explorer = not st.session_state.get("show_pattern_explorer", False)
     
     with col2:
         if st.button("💾 Save Recommendations"):
@@ -1027,10 +1278,161 @@ def main():
     with col3:
         if st.button("🔄 New Session"):
             # Clear session state
-            for key in ['agents_system', 'group_chat_manager', 'group_chat']:
+            for entry in st.session_state.get("transcripts", []):
+                TRANSCRIPTS.discard(entry["key"])
+            PROFILER.forget_session(st.session_state.session_user)
+            for key in ['agents_system', 'transcripts', 'shown_transcript']:
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
 
+    if st.session_state.get("show_pattern_explorer"):
+        render_pattern_explorer()
+
+def run_variant_comparison(variant_runner: VariantRunner, user_request: str, variants: List[Dict],
+                           pattern_context: str, pattern_ids: List[str], force_full_panel: bool,
+                           max_specialists: Optional[int], degradation_metadata: Dict):
+    """Run a variant fan-out, then show the side-by-side comparison and one report per variant"""
+    result = variant_runner.run(
+        user_request, variants, pattern_context, force_full_panel, max_specialists=max_specialists,
+        scope=st.session_state.session_user
+    )
+    st.caption(
+        f"🔀 {result['llm_calls']} LLM call(s) for {len(variants)} variants "
+        f"({result['llm_calls_saved']} saved by sharing {', '.join(result['shared_roster']) or 'no specialists'})"
+    )
+    
+    reports = []
+    for variant_result in result["variants"]:
+        variant = variant_result["variant"]
+        roster_plan = variant_result["roster_plan"]
+        extra_metadata = {
+            "roster": roster_plan["specialists"],
+            "llm_calls_saved": roster_plan["llm_calls_saved"],
+            "grounding_patterns": pattern_ids,
+            "variant": variant_result["label"],
+            **degradation_metadata,
+        }
+        # Variants join the session history like any other conversation
+        transcript_key = TRANSCRIPTS.put(variant_result["messages"])
+        st.session_state.setdefault("transcripts", []).append({
+            "key": transcript_key,
+            "request": user_request,
+            "categories": variant["categories"],
+            "urgency": variant["urgency"],
+            "extra_metadata": extra_metadata,
+        })
+        messages = TRANSCRIPTS.get(transcript_key)
+        summary_table, detailed_report = build_report(
+            messages, user_request, variant["categories"], variant["urgency"], extra_metadata=extra_metadata
+        )
+        reports.append((variant_result["label"], messages, summary_table, detailed_report))
+    
+    st.header("🔀 Variant Comparison")
+    comparison = compare_variants([(label, detailed_report) for label, _, _, detailed_report in reports])
+    st.dataframe(comparison, use_container_width=True, hide_index=True)
+    st.download_button(
+        "📥 Download comparison (CSV)",
+        data=comparison.to_csv(index=False),
+        file_name=f"variant_comparison_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
+    
+    for tab, (label, messages, summary_table, detailed_report) in zip(st.tabs([label for label, *_ in reports]), reports):
+        with tab:
+            render_results(
+                messages, summary_table, detailed_report, build_figures(detailed_report, user_request),
+                key=f"variant_{label}"
+            )
+
+def render_memory_panel():
+    """Allocation profiling for this process: per-request snapshots, top modules, leak diffs, session sizes"""
+    st.header("🧪 Memory Profiling")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if PROFILER.enabled:
+            if st.button("⏹️ Stop tracing"):
+                PROFILER.stop()
+                st.rerun()
+        elif st.button("▶️ Start tracing"):
+            PROFILER.start()
+            st.rerun()
+    with col2:
+        if st.button("📸 Snapshot now", disabled=not PROFILER.enabled):
+            PROFILER.record_request("manual snapshot", transcripts=TRANSCRIPTS.stats())
+    with col3:
+        if st.button("💾 Write dump", disabled=not PROFILER.enabled):
+            st.caption(f"Wrote {PROFILER.dump_report()}")
+    
+    report = PROFILER.report()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("RSS", f"{(report['rss_bytes'] or 0) / 2 ** 20:,.0f} MB")
+    with col2:
+        st.metric("Traced", f"{report['traced_bytes'] / 2 ** 20:,.1f} MB")
+    with col3:
+        st.metric("Profiled requests", len(report["requests"]))
+    with col4:
+        st.metric("Transcripts", f"{TRANSCRIPTS.stats()['memory_bytes'] / 2 ** 20:,.1f} MB")
+    
+    if not report["tracing"]:
+        st.info("Tracing is off. Start it here or set ARCHITECTURE_MEMORY_PROFILING=1; it slows the process down.")
+    
+    requests_frame = PROFILER.requests_frame()
+    if not requests_frame.empty:
+        st.subheader("Memory per request")
+        st.plotly_chart(
+            px.line(requests_frame, x="time", y=["rss_mb", "traced_mb"], hover_data=["label", "top_module"]),
+            use_container_width=True
+        )
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["Top modules", "Leak diff (last request)", "Growth since start", "Sessions"])
+    with tab1:
+        st.dataframe(pd.DataFrame(report["top_modules"]), use_container_width=True, hide_index=True)
+    with tab2:
+        latest = report["requests"][-1]["leak_diff"] if report["requests"] else []
+        st.dataframe(pd.DataFrame(latest), use_container_width=True, hide_index=True)
+    with tab3:
+        st.dataframe(pd.DataFrame(report["growth_since_baseline"]), use_container_width=True, hide_index=True)
+    with tab4:
+        st.dataframe(PROFILER.sessions_frame().round(3), use_container_width=True, hide_index=True)
+    
+    st.download_button(
+        "📥 Download memory report (JSON)",
+        data=json.dumps(report, indent=2, default=str),
+        file_name=f"memory_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+        mime="application/json"
+    )
+
+def render_pattern_explorer():
+    """Search the local pattern catalog (the same index that grounds the agents)"""
+    st.header("📊 Architecture Pattern Explorer")
+    index = default_index()
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        query = st.text_input("Search patterns:", placeholder="e.g., read-heavy PostgreSQL with global users")
+    with col2:
+        pattern_categories = st.multiselect("Categories:", index.categories)
+    
+    if query.strip():
+        results = index.search(query, k=10, categories=pattern_categories)
+    else:
+        results = [(pattern, 0.0) for pattern in index.patterns if not pattern_categories or pattern["category"] in pattern_categories]
+    
+    if not results:
+        st.info("No matching patterns.")
+    for pattern, score in results:
+        title = f"[{pattern['id']}] {pattern['name']} · {pattern['category']}"
+        if score:
+            title += f" · score {score:.1f}"
+        with st.expander(title):
+            st.markdown(pattern["summary"])
+            st.markdown(f"**Use when:** {pattern['use_when']}")
+            st.markdown(f"**Trade-offs:** {pattern['trade_offs']}")
+            if pattern.get("related"):
+                st.caption("Related: " + ", ".join(pattern["related"]))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
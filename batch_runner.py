@@ -0,0 +1,466 @@
+"""
+Message Batches backend for non-interactive bulk runs.
+
+``BatchConversationRunner`` runs many round-robin advisory conversations
+at once. Each step sends the next speaker's call for every unfinished
+conversation as a single Anthropic Message Batch, waits for the batch to
+end and appends one turn to each conversation. A four-specialist panel
+therefore finishes in four batches, however many conversations are in the
+run, at batch pricing. Turns are checkpointed like the interactive path,
+so an interrupted run resumes from the last completed turn.
+
+``LocalBatchClient`` emulates the batch API in-process for tests and
+benchmarks. With ``--from-queue`` only batch-priority (Low) jobs are
+claimed, as ``batched`` jobs whose lease is renewed while the batches run,
+so interactive jobs stay with the worker pool and nothing is requeued and
+paid for twice. Run a backlog with:
+
+    python batch_runner.py --input requests.jsonl --output reports.jsonl
+    python batch_runner.py --from-queue --local
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Any, Optional
+
+from checkpoints import ConversationCheckpointStore
+from compaction import ContextCompactor, build_compactor, estimate_tokens
+from conversation import speaker_view
+from scheduler import PRIORITY_CLASSES
+from structured_output import ARCHITECTURE_ADVICE_TOOL, TOOL_OUTPUT_INSTRUCTIONS, structured_block
+
+
+BATCH_POLL_SECONDS = float(os.getenv("ARCHITECTURE_BATCH_POLL_SECONDS", "30"))
+BATCH_MAX_RETRIES = int(os.getenv("ARCHITECTURE_BATCH_RETRIES", "2"))
+# Queued jobs of these priority classes can wait for batch turnaround; the rest need the worker pool
+BATCH_PRIORITIES = [p.strip() for p in os.getenv("ARCHITECTURE_BATCH_PRIORITIES", "Low").split(",") if p.strip()]
+
+# Message Batches accept at most this many requests per batch
+MAX_BATCH_REQUESTS = 100_000
+
+
+def to_anthropic_messages(view: List[Dict]) -> List[Dict]:
+    """Merge a speaker view into the alternating user/assistant turns the Messages API expects"""
+    merged: List[Dict] = []
+    for msg in view:
+        text = msg["content"] or ""
+        if msg["role"] == "user" and msg.get("name"):
+            text = f"{msg['name']}:\n{text}"
+        if merged and merged[-1]["role"] == msg["role"]:
+            merged[-1]["content"] += "\n\n" + text
+        else:
+            merged.append({"role": msg["role"], "content": text})
+    if merged and merged[0]["role"] != "user":
+        merged.insert(0, {"role": "user", "content": "Please continue."})
+    return merged
+
+
+def message_text(message: Any) -> str:
+    """Concatenated text blocks of a Messages API response
+
+    A structured-advice tool call is appended as the fenced JSON block the
+    report pipeline reads, like the summary text mode agents write.
+    """
+    parts = [block.text for block in message.content if getattr(block, "type", "text") == "text"]
+    for block in message.content:
+        if getattr(block, "type", "") == "tool_use" and block.name == ARCHITECTURE_ADVICE_TOOL["name"]:
+            parts.append(f"\n\n{structured_block(block.input)}")
+    return "".join(parts)
+
+
+def _batches_api(client: Any) -> Any:
+    # Message Batches moved out of the beta namespace in later SDK releases
+    batches = getattr(client.messages, "batches", None)
+    return batches if batches is not None else client.beta.messages.batches
+
+
+class BatchConversation:
+    """State of one conversation within a batch run"""
+
+    def __init__(self, request: Dict, conversation_id: str, messages: List[Dict], speakers: List[Any],
+                 roster_plan: Dict, compactor: Optional[ContextCompactor], resumed_turns: int,
+                 grounding_patterns: Optional[List[str]] = None, degradation: Optional[Dict] = None,
+                 config: Optional[Dict] = None):
+        self.request = request
+        self.conversation_id = conversation_id
+        self.messages = messages
+        self.speakers = speakers
+        self.roster_plan = roster_plan
+        self.compactor = compactor
+        self.resumed_turns = resumed_turns
+        self.grounding_patterns = grounding_patterns or []
+        self.degradation = degradation
+        # Model, max_tokens and temperature for this conversation's calls
+        self.config = config
+        self.failures = 0
+        self.error: Optional[str] = None
+        self.turn_stats: List[Dict[str, Any]] = []
+
+    @property
+    def next_speaker(self) -> Optional[Any]:
+        spoken = {msg.get("name") for msg in self.messages[1:]}
+        return next((speaker for speaker in self.speakers if speaker.name not in spoken), None)
+
+    @property
+    def done(self) -> bool:
+        return self.error is not None or self.next_speaker is None
+
+
+class BatchConversationRunner:
+    """Advance many conversations one turn per Message Batch until every panel has spoken"""
+
+    def __init__(self, client: Any = None, store: Optional[ConversationCheckpointStore] = None,
+                 poll_interval: float = BATCH_POLL_SECONDS, max_retries: int = BATCH_MAX_RETRIES,
+                 heartbeat: Optional[Callable[[], None]] = None):
+        if client is None:
+            import anthropic
+            client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = client
+        self.batches = _batches_api(client)
+        self.store = store or ConversationCheckpointStore()
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        # Called while batches are in flight, e.g. to renew the lease on claimed queue jobs
+        self.heartbeat = heartbeat
+        self._agents_systems: Dict[Optional[int], Any] = {}
+        self.batch_ids: List[str] = []
+        self.usage = {"input_tokens": 0, "output_tokens": 0}
+
+    def _agents(self, max_tokens: Optional[int] = None):
+        from app import ArchitectureAgents
+        # Structured output goes through tool use here, so the agents keep their plain system messages
+        if max_tokens not in self._agents_systems:
+            self._agents_systems[max_tokens] = ArchitectureAgents(max_tokens=max_tokens)
+        return self._agents_systems[max_tokens]
+
+    def prepare(self, request: Dict) -> BatchConversation:
+        """Plan the roster and load (or start) the checkpoint for one request"""
+        from app import ArchitectureReportGenerator, format_request
+        from patterns import grounding_context
+        from roster import RosterPlanner
+        from worker_pool import queued_job_degradation
+
+        user_request = request["user_request"]
+        categories = request.get("categories", [])
+        urgency = request.get("urgency", "Medium")
+        # The same output cap and panel size as the worker pool would use for this job
+        degradation = queued_job_degradation(request)
+        agents_system = self._agents(degradation["max_tokens"])
+        roster_plan = RosterPlanner().plan(
+            user_request, categories, urgency, request.get("force_full_panel", False),
+            max_specialists=degradation["max_specialists"]
+        )
+        user_proxy = agents_system.agents["user_proxy"]
+        # The speaking order of create_group_chat's round robin, without building a manager per request
+        speakers = [
+            agent for agent in agents_system.agents.values()
+            if agent is not user_proxy and agent.name in roster_plan["specialists"]
+        ]
+
+        pattern_context, pattern_ids = ("", [])
+        if request.get("ground_patterns", True):
+            pattern_context, pattern_ids = grounding_context(user_request, categories)
+        formatted_request = format_request(user_request, categories, urgency, pattern_context)
+        # Checkpoints belong to one queued job or input line, so other runs of the same text never share them
+        conversation_id = self.store.conversation_id(formatted_request, request.get("checkpoint_scope"))
+        messages, completed = self.store.load(conversation_id)
+        if messages is None or completed:
+            messages = [{"content": formatted_request, "role": "user", "name": user_proxy.name}]
+            self.store.start(conversation_id, messages)
+
+        compactor = None
+        if request.get("turn_token_budget"):
+            compactor = build_compactor(
+                ArchitectureReportGenerator()._extract_key_points,
+                token_budget=int(request["turn_token_budget"])
+            )
+        return BatchConversation(
+            request, conversation_id, messages, speakers, roster_plan, compactor, len(messages) - 1, pattern_ids,
+            degradation, agents_system.config
+        )
+
+    def _batch_request(self, custom_id: str, conversation: BatchConversation) -> Dict:
+        speaker = conversation.next_speaker
+        view = speaker_view(speaker.name, conversation.messages)
+        if conversation.compactor is not None:
+            view = conversation.compactor.compact(view)
+        config = conversation.config
+        params = {
+            "model": config["model"],
+            "max_tokens": config["max_tokens"],
+            "temperature": config["temperature"],
+            "system": speaker.system_message,
+            "messages": to_anthropic_messages(view),
+        }
+        if conversation.request.get("structured_output", False):
+            # Auto rather than forced, so the answer text comes before the tool call
+            params["system"] += TOOL_OUTPUT_INSTRUCTIONS
+            params["tools"] = [ARCHITECTURE_ADVICE_TOOL]
+            params["tool_choice"] = {"type": "auto"}
+        return {"custom_id": custom_id, "params": params}
+
+    def submit_and_wait(self, requests: List[Dict]) -> Dict[str, Any]:
+        """Submit one batch, poll until it ends and return results by ``custom_id``"""
+        batch = self.batches.create(requests=requests)
+        self.batch_ids.append(batch.id)
+        while batch.processing_status != "ended":
+            if self.heartbeat is not None:
+                self.heartbeat()
+            time.sleep(self.poll_interval)
+            batch = self.batches.retrieve(batch.id)
+        return {entry.custom_id: entry.result for entry in self.batches.results(batch.id)}
+
+    def step(self, conversations: List[BatchConversation]) -> int:
+        """Advance every unfinished conversation by one turn with a single batch; returns turns added"""
+        active = [conversation for conversation in conversations if not conversation.done][:MAX_BATCH_REQUESTS]
+        if not active:
+            return 0
+        requests = [self._batch_request(f"conv-{i}", conversation) for i, conversation in enumerate(active)]
+        started = time.perf_counter()
+        results = self.submit_and_wait(requests)
+        batch_seconds = time.perf_counter() - started
+
+        added = 0
+        for i, conversation in enumerate(active):
+            result = results.get(f"conv-{i}")
+            if result is None or result.type != "succeeded":
+                conversation.failures += 1
+                if conversation.failures > self.max_retries:
+                    reason = getattr(result, "type", "missing")
+                    error = getattr(result, "error", None)
+                    conversation.error = f"{conversation.next_speaker.name} batch request {reason}: {error!r}"
+                continue
+
+            usage = getattr(result.message, "usage", None)
+            if usage is not None:
+                self.usage["input_tokens"] += usage.input_tokens
+                self.usage["output_tokens"] += usage.output_tokens
+            speaker = conversation.next_speaker
+            turn = {"content": message_text(result.message), "role": "user", "name": speaker.name}
+            index = len(conversation.messages)
+            if not self.store.append(conversation.conversation_id, index, turn):
+                # Another run advanced this conversation meanwhile; continue from its checkpoint
+                conversation.messages, _ = self.store.load(conversation.conversation_id)
+                continue
+            conversation.messages.append(turn)
+            conversation.turn_stats.append({
+                "speaker": speaker.name,
+                "attempts": conversation.failures + 1,
+                "latency_seconds": batch_seconds,
+                "output_tokens": estimate_tokens(turn["content"]),
+                "batched_with": len(active),
+            })
+            conversation.failures = 0
+            added += 1
+        return added
+
+    def run(self, requests: List[Dict]) -> List[BatchConversation]:
+        """Run every request to completion (or failure) and return the conversations"""
+        conversations = [self.prepare(request) for request in requests]
+        while any(not conversation.done for conversation in conversations):
+            self.step(conversations)
+        for conversation in conversations:
+            if conversation.error is None:
+                self.store.complete(conversation.conversation_id)
+        return conversations
+
+
+def default_batch_responder(params: Dict) -> str:
+    """Deterministic stand-in answer for LocalBatchClient"""
+    role = params["system"].split(".")[0].replace("You are ", "").strip()
+    lines = [line.strip() for line in params["messages"][0]["content"].splitlines() if line.strip()]
+    request = next((line for line in lines if "Architecture Request" in line), lines[0] if lines else "")[:120]
+    return (
+        f"As {role}, here is my assessment of: {request}\n"
+        "1. We recommend an API gateway in front of stateless microservices\n"
+        "2. We recommend PostgreSQL with read replicas and Redis caching\n"
+        "The main risk is operational overhead for a small team.\n"
+        "Cost: managed services raise monthly spend but reduce operations effort."
+    )
+
+
+def default_tool_input(text: str) -> Dict[str, Any]:
+    """Structured-advice tool input LocalBatchClient derives from a stand-in answer"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return {
+        "recommendations": [line.split(". ", 1)[1] for line in lines if line[:1].isdigit() and ". " in line],
+        "risks": [line for line in lines if "risk" in line.lower()],
+        "costs": [line for line in lines if line.lower().startswith("cost")],
+        "components": {"apis": ["API gateway"], "databases": ["PostgreSQL with read replicas"]},
+    }
+
+
+class _LocalBatches:
+    """In-process emulation of ``client.messages.batches``"""
+
+    def __init__(self, responder: Callable[[Dict], str], processing_seconds: float, error_rate: float, seed: int):
+        self.responder = responder
+        self.processing_seconds = processing_seconds
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._batches: Dict[str, Dict] = {}
+
+    def create(self, requests: List[Dict]) -> SimpleNamespace:
+        custom_ids = [request["custom_id"] for request in requests]
+        if len(set(custom_ids)) != len(custom_ids):
+            raise ValueError("custom_id values must be unique within a batch")
+        batch_id = f"msgbatch_local_{uuid.uuid4().hex[:16]}"
+        self._batches[batch_id] = {"requests": requests, "created_at": time.time(), "results": None}
+        return self.retrieve(batch_id)
+
+    def retrieve(self, batch_id: str) -> SimpleNamespace:
+        batch = self._batches[batch_id]
+        ended = time.time() - batch["created_at"] >= self.processing_seconds
+        if ended and batch["results"] is None:
+            batch["results"] = [self._process(request) for request in batch["requests"]]
+        return SimpleNamespace(
+            id=batch_id,
+            type="message_batch",
+            processing_status="ended" if ended else "in_progress",
+            request_counts=SimpleNamespace(
+                processing=0 if ended else len(batch["requests"]),
+                succeeded=sum(entry.result.type == "succeeded" for entry in batch["results"] or []),
+                errored=sum(entry.result.type == "errored" for entry in batch["results"] or []),
+                canceled=0,
+                expired=0,
+            ),
+        )
+
+    def results(self, batch_id: str):
+        batch = self._batches[batch_id]
+        if batch["results"] is None:
+            raise RuntimeError(f"Batch {batch_id} has not ended yet")
+        return iter(batch["results"])
+
+    def cancel(self, batch_id: str) -> SimpleNamespace:
+        batch = self._batches[batch_id]
+        if batch["results"] is None:
+            batch["results"] = [
+                SimpleNamespace(custom_id=request["custom_id"], result=SimpleNamespace(type="canceled"))
+                for request in batch["requests"]
+            ]
+        return self.retrieve(batch_id)
+
+    def _process(self, request: Dict) -> SimpleNamespace:
+        if self._rng.random() < self.error_rate:
+            error = SimpleNamespace(type="error", error=SimpleNamespace(type="overloaded_error", message="Overloaded"))
+            return SimpleNamespace(custom_id=request["custom_id"], result=SimpleNamespace(type="errored", error=error))
+        params = request["params"]
+        text = self.responder(params)
+        content = [SimpleNamespace(type="text", text=text)]
+        for tool in params.get("tools", [])[:1]:
+            content.append(SimpleNamespace(type="tool_use", id=f"toolu_local_{uuid.uuid4().hex[:16]}",
+                                           name=tool["name"], input=default_tool_input(text)))
+        message = SimpleNamespace(
+            id=f"msg_local_{uuid.uuid4().hex[:16]}",
+            type="message",
+            role="assistant",
+            model=params["model"],
+            content=content,
+            stop_reason="tool_use" if len(content) > 1 else "end_turn",
+            usage=SimpleNamespace(
+                input_tokens=sum(len(msg["content"]) for msg in params["messages"]) // 4,
+                output_tokens=len(text) // 4,
+            ),
+        )
+        return SimpleNamespace(custom_id=request["custom_id"], result=SimpleNamespace(type="succeeded", message=message))
+
+
+class LocalBatchClient:
+    """Stand-in for ``anthropic.Anthropic`` exposing only ``messages.batches``, for tests"""
+
+    def __init__(self, responder: Callable[[Dict], str] = default_batch_responder, processing_seconds: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.messages = SimpleNamespace(batches=_LocalBatches(responder, processing_seconds, error_rate, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run advisory conversations through the Message Batches API")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSON Lines file of requests (user_request, categories, urgency, ...)")
+    source.add_argument("--from-queue", action="store_true", help="Claim queued batch-priority conversation jobs")
+    parser.add_argument("--output", help="Write detailed reports as JSON Lines (with --input)")
+    parser.add_argument("--queue", default=None, help="Job queue path (default: ARCHITECTURE_JOB_QUEUE)")
+    parser.add_argument("--priority", action="append", choices=PRIORITY_CLASSES,
+                        help="Priority class to claim with --from-queue; repeatable (default: ARCHITECTURE_BATCH_PRIORITIES)")
+    parser.add_argument("--max-jobs", type=int, default=MAX_BATCH_REQUESTS, help="Most jobs to claim with --from-queue")
+    parser.add_argument("--poll-interval", type=float, default=BATCH_POLL_SECONDS)
+    parser.add_argument("--local", action="store_true", help="Use the in-process batch emulator instead of the API")
+    args = parser.parse_args()
+
+    from worker_pool import DEFAULT_QUEUE_PATH, JobQueue, conversation_job_result, job_scope
+
+    jobs = []
+    heartbeat = None
+    if args.from_queue:
+        queue = JobQueue(args.queue or DEFAULT_QUEUE_PATH)
+        worker_id = f"batch:{socket.gethostname()}:{os.getpid()}"
+        while len(jobs) < args.max_jobs:
+            job = queue.claim(worker_id, kind="conversation", priorities=args.priority or BATCH_PRIORITIES,
+                              status="batched")
+            if job is None:
+                break
+            jobs.append(job)
+        job_ids = [job["id"] for job in jobs]
+        heartbeat = lambda: queue.heartbeat(job_ids)
+        requests = [dict(job["payload"], checkpoint_scope=job_scope(job["id"])) for job in jobs]
+    else:
+        input_path = os.path.abspath(args.input)
+        with open(args.input, encoding="utf-8") as f:
+            requests = [
+                dict(json.loads(line), checkpoint_scope=f"input:{input_path}:{number}")
+                for number, line in enumerate(f, 1) if line.strip()
+            ]
+
+    runner = BatchConversationRunner(
+        client=LocalBatchClient() if args.local else None,
+        poll_interval=0.0 if args.local else args.poll_interval,
+        heartbeat=heartbeat
+    )
+    try:
+        conversations = runner.run(requests)
+    except Exception:
+        # Release the claimed jobs now rather than leaving them batched until the lease lapses
+        for job in jobs:
+            queue.fail(job["id"], traceback.format_exc())
+        raise
+    print(f"Ran {len(conversations)} conversation(s) in {len(runner.batch_ids)} batch(es); usage {runner.usage}")
+
+    writer = None
+    if args.output:
+        from exporters import JsonLinesReportWriter
+        writer = JsonLinesReportWriter(args.output)
+    try:
+        for i, conversation in enumerate(conversations):
+            if conversation.error is not None:
+                if jobs:
+                    queue.fail(jobs[i]["id"], conversation.error)
+                print(f"Failed: {conversation.request['user_request'][:60]}: {conversation.error}")
+                continue
+            try:
+                result = conversation_job_result(
+                    conversation.request, conversation.messages, conversation.roster_plan, conversation.turn_stats,
+                    conversation.grounding_patterns, conversation.degradation
+                )
+            except Exception:
+                if jobs:
+                    queue.fail(jobs[i]["id"], traceback.format_exc())
+                continue
+            if jobs:
+                queue.complete(jobs[i]["id"], result)
+            if writer is not None:
+                writer.write(result["detailed_report"])
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,745 @@
+"""
+Benchmarks for the architecture advisory system.
+
+Run a single benchmark with e.g.:
+
+    python benchmarks.py analytics --reports 100000
+    python benchmarks.py markdown --reports 2000
+    python benchmarks.py workers --workers 1 2 4 8
+    python benchmarks.py hedging --calls 300
+    python benchmarks.py scheduler --capacity 4
+    python benchmarks.py scheduler --capacity 4 --shared
+    python benchmarks.py transcripts --transcripts 200
+    python benchmarks.py batch --conversations 500
+    python benchmarks.py patterns --live 5
+    python benchmarks.py slo --requests 120
+    python benchmarks.py variants --variants 1 2 4 8
+    python benchmarks.py memory --requests 20
+"""
+
+import argparse
+import datetime
+import random
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+
+AGENTS = ["HeadOfArchitecture", "CloudArchitect", "OSSArchitect", "LeadArchitect"]
+CATEGORIES = ["Cloud Architecture", "Open Source", "Scalability", "Security", "Cost Optimization", "Integration"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+COMPONENT_TYPES = ["cloud_services", "databases", "apis", "microservices", "storage", "security", "monitoring", "user_interfaces"]
+RISK_SENTENCES = [
+    "The main risk is vendor lock-in with a single cloud provider",
+    "A key challenge is keeping data consistent across services",
+    "There is a concern about operational overhead for a small team",
+    "Licensing could become an issue for copyleft dependencies",
+    "Scaling the write path is a known problem under peak load",
+]
+
+
+def make_synthetic_reports(count: int, seed: int = 42) -> List[Dict]:
+    """Build detailed-report dicts shaped like generate_detailed_report output"""
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    reports = []
+    for i in range(count):
+        timestamp = start + datetime.timedelta(minutes=rng.randrange(0, 60 * 24 * 365))
+        agent_summaries = {}
+        for agent in AGENTS:
+            n = rng.randrange(0, 11)
+            agent_summaries[agent] = {
+                "role": agent,
+                "recommendations": [f"- recommendation {k}" for k in range(n)],
+                "count": n,
+                "focus_area": agent,
+            }
+        reports.append({
+            "metadata": {
+                "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                "user_request": f"Synthetic request {i}",
+                "categories": rng.sample(CATEGORIES, rng.randrange(0, 3)),
+                "priority": rng.choice(PRIORITIES),
+                "total_agents": len(AGENTS),
+                "total_recommendations": sum(a["count"] for a in agent_summaries.values()),
+            },
+            "agent_summaries": agent_summaries,
+            "key_insights": [],
+            "implementation_roadmap": [],
+            "risk_assessment": rng.sample(RISK_SENTENCES, rng.randrange(0, 6)),
+            "cost_considerations": [],
+            "components": {
+                component_type: [f"{component_type} mention {k}" for k in range(rng.randrange(0, 4))]
+                for component_type in rng.sample(COMPONENT_TYPES, rng.randrange(1, 5))
+            },
+        })
+    return reports
+
+
+def _timed(label: str, func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:<40} {time.perf_counter() - started:8.3f}s")
+    return result
+
+
+def _legacy_generate_markdown_report(detailed_report: Dict, summary_table: pd.DataFrame) -> str:
+    """String-concatenation markdown builder kept as the baseline for benchmark_markdown"""
+    
+    metadata = detailed_report["metadata"]
+    
+    markdown_content = f"""# Multi-Agent Architecture Advisory Report
+
+**Generated:** {metadata['timestamp']}  
+**Request:** {metadata['user_request']}  
+**Categories:** {', '.join(metadata['categories'])}  
+**Priority:** {metadata['priority']}  
+**Total Agents:** {metadata['total_agents']}  
+**Total Recommendations:** {metadata['total_recommendations']}
+
+---
+
+## 📋 Agent Recommendations Summary
+
+| Agent | Role | Focus Area | Recommendation Count |
+|-------|------|------------|---------------------|
+"""
+    
+    # Add summary table rows
+    for _, row in summary_table.iterrows():
+        markdown_content += f"| {row['Agent']} | {row['Role']} | {row['Focus Area']} | {row['Recommendation Count']} |\n"
+    
+    markdown_content += "\n---\n\n## 🔍 Key Insights\n\n"
+    
+    # Add key insights
+    if detailed_report["key_insights"]:
+        for i, insight in enumerate(detailed_report["key_insights"], 1):
+            markdown_content += f"{i}. {insight}\n"
+    else:
+        markdown_content += "No specific insights extracted from the conversation.\n"
+    
+    markdown_content += "\n---\n\n## ⚠️ Risk Assessment\n\n"
+    
+    # Add risk assessment
+    if detailed_report["risk_assessment"]:
+        for i, risk in enumerate(detailed_report["risk_assessment"], 1):
+            markdown_content += f"{i}. {risk}\n"
+    else:
+        markdown_content += "No specific risks identified in the conversation.\n"
+    
+    markdown_content += "\n---\n\n## 💰 Cost Considerations\n\n"
+    
+    # Add cost considerations
+    if detailed_report["cost_considerations"]:
+        for i, cost in enumerate(detailed_report["cost_considerations"], 1):
+            markdown_content += f"{i}. {cost}\n"
+    else:
+        markdown_content += "No specific cost considerations mentioned.\n"
+    
+    markdown_content += "\n---\n\n## 📈 Implementation Roadmap\n\n"
+    
+    # Add implementation roadmap
+    for phase in detailed_report["implementation_roadmap"]:
+        markdown_content += f"### {phase['phase']}\n"
+        markdown_content += f"**Duration:** {phase['duration']}\n"
+        markdown_content += f"**Description:** {phase['description']}\n\n"
+    
+    markdown_content += "\n---\n\n## 📊 Detailed Agent Recommendations\n\n"
+    
+    # Add detailed agent recommendations
+    for agent_name, agent_data in detailed_report["agent_summaries"].items():
+        markdown_content += f"### {agent_name} - {agent_data['role']}\n"
+        markdown_content += f"**Focus Area:** {agent_data['focus_area']}\n"
+        markdown_content += f"**Recommendation Count:** {agent_data['count']}\n\n"
+        
+        if agent_data['recommendations']:
+            markdown_content += "**Key Recommendations:**\n"
+            for i, rec in enumerate(agent_data['recommendations'], 1):
+                markdown_content += f"{i}. {rec}\n"
+        else:
+            markdown_content += "No specific recommendations provided.\n"
+        
+        markdown_content += "\n---\n\n"
+    
+    markdown_content += f"""
+## 📊 Report Summary
+
+This comprehensive architecture report was generated by analyzing the multi-agent conversation between {metadata['total_agents']} specialized architecture agents. The report includes {metadata['total_recommendations']} total recommendations across various architectural domains.
+
+### Report Sections:
+- **Agent Recommendations Summary**: Overview of each agent's contributions
+- **Key Insights**: Critical findings from the conversation
+- **Risk Assessment**: Identified risks and challenges
+- **Cost Considerations**: Financial implications and optimizations
+- **Implementation Roadmap**: Phased approach to implementation
+- **Detailed Agent Recommendations**: Comprehensive recommendations from each specialist
+
+### Next Steps:
+1. Review all agent recommendations carefully
+2. Prioritize recommendations based on business needs
+3. Develop detailed implementation plans
+4. Consider risk mitigation strategies
+5. Plan cost optimization approaches
+
+---
+*Report generated by Multi-Agent Architecture Advisory System*
+"""
+    
+    return markdown_content
+
+
+def benchmark_analytics(args) -> None:
+    """Time ingestion and aggregation of many stored reports"""
+    from analytics import ReportAnalytics
+
+    reports = _timed(f"generate {args.reports} synthetic reports", make_synthetic_reports, args.reports)
+    analytics = _timed("flatten into columnar tables", ReportAnalytics.from_reports, reports)
+    _timed("component frequency", analytics.component_frequency)
+    _timed("component frequency by request category", analytics.component_frequency, by_request_category=True)
+    _timed("risk keyword trends (weekly)", analytics.risk_keyword_trends, freq="W")
+    _timed("recommendation counts per agent/priority", analytics.recommendation_counts)
+    print(analytics.summary())
+
+
+def benchmark_markdown(args) -> None:
+    """Compare the list-join markdown builder against the string-concatenation baseline"""
+    from exporters import generate_markdown_report
+
+    reports = make_synthetic_reports(args.reports)
+    for report in reports:
+        report["key_insights"] = RISK_SENTENCES
+        report["cost_considerations"] = RISK_SENTENCES
+        report["implementation_roadmap"] = [
+            {"phase": f"Phase {i}", "duration": "2 weeks", "description": "Synthetic phase"} for i in range(1, 5)
+        ]
+    tables = [
+        pd.DataFrame([
+            {"Agent": agent, "Role": data["role"], "Key Recommendations": "",
+             "Recommendation Count": data["count"], "Focus Area": data["focus_area"]}
+            for agent, data in report["agent_summaries"].items()
+        ])
+        for report in reports
+    ]
+
+    for report, table in zip(reports, tables):
+        assert generate_markdown_report(report, table) == _legacy_generate_markdown_report(report, table)
+
+    def render_all(builder):
+        for report, table in zip(reports, tables):
+            builder(report, table)
+
+    _timed(f"string concatenation ({args.reports} reports)", render_all, _legacy_generate_markdown_report)
+    _timed(f"list join ({args.reports} reports)", render_all, generate_markdown_report)
+
+
+def benchmark_export(args) -> None:
+    """Time streaming JSON Lines and Parquet writers over many reports"""
+    import os
+    import tempfile
+    from exporters import JsonLinesReportWriter, ParquetReportWriter
+
+    reports = make_synthetic_reports(args.reports)
+
+    def write_all(writer):
+        with writer:
+            for report in reports:
+                writer.write(report)
+
+    with tempfile.TemporaryDirectory() as directory:
+        _timed("stream JSON Lines", write_all, JsonLinesReportWriter(os.path.join(directory, "reports.jsonl")))
+        _timed("stream Parquet row groups", write_all, ParquetReportWriter(os.path.join(directory, "parquet")))
+
+
+def make_synthetic_transcript(answer_tokens: int = 2000, seed: int = 7) -> List[Dict]:
+    """Round-robin transcript with one long answer per specialist"""
+    rng = random.Random(seed)
+    filler = [
+        "Consider the operational cost of running this component at peak load.",
+        "The team should weigh managed services against self-hosting effort.",
+        "Latency budgets drive the choice between synchronous and event-driven calls.",
+    ]
+    transcript = [{"content": "Design a scalable e-commerce platform for 10k concurrent users.", "role": "user", "name": "BusinessUser"}]
+    for agent in AGENTS:
+        lines = []
+        while sum(len(line) for line in lines) < answer_tokens * 4:
+            if rng.random() < 0.2:
+                lines.append(f"{rng.randrange(1, 10)}. We recommend {rng.choice(COMPONENT_TYPES).replace('_', ' ')} with clear ownership")
+            else:
+                lines.append(rng.choice(filler))
+        transcript.append({"content": "\n".join(lines), "role": "user", "name": agent})
+    return transcript
+
+
+def benchmark_compaction(args) -> None:
+    """Measure input-token reduction per turn from context compaction"""
+    from app import ArchitectureReportGenerator
+    from compaction import ContextCompactor, estimate_tokens
+
+    transcript = make_synthetic_transcript(args.answer_tokens)
+    compactor = ContextCompactor(ArchitectureReportGenerator()._extract_key_points, token_budget=args.budget)
+    for turn in range(1, len(transcript)):
+        view = transcript[:turn]
+        before = sum(estimate_tokens(msg["content"]) for msg in view)
+        compacted = _timed(f"compact turn {turn} ({transcript[turn]['name']})", compactor.compact, view)
+        after = sum(estimate_tokens(msg["content"]) for msg in compacted)
+        print(f"    input tokens {before:>6} -> {after:>6} ({1 - after / before:.0%} saved)")
+
+
+def benchmark_layout(args) -> None:
+    """Time the vectorized diagram layout and figure build for large component sets"""
+    from app import DynamicGraphGenerator
+    from layout import layout_signature, radial_layout
+
+    rng = random.Random(3)
+    # Exactly ``--components`` components, spread unevenly across the types
+    components = {component_type: [] for component_type in COMPONENT_TYPES}
+    for i in range(args.components):
+        component_type = rng.choice(COMPONENT_TYPES)
+        components[component_type].append(f"{component_type} component {i}")
+    total = sum(len(items) for items in components.values())
+    generator = DynamicGraphGenerator()
+
+    radial_layout.cache_clear()
+    _timed(f"layout {total} components (cold)", radial_layout, layout_signature(components))
+    _timed(f"layout {total} components (cached)", radial_layout, layout_signature(components))
+    _timed(f"build diagram with {total} components", generator.create_architecture_diagram, components, "Benchmark request")
+
+
+def benchmark_workers(args) -> None:
+    """Throughput of the worker pool on fixed-latency stand-in jobs as workers are added"""
+    import os
+    import tempfile
+    from worker_pool import JobQueue, WorkerPool
+
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as directory:
+            queue_path = os.path.join(directory, "queue.sqlite3")
+            queue = JobQueue(queue_path)
+            job_ids = [queue.enqueue({"seconds": args.job_seconds}, kind="sleep") for _ in range(args.jobs)]
+
+            pool = WorkerPool(workers=workers, queue_path=queue_path, poll_interval=0.05, exit_when_idle=True)
+            started = time.time()
+            pool.start()
+            pool.join()
+            elapsed = time.time() - started
+            # Spawning and importing the workers is a one-off cost; the claim path shows between first claim and last finish
+            jobs = [queue.get(job_id) for job_id in job_ids]
+            first_claim = min(job["started_at"] for job in jobs)
+            draining = max(job["finished_at"] for job in jobs) - first_claim
+            print(f"{workers:>3} worker(s): {args.jobs} jobs in {elapsed:6.2f}s = {args.jobs / elapsed:6.1f} jobs/s "
+                  f"(startup {first_claim - started:5.2f}s, then {args.jobs / draining:6.1f} jobs/s) {queue.stats()}")
+
+
+def benchmark_structured(args) -> None:
+    """Compare report post-processing time for free-text vs structured answers"""
+    import json
+    from app import ArchitectureReportGenerator, DynamicGraphGenerator
+    from structured_output import parse_structured_response
+
+    free_text = [make_synthetic_transcript(args.answer_tokens, seed=i) for i in range(args.transcripts)]
+    structured = []
+    for transcript in free_text:
+        converted = [dict(transcript[0])]
+        for msg in transcript[1:]:
+            summary = {
+                "recommendations": [line for line in msg["content"].splitlines() if line[:1].isdigit()][:10],
+                "risks": RISK_SENTENCES[:3],
+                "costs": ["Managed services raise monthly spend but cut operational cost"],
+                "insights": ["Latency budgets drive the integration style"],
+                "components": {"databases": ["PostgreSQL primary with read replicas"], "apis": ["API gateway"]},
+            }
+            converted.append(dict(msg, content=msg["content"] + "\n\n```json\n" + json.dumps(summary) + "\n```"))
+        structured.append(converted)
+
+    report_generator = ArchitectureReportGenerator()
+    graph_generator = DynamicGraphGenerator()
+
+    def post_process(transcripts):
+        for messages in transcripts:
+            report_generator.generate_summary_table(messages, "request", [], "Medium")
+            report_generator.generate_detailed_report(messages, "request", [], "Medium")
+            graph_generator.extract_architecture_components(messages)
+
+    parse_structured_response.cache_clear()
+    _timed(f"heuristic text mining ({args.transcripts} transcripts)", post_process, free_text)
+    _timed(f"structured field access ({args.transcripts} transcripts)", post_process, structured)
+
+
+def benchmark_hedging(args) -> None:
+    """Call latency percentiles against a long-tail mock backend, with and without hedging"""
+    import numpy as np
+    from hedging import HedgedCaller, LatencyTracker, MockLLMBackend, long_tail_latency
+
+    for hedge in (False, True):
+        backend = MockLLMBackend(long_tail_latency(args.base_seconds, args.tail_seconds, args.tail_probability), seed=7)
+        caller = HedgedCaller(tracker=LatencyTracker(), hedge=hedge, min_hedge_delay=0.0)
+        latencies = []
+        for i in range(args.calls):
+            started = time.perf_counter()
+            caller.call("CloudArchitect", lambda cancel: backend.complete(f"turn {i}", cancel), deadline=args.deadline)
+            latencies.append(time.perf_counter() - started)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        label = "hedged" if hedge else "single"
+        print(f"{label:>8}: p50 {p50 * 1000:7.1f}ms  p95 {p95 * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms  "
+              f"backend calls {backend.calls} (hedges fired {caller.hedges_fired}, won {caller.hedges_won})")
+
+
+def benchmark_scheduler(args) -> None:
+    """Queue waits per priority class when a batch flood competes with interactive requests"""
+    import os
+    import tempfile
+    import threading
+    import numpy as np
+    from scheduler import PRIORITY_CLASSES, SharedTurnScheduler, TurnScheduler
+
+    rng = random.Random(3)
+    # (arrival offset, priority, user, team, batch)
+    workload = [(0.0, "Low", "nightly", "batch", True) for _ in range(args.batch_turns)]
+    for i in range(args.interactive_turns):
+        priority = rng.choice(["Medium", "Medium", "High", "Critical"])
+        workload.append((rng.uniform(0, args.turn_seconds * 8), priority, f"user{i % 5}", "product", False))
+
+    for label, fair in (("fifo", False), ("scheduled", True)):
+        if args.shared:
+            # Slot accounting in SQLite, as shared by the app and the worker pool processes
+            directory = tempfile.mkdtemp()
+            scheduler = SharedTurnScheduler(os.path.join(directory, "scheduler.sqlite3"),
+                                            capacity=args.capacity, batch_reserve=1 if fair else 0)
+        else:
+            scheduler = TurnScheduler(capacity=args.capacity, batch_reserve=1 if fair else 0)
+        waits = {priority: [] for priority in PRIORITY_CLASSES}
+        lock = threading.Lock()
+
+        def turn(offset, priority, user, team, batch):
+            time.sleep(offset)
+            if fair:
+                slot = scheduler.slot(priority, user, team, batch=batch)
+            else:
+                slot = scheduler.slot("Medium")
+            with slot as ticket:
+                time.sleep(args.turn_seconds)
+            with lock:
+                waits[priority].append(ticket.wait_seconds)
+
+        threads = [threading.Thread(target=turn, args=item) for item in workload]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        summary = "  ".join(
+            f"{priority} p95 {np.percentile(waits[priority], 95) * 1000:6.0f}ms"
+            for priority in PRIORITY_CLASSES if waits[priority]
+        )
+        print(f"{label:>9}: {summary}")
+
+
+def benchmark_transcripts(args) -> None:
+    """Resident size of raw vs compressed transcripts and report cost over compressed ones"""
+    import sys
+    from app import ArchitectureReportGenerator
+    from transcripts import CompressedTranscript, default_codec
+
+    transcripts = [make_synthetic_transcript(args.answer_tokens, seed=i) for i in range(args.transcripts)]
+    raw_bytes = sum(
+        sys.getsizeof(msg) + sum(sys.getsizeof(value) for value in msg.values())
+        for transcript in transcripts for msg in transcript
+    )
+    codec = default_codec()
+    compressed = _timed(f"compress {args.transcripts} transcripts ({codec.name})",
+                        lambda: [CompressedTranscript.from_messages(transcript, codec) for transcript in transcripts])
+    compressed_bytes = sum(transcript.nbytes for transcript in compressed)
+    print(f"    resident size {raw_bytes / 1e6:.2f} MB -> {compressed_bytes / 1e6:.2f} MB ({raw_bytes / compressed_bytes:.1f}x smaller)")
+
+    report_generator = ArchitectureReportGenerator()
+    _timed("detailed reports from dicts", lambda: [report_generator.generate_detailed_report(t, "r", [], "Medium") for t in transcripts])
+    _timed("detailed reports from compressed",
+           lambda: [report_generator.generate_detailed_report(t.to_dicts(), "r", [], "Medium") for t in compressed])
+
+
+def benchmark_batch(args) -> None:
+    """Batches needed to run a backlog of conversations against the local batch emulator"""
+    import os
+    import tempfile
+    from batch_runner import BatchConversationRunner, LocalBatchClient
+    from checkpoints import ConversationCheckpointStore
+
+    os.environ.setdefault("ANTHROPIC_API_KEY", "local")
+    rng = random.Random(5)
+    requests = [
+        {"user_request": f"Request {i}: event-driven platform on aws with kafka and postgres",
+         "categories": rng.sample(CATEGORIES, 2), "urgency": rng.choice(PRIORITIES)}
+        for i in range(args.conversations)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        runner = BatchConversationRunner(
+            client=LocalBatchClient(error_rate=args.error_rate, seed=1),
+            store=ConversationCheckpointStore(os.path.join(directory, "checkpoints.sqlite3")),
+            poll_interval=0.0
+        )
+        conversations = _timed(f"batch run ({args.conversations} conversations)", runner.run, requests)
+    turns = sum(len(conversation.turn_stats) for conversation in conversations)
+    failed = sum(conversation.error is not None for conversation in conversations)
+    print(f"    {turns} turns in {len(runner.batch_ids)} batches ({turns / len(runner.batch_ids):.0f} calls per batch), "
+          f"{failed} failed, usage {runner.usage}")
+
+
+def benchmark_patterns(args) -> None:
+    """Pattern index latency and, with --live, agent response length and latency with and without grounding"""
+    import os
+    import tempfile
+    import numpy as np
+    from compaction import estimate_tokens
+    from patterns import PATTERN_CATALOG, PatternIndex, grounding_context
+
+    index = _timed(f"build index ({len(PATTERN_CATALOG)} patterns)", PatternIndex, PATTERN_CATALOG)
+    rng = random.Random(11)
+    queries = [
+        f"{rng.choice(['Scalable', 'Secure', 'Low-cost', 'Global'])} {rng.choice(['e-commerce', 'analytics', 'payments', 'IoT'])} "
+        f"platform with {rng.choice(['Kafka', 'PostgreSQL', 'Kubernetes', 'serverless', 'Redis'])} and {rng.choice(CATEGORIES)}"
+        for _ in range(args.queries)
+    ]
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query)
+        latencies.append(time.perf_counter() - started)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    context_tokens = np.mean([estimate_tokens(grounding_context(query, [])[0]) for query in queries])
+    print(f"search: p50 {p50:.3f}ms  p99 {p99:.3f}ms; grounding block adds ~{context_tokens:.0f} input tokens")
+
+    if not args.live:
+        return
+
+    # Live A/B against the API: same requests with and without the reference block
+    from app import ArchitectureAgents, format_request
+    from checkpoints import ConversationCheckpointStore
+    from conversation import ConversationRunner
+
+    agents_system = ArchitectureAgents()
+    with tempfile.TemporaryDirectory() as directory:
+        store = ConversationCheckpointStore(os.path.join(directory, "checkpoints.sqlite3"))
+        for grounded in (False, True):
+            output_tokens, turn_latency = [], []
+            for query in queries[:args.live]:
+                pattern_context = grounding_context(query, [])[0] if grounded else ""
+                manager, group_chat = agents_system.create_group_chat()
+                runner = ConversationRunner(manager, group_chat, store=store)
+                runner.run(agents_system.agents["user_proxy"], format_request(query, [], "Medium", pattern_context))
+                output_tokens.extend(stat["output_tokens"] for stat in runner.turn_stats)
+                turn_latency.extend(stat["latency_seconds"] for stat in runner.turn_stats)
+            label = "grounded" if grounded else "baseline"
+            print(f"{label:>9}: {np.mean(output_tokens):7.0f} output tokens/turn  {np.mean(turn_latency):6.1f}s/turn "
+                  f"({len(output_tokens)} turns)")
+
+
+def benchmark_slo(args) -> None:
+    """Request latency and shed rate during an overload burst, with and without SLO load shedding"""
+    import threading
+    import numpy as np
+    from roster import SPECIALISTS
+    from scheduler import TurnScheduler
+    from slo import DEGRADATION_LEVELS, SLOController
+
+    rng = random.Random(5)
+    arrivals = sorted(rng.uniform(0, args.burst_seconds) for _ in range(args.requests))
+
+    for label, shedding in (("no shedding", False), ("slo shedding", True)):
+        scheduler = TurnScheduler(capacity=args.capacity, batch_reserve=0)
+        controller = SLOController(scheduler, latency_slo=args.turn_seconds * 2,
+                                   queue_depth_slo=args.capacity * 2, cooldown_seconds=args.burst_seconds / 10)
+        latencies, levels = [], {level["name"]: 0 for level in DEGRADATION_LEVELS}
+        lock = threading.Lock()
+
+        def request(offset):
+            time.sleep(offset)
+            level = controller.evaluate() if shedding else DEGRADATION_LEVELS[0]
+            with lock:
+                levels[level["name"]] += 1
+            if not level["llm"]:
+                return
+            started = time.perf_counter()
+            # Shorter answers take proportionally less generation time
+            turn_seconds = args.turn_seconds * (level["max_tokens"] or 2000) / 2000
+            for _ in range(level["max_specialists"] or len(SPECIALISTS)):
+                with scheduler.slot():
+                    call_started = time.perf_counter()
+                    time.sleep(turn_seconds)
+                controller.record_turn(time.perf_counter() - call_started)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=request, args=(offset,)) for offset in arrivals]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        p50, p95 = np.percentile(latencies, [50, 95])
+        served = ", ".join(f"{name} {count}" for name, count in levels.items() if count)
+        print(f"{label:>12}: p50 {p50:5.2f}s  p95 {p95:5.2f}s  ({served})")
+
+
+def benchmark_variants(args) -> None:
+    """LLM calls and wall time for N variants: separate runs vs shared specialist fan-out"""
+    import os
+    import tempfile
+    import autogen
+    from app import ArchitectureAgents
+    from checkpoints import ConversationCheckpointStore
+    from conversation import ConversationRunner
+    from roster import RosterPlanner
+    from variants import VariantRunner, expand_variants
+
+    # Canned replies with a fixed latency stand in for the API
+    os.environ.setdefault("ANTHROPIC_API_KEY", "unused")
+    agents_system = ArchitectureAgents()
+    for name, agent in agents_system.agents.items():
+        if name != "user_proxy":
+            def reply(recipient, messages=None, sender=None, config=None):
+                time.sleep(args.turn_seconds)
+                return True, f"{recipient.name}: use Kubernetes and PostgreSQL with a read replica."
+            agent.register_reply([autogen.Agent, None], reply)
+
+    category_sets = [["Scalability"], ["Security"], ["Cloud Architecture", "Open Source"], ["Cost Optimization"]]
+    request = "Payments platform on AWS with Kafka and PostgreSQL"
+    for count in args.variants:
+        variants = expand_variants(category_sets, PRIORITIES)[:count]
+        with tempfile.TemporaryDirectory() as directory:
+            store = ConversationCheckpointStore(os.path.join(directory, "checkpoints.sqlite3"))
+            started = time.perf_counter()
+            separate_calls = 0
+            for variant in variants:
+                plan = RosterPlanner().plan(request, variant["categories"], variant["urgency"])
+                manager, group_chat = agents_system.create_group_chat(roster=plan["specialists"])
+                runner = ConversationRunner(manager, group_chat, store=store, priority=variant["urgency"])
+                runner.run(agents_system.agents["user_proxy"], f"{request} {variant}")
+                separate_calls += len(runner.turn_stats)
+            separate_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            result = VariantRunner(agents_system, store=store).run(request, variants)
+            fan_out_seconds = time.perf_counter() - started
+        print(f"{count:>2} variants: separate {separate_calls:3d} calls {separate_seconds:5.2f}s  "
+              f"fan-out {result['llm_calls']:3d} calls {fan_out_seconds:5.2f}s")
+
+
+def benchmark_memory(args) -> None:
+    """Report pipeline cost with and without allocation tracing, and what a profiled request records"""
+    from app import build_figures, build_report
+    from profiling import MemoryProfiler
+
+    transcripts = [make_synthetic_transcript(args.answer_tokens, seed=i) for i in range(args.requests)]
+
+    def pipeline(profiler=None):
+        kept = []
+        for i, transcript in enumerate(transcripts):
+            summary_table, detailed_report = build_report(transcript, f"request {i}", CATEGORIES[:2], "Medium")
+            # Keep every report alive, like a session that never lets go of its results
+            kept.append((summary_table, detailed_report, build_figures(detailed_report, f"request {i}")))
+            if profiler is not None:
+                profiler.record_request(f"request {i}")
+        return kept
+
+    _timed(f"{args.requests} requests untraced", pipeline)
+    profiler = MemoryProfiler(dump_dir="")
+    profiler.start()
+    _timed(f"{args.requests} requests traced + snapshots", pipeline, profiler)
+    last = profiler.requests[-1]
+    profiler.stop()
+    print(f"    traced {last['traced_bytes'] / 2 ** 20:.1f} MB; top modules: "
+          + ", ".join(f"{entry['module']} {entry['size_bytes'] / 2 ** 20:.1f} MB" for entry in last["top_modules"][:4]))
+    for entry in last["leak_diff"][:3]:
+        print(f"    +{entry['size_diff_bytes'] / 1024:7.1f} KB  {entry['location']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    analytics_parser = subparsers.add_parser("analytics", help="Batch analytics over stored reports")
+    analytics_parser.add_argument("--reports", type=int, default=100_000)
+    analytics_parser.set_defaults(func=benchmark_analytics)
+
+    markdown_parser = subparsers.add_parser("markdown", help="Markdown report builder")
+    markdown_parser.add_argument("--reports", type=int, default=2_000)
+    markdown_parser.set_defaults(func=benchmark_markdown)
+
+    export_parser = subparsers.add_parser("export", help="Streaming report writers")
+    export_parser.add_argument("--reports", type=int, default=20_000)
+    export_parser.set_defaults(func=benchmark_export)
+
+    compaction_parser = subparsers.add_parser("compaction", help="Context compaction for later speakers")
+    compaction_parser.add_argument("--answer-tokens", type=int, default=2000)
+    compaction_parser.add_argument("--budget", type=int, default=3000)
+    compaction_parser.set_defaults(func=benchmark_compaction)
+
+    layout_parser = subparsers.add_parser("layout", help="Architecture diagram layout")
+    layout_parser.add_argument("--components", type=int, default=500)
+    layout_parser.set_defaults(func=benchmark_layout)
+
+    workers_parser = subparsers.add_parser("workers", help="Worker pool throughput scaling")
+    workers_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    workers_parser.add_argument("--jobs", type=int, default=64)
+    workers_parser.add_argument("--job-seconds", type=float, default=0.25)
+    workers_parser.set_defaults(func=benchmark_workers)
+
+    structured_parser = subparsers.add_parser("structured", help="Structured output vs heuristic post-processing")
+    structured_parser.add_argument("--transcripts", type=int, default=200)
+    structured_parser.add_argument("--answer-tokens", type=int, default=2000)
+    structured_parser.set_defaults(func=benchmark_structured)
+
+    hedging_parser = subparsers.add_parser("hedging", help="Hedged LLM calls against a long-tail mock backend")
+    hedging_parser.add_argument("--calls", type=int, default=300)
+    hedging_parser.add_argument("--base-seconds", type=float, default=0.02)
+    hedging_parser.add_argument("--tail-seconds", type=float, default=0.5)
+    hedging_parser.add_argument("--tail-probability", type=float, default=0.05)
+    hedging_parser.add_argument("--deadline", type=float, default=5.0)
+    hedging_parser.set_defaults(func=benchmark_hedging)
+
+    scheduler_parser = subparsers.add_parser("scheduler", help="Priority scheduling under a batch flood")
+    scheduler_parser.add_argument("--capacity", type=int, default=4)
+    scheduler_parser.add_argument("--batch-turns", type=int, default=80)
+    scheduler_parser.add_argument("--interactive-turns", type=int, default=30)
+    scheduler_parser.add_argument("--turn-seconds", type=float, default=0.05)
+    scheduler_parser.add_argument("--shared", action="store_true", help="Use the SQLite-backed cross-process scheduler")
+    scheduler_parser.set_defaults(func=benchmark_scheduler)
+
+    transcripts_parser = subparsers.add_parser("transcripts", help="Compressed transcript storage")
+    transcripts_parser.add_argument("--transcripts", type=int, default=200)
+    transcripts_parser.add_argument("--answer-tokens", type=int, default=2000)
+    transcripts_parser.set_defaults(func=benchmark_transcripts)
+
+    batch_parser = subparsers.add_parser("batch", help="Message Batches backend against the local emulator")
+    batch_parser.add_argument("--conversations", type=int, default=500)
+    batch_parser.add_argument("--error-rate", type=float, default=0.02)
+    batch_parser.set_defaults(func=benchmark_batch)
+
+    patterns_parser = subparsers.add_parser("patterns", help="Pattern index latency and grounding A/B")
+    patterns_parser.add_argument("--queries", type=int, default=2000)
+    patterns_parser.add_argument("--live", type=int, default=0, help="Run this many requests per arm against the API")
+    patterns_parser.set_defaults(func=benchmark_patterns)
+
+    slo_parser = subparsers.add_parser("slo", help="Load shedding during an overload burst")
+    slo_parser.add_argument("--requests", type=int, default=120)
+    slo_parser.add_argument("--capacity", type=int, default=4)
+    slo_parser.add_argument("--burst-seconds", type=float, default=2.0)
+    slo_parser.add_argument("--turn-seconds", type=float, default=0.1)
+    slo_parser.set_defaults(func=benchmark_slo)
+
+    variants_parser = subparsers.add_parser("variants", help="Variant fan-out vs separate runs")
+    variants_parser.add_argument("--variants", type=int, nargs="+", default=[1, 2, 4, 8])
+    variants_parser.add_argument("--turn-seconds", type=float, default=0.05)
+    variants_parser.set_defaults(func=benchmark_variants)
+
+    memory_parser = subparsers.add_parser("memory", help="Allocation profiling overhead and findings")
+    memory_parser.add_argument("--requests", type=int, default=20)
+    memory_parser.add_argument("--answer-tokens", type=int, default=2000)
+    memory_parser.set_defaults(func=benchmark_memory)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Local checkpoint store for in-progress agent conversations.
+
+Each conversation is keyed by the session or job that owns it plus a hash
+of its formatted request, so a session or job resumes only its own runs;
+the request hash is also stored on its own as a lookup hint. The
+transcript is written after every completed agent turn so that a failed or
+interrupted conversation resumes from the last completed turn instead of
+paying for every earlier turn again. Checkpoints not updated for
+``CHECKPOINT_TTL_SECONDS`` are pruned at startup and whenever a
+conversation completes.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Iterator
+
+
+DEFAULT_CHECKPOINT_PATH = os.getenv("ARCHITECTURE_CHECKPOINT_DB", os.path.join(".checkpoints", "conversations.sqlite3"))
+# Completed checkpoints back the cached-answer fallback for this long; abandoned ones are dropped too
+CHECKPOINT_TTL_SECONDS = float(os.getenv("ARCHITECTURE_CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+class ConversationCheckpointStore:
+    """SQLite-backed store of conversation transcripts, updated once per turn"""
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH, ttl_seconds: float = CHECKPOINT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS conversations (
+                    conversation_id TEXT PRIMARY KEY,
+                    messages TEXT NOT NULL,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    request_hash TEXT
+                )"""
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(conversations)")}
+            if "request_hash" not in columns:
+                conn.execute("ALTER TABLE conversations ADD COLUMN request_hash TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS conversations_request ON conversations (request_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated_at)")
+            self._prune(conn)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per call keeps the store safe to share across threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level="IMMEDIATE")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def request_hash(formatted_request: str) -> str:
+        """Hash of a formatted request, shared by every run of the same text"""
+        return hashlib.sha256(formatted_request.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def conversation_id(cls, formatted_request: str, scope: Optional[str] = None) -> str:
+        """Checkpoint key for one session's or job's run of a request
+
+        ``scope`` is the owning session or job id; the same scope and request
+        resume the same checkpoint. Without a scope the key is new on every
+        call, so the run never resumes or overwrites another one.
+        """
+        return f"{scope or uuid.uuid4().hex}:{cls.request_hash(formatted_request)}"
+
+    def load(self, conversation_id: str) -> Tuple[Optional[List[Dict]], bool]:
+        """Return the saved transcript and whether the conversation completed"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT messages, completed FROM conversations WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+        if row is None:
+            return None, False
+        return json.loads(row[0]), bool(row[1])
+
+    def start(self, conversation_id: str, messages: List[Dict]) -> None:
+        """Create (or reset) a checkpoint with the opening messages"""
+        request_hash = self.request_hash(messages[0].get("content") or "") if messages else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations (conversation_id, messages, completed, updated_at, request_hash) "
+                "VALUES (?, ?, 0, ?, ?)",
+                (conversation_id, json.dumps(messages), time.time(), request_hash)
+            )
+
+    def append(self, conversation_id: str, index: int, message: Dict) -> bool:
+        """Append a turn if the checkpoint still ends at ``index``; returns False for stale turns"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT messages FROM conversations WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            messages = json.loads(row[0])
+            if len(messages) != index:
+                return False
+            messages.append(message)
+            # The read above runs before the implicit transaction starts, so a concurrent
+            # append (a hedge or an abandoned attempt) may land in between; only one wins
+            cursor = conn.execute(
+                "UPDATE conversations SET messages = ?, updated_at = ? "
+                "WHERE conversation_id = ? AND json_array_length(messages) = ?",
+                (json.dumps(messages), time.time(), conversation_id, index)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, conversation_id: str) -> None:
+        """Mark a conversation as finished and prune expired checkpoints"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE conversations SET completed = 1, updated_at = ? WHERE conversation_id = ?",
+                (time.time(), conversation_id)
+            )
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> int:
+        """Delete checkpoints, finished or abandoned, not updated within the TTL"""
+        return conn.execute(
+            "DELETE FROM conversations WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+
+    def prune(self) -> int:
+        """Delete expired checkpoints now; returns how many were removed"""
+        with self._connect() as conn:
+            return self._prune(conn)
+
+    def delete(self, conversation_id: str) -> None:
+        """Remove a checkpoint"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+
+    def completed_openings(self, limit: int = 500) -> List[Tuple[str, str]]:
+        """``(conversation_id, opening message)`` for the most recently completed conversations"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT conversation_id, messages FROM conversations WHERE completed = 1 ORDER BY updated_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        openings = []
+        for conversation_id, messages in rows:
+            messages = json.loads(messages)
+            if messages:
+                openings.append((conversation_id, messages[0].get("content") or ""))
+        return openings
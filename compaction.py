@@ -0,0 +1,102 @@
+"""
+Context compaction for long GroupChat transcripts.
+
+Under round-robin each later speaker receives every earlier specialist's
+full answer. ``ContextCompactor`` rewrites the transcript a speaker sees so
+that it fits a per-turn token budget, replacing the oldest specialist
+answers with their key points first. With ``ARCHITECTURE_COMPACTION_MODEL``
+set, ``build_compactor`` summarizes answers with that (cheap) Anthropic
+model instead. The stored transcript is untouched; only the prompt sent to
+the next speaker shrinks.
+"""
+
+import hashlib
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+TURN_TOKEN_BUDGET = int(os.getenv("ARCHITECTURE_TURN_TOKEN_BUDGET", "3000"))
+COMPACTION_MODEL = os.getenv("ARCHITECTURE_COMPACTION_MODEL", "")
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English prose)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def make_anthropic_summarizer(model: str = "claude-3-haiku-20240307", max_tokens: int = 300,
+                              client=None) -> Callable[[str], str]:
+    """Summarize an answer with a cheap Anthropic model instead of local key-point extraction"""
+    if client is None:
+        from anthropic import Anthropic
+
+        client = Anthropic()
+
+    def summarize(content: str) -> str:
+        response = client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=0,
+            system="Summarize this architecture advice as at most 8 terse bullet points. Keep concrete technology names.",
+            messages=[{"role": "user", "content": content}],
+        )
+        return "".join(block.text for block in response.content if getattr(block, "type", "") == "text")
+
+    return summarize
+
+
+class ContextCompactor:
+    """Replace earlier specialist answers with key points until a turn fits its token budget"""
+
+    def __init__(self, key_point_extractor: Callable[[str], List[str]], token_budget: int = TURN_TOKEN_BUDGET,
+                 summarizer: Optional[Callable[[str], str]] = None, keep_recent: int = 1):
+        self.key_point_extractor = key_point_extractor
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.keep_recent = keep_recent
+        self._compacted: Dict[str, str] = {}
+
+    def compact_content(self, name: str, content: str) -> str:
+        """Compacted form of one answer, cached by content so each answer is compacted once"""
+        key = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        if key not in self._compacted:
+            if self.summarizer is not None:
+                points = self.summarizer(content).strip()
+            else:
+                points = "\n".join(self.key_point_extractor(content))
+            if not points:
+                # No list items or recommendation phrases: keep the opening sentences instead
+                points = " ".join(re.split(r"(?<=[.!?])\s+", content.strip())[:2])
+            self._compacted[key] = f"[Key points from {name}'s earlier answer]\n{points}"
+        return self._compacted[key]
+
+    def compact(self, messages: List[Dict]) -> List[Dict]:
+        """Return a copy of ``messages`` that fits the token budget where possible"""
+        compacted = [dict(msg) for msg in messages]
+        total = sum(estimate_tokens(msg.get("content") or "") for msg in compacted)
+        if total <= self.token_budget:
+            return compacted
+
+        # The opening request and the most recent answers are never compacted; the oldest answers go first
+        candidates = list(range(1, len(compacted)))
+        ordered = candidates[:len(candidates) - self.keep_recent] if self.keep_recent else candidates
+
+        for i in ordered:
+            if total <= self.token_budget:
+                break
+            content = compacted[i].get("content") or ""
+            replacement = self.compact_content(compacted[i].get("name", "Agent"), content)
+            if len(replacement) < len(content):
+                total += estimate_tokens(replacement) - estimate_tokens(content)
+                compacted[i]["content"] = replacement
+
+        return compacted
+
+
+def build_compactor(key_point_extractor: Callable[[str], List[str]], token_budget: int = TURN_TOKEN_BUDGET,
+                    model: Optional[str] = None) -> ContextCompactor:
+    """Compactor for one conversation, summarizing with ``model`` (default ``COMPACTION_MODEL``) when one is set"""
+    model = COMPACTION_MODEL if model is None else model
+    summarizer = make_anthropic_summarizer(model) if model else None
+    return ContextCompactor(key_point_extractor, token_budget=token_budget, summarizer=summarizer)
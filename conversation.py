@@ -0,0 +1,205 @@
+"""
+Turn-by-turn driver for the round-robin architecture GroupChat.
+
+``ConversationRunner`` replaces ``initiate_chat`` for the advisory flow: it
+asks each speaker for its reply directly, checkpoints the transcript after
+every completed turn, and applies a deadline and retry budget to the current
+speaker only. A failed conversation keeps its completed turns and the next
+run resumes from there. Each turn waits for a call slot from the shared
+``TurnScheduler`` and then goes through a ``HedgedCaller``, which can fire
+a duplicate request when a speaker is slower than its observed p95. Every
+attempt's latency, and whether it was rate limited, feeds the shared
+``SLOController`` that decides how far to degrade new requests.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+import autogen
+
+from checkpoints import ConversationCheckpointStore
+from compaction import ContextCompactor, estimate_tokens
+from hedging import HEDGE_ENABLED, HedgedCaller
+from scheduler import SCHEDULER, TurnScheduler, request_deadline
+from slo import SLO_CONTROLLER, SLOController, is_rate_limit_error
+from structured_output import strip_structured_block
+
+
+TURN_TIMEOUT_SECONDS = float(os.getenv("ARCHITECTURE_TURN_TIMEOUT", "120"))
+TURN_MAX_RETRIES = int(os.getenv("ARCHITECTURE_TURN_RETRIES", "2"))
+
+# Turns run on a shared pool so a timed-out call never blocks the Streamlit script thread
+_turn_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="agent-turn")
+
+
+def speaker_view(speaker_name: str, messages: List[Dict]) -> List[Dict]:
+    """Transcript from the speaker's perspective: its own turns as assistant messages
+
+    Other speakers' structured JSON summaries are dropped: they repeat the
+    answer text and are only read by the report pipeline, which uses the
+    stored transcript.
+    """
+    return [
+        {
+            "content": msg["content"] if msg.get("name") == speaker_name else strip_structured_block(msg["content"]),
+            "role": "assistant" if msg.get("name") == speaker_name else "user",
+            "name": msg.get("name"),
+        }
+        for msg in messages
+    ]
+
+
+class TurnFailedError(RuntimeError):
+    """Raised when a speaker exhausts its timeout/retry budget"""
+
+    def __init__(self, speaker_name: str, attempts: int, completed_turns: int, last_error: Exception):
+        self.speaker_name = speaker_name
+        self.attempts = attempts
+        self.completed_turns = completed_turns
+        self.last_error = last_error
+        super().__init__(
+            f"{speaker_name} failed after {attempts} attempt(s): {last_error!r}. "
+            f"{completed_turns} completed turn(s) were saved and will be reused on retry."
+        )
+
+
+class ConversationRunner:
+    """Drive a round-robin GroupChat with per-turn checkpoints, timeouts and retries"""
+
+    def __init__(self, group_chat_manager: autogen.GroupChatManager, group_chat: autogen.GroupChat,
+                 store: Optional[ConversationCheckpointStore] = None,
+                 turn_timeout: float = TURN_TIMEOUT_SECONDS, max_retries: int = TURN_MAX_RETRIES,
+                 retry_backoff: float = 2.0, compactor: Optional[ContextCompactor] = None,
+                 hedge: bool = HEDGE_ENABLED, caller: Optional[HedgedCaller] = None,
+                 scheduler: TurnScheduler = SCHEDULER, priority: str = "Medium", user: str = "anonymous",
+                 team: str = "default", batch: bool = False, deadline: Optional[float] = None,
+                 slo: SLOController = SLO_CONTROLLER):
+        self.manager = group_chat_manager
+        self.group_chat = group_chat
+        self.store = store or ConversationCheckpointStore()
+        self.turn_timeout = turn_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.compactor = compactor
+        self.caller = caller or HedgedCaller(executor=_turn_executor, hedge=hedge)
+        self.scheduler = scheduler
+        self.priority = priority
+        self.user = user
+        self.team = team
+        self.batch = batch
+        self.deadline = deadline
+        self.slo = slo
+        self.resumed_turns = 0
+        self.turn_stats: List[Dict[str, Any]] = []
+
+    def speakers(self, initiator: autogen.Agent) -> List[autogen.Agent]:
+        """Speakers in round-robin order after the initiator, one per remaining round"""
+        agents = self.group_chat.agents
+        start = agents.index(initiator) + 1 if initiator in agents else 0
+        ordered = [agents[(start + i) % len(agents)] for i in range(len(agents))]
+        return [agent for agent in ordered if agent is not initiator][:self.group_chat.max_round - 1]
+
+    def run(self, initiator: autogen.Agent, message: str, conversation_id: Optional[str] = None,
+            scope: Optional[str] = None) -> List[Dict]:
+        """Run (or resume) the conversation and return the full transcript
+
+        ``scope`` is the session or job id that owns the checkpoint; only runs
+        with the same scope and message resume each other.
+        """
+        conversation_id = conversation_id or self.store.conversation_id(message, scope)
+        messages, completed = self.store.load(conversation_id)
+
+        if messages is None or completed:
+            messages = [{"content": message, "role": "user", "name": initiator.name}]
+            self.store.start(conversation_id, messages)
+        self.resumed_turns = len(messages) - 1
+        self.turn_stats = []
+        if self.deadline is None:
+            self.deadline = request_deadline(self.priority)
+
+        spoken = {msg.get("name") for msg in messages[1:]}
+        for speaker in self.speakers(initiator):
+            if speaker.name in spoken:
+                continue
+            messages.append(self._run_turn(conversation_id, speaker, messages))
+
+        # Every speaker has a turn now; a failed turn raised above and left the checkpoint resumable
+        self.store.complete(conversation_id)
+        self.group_chat.messages[:] = messages
+        return messages
+
+    def _speaker_view(self, speaker: autogen.Agent, messages: List[Dict]) -> List[Dict]:
+        return speaker_view(speaker.name, messages)
+
+    def _call_speaker(self, conversation_id: str, speaker: autogen.Agent, messages: List[Dict],
+                      view: List[Dict], cancel: threading.Event) -> Optional[Dict]:
+        """Generate one reply and checkpoint it from the worker thread"""
+        if cancel.is_set():
+            # Decided (or timed out) before this attempt left the executor queue
+            return None
+        reply = speaker.generate_reply(messages=view, sender=self.manager)
+        if reply is None:
+            return None
+        content = reply.get("content") if isinstance(reply, dict) else reply
+        turn = {"content": autogen.code_utils.content_str(content), "role": "user", "name": speaker.name}
+        # Saving here means a reply survives even if the script thread was interrupted meanwhile
+        if not self.store.append(conversation_id, len(messages), turn):
+            # A timed-out earlier attempt or a hedge finished first; keep the checkpointed reply
+            stored, _ = self.store.load(conversation_id)
+            if stored and len(stored) > len(messages):
+                return stored[len(messages)]
+        return turn
+
+    def _run_turn(self, conversation_id: str, speaker: autogen.Agent, messages: List[Dict]) -> Dict:
+        """Run one speaker's turn, retrying only this speaker on timeout or error"""
+        view = self._speaker_view(speaker, messages)
+        input_tokens = sum(estimate_tokens(msg["content"] or "") for msg in view)
+        if self.compactor is not None:
+            view = self.compactor.compact(view)
+        turn_stats = {
+            "speaker": speaker.name,
+            "input_tokens": input_tokens,
+            "compacted_input_tokens": sum(estimate_tokens(msg["content"] or "") for msg in view),
+        }
+
+        last_error: Optional[Exception] = None
+        for attempt in range(1, self.max_retries + 2):
+            started = time.perf_counter()
+            hedges_fired = self.caller.hedges_fired
+            snapshot = list(messages)
+            try:
+                with self.scheduler.slot(self.priority, self.user, self.team, self.deadline, self.batch) as ticket:
+                    # Latency covers the call itself, not the wait for a slot
+                    started = time.perf_counter()
+                    reply = self.caller.call(
+                        speaker.name,
+                        lambda cancel: self._call_speaker(conversation_id, speaker, snapshot, view, cancel),
+                        deadline=self.turn_timeout, in_flight=ticket.in_flight
+                    )
+                if reply is None:
+                    raise RuntimeError(f"{speaker.name} returned no reply")
+            except Exception as e:
+                last_error = e
+                self.slo.record_turn(time.perf_counter() - started, rate_limited=is_rate_limit_error(e))
+            else:
+                self.slo.record_turn(time.perf_counter() - started)
+                self.turn_stats.append(dict(
+                    turn_stats, attempts=attempt, latency_seconds=time.perf_counter() - started,
+                    hedged=self.caller.hedges_fired > hedges_fired, queue_wait_seconds=ticket.wait_seconds,
+                    output_tokens=estimate_tokens(reply["content"])
+                ))
+                return reply
+
+            # An abandoned attempt may still have finished and checkpointed the turn
+            stored, _ = self.store.load(conversation_id)
+            if stored and len(stored) > len(messages):
+                self.turn_stats.append(dict(turn_stats, attempts=attempt, latency_seconds=time.perf_counter() - started))
+                return stored[len(messages)]
+
+            if attempt <= self.max_retries:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+        raise TurnFailedError(speaker.name, self.max_retries + 1, len(messages) - 1, last_error)
@@ -0,0 +1,356 @@
+"""
+Pluggable export layer for architecture reports.
+
+Each export format is a ``ReportExporter`` registered in ``EXPORTERS``; the
+Streamlit UI renders one download button per registered exporter. Columnar
+Parquet output uses the stable Arrow schemas below, the same tables
+``analytics.ReportAnalytics`` builds and reads, and the streaming writers
+append reports to a file one at a time so batch pipelines never hold a whole
+backlog in memory.
+"""
+
+import io
+import json
+import os
+import zipfile
+from typing import Dict, List, Any, Iterable
+
+import pandas as pd
+
+
+def _require_pyarrow():
+    """Import pyarrow lazily so the UI still loads without it"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow export requires pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+# Columnar tables shared by the Parquet exporters and ReportAnalytics
+REPORT_TABLES = ["reports", "recommendations", "risks", "components"]
+
+
+def report_key(metadata: Dict) -> str:
+    """Identifier joining a report's rows across tables"""
+    return metadata.get("report_id") or f"{metadata.get('timestamp')}|{metadata.get('user_request')}"
+
+
+def report_schemas() -> Dict[str, Any]:
+    """Stable Arrow schemas for the report, recommendation, risk and component tables"""
+    pa, _ = _require_pyarrow()
+    return {
+        "reports": pa.schema([
+            ("report_id", pa.string()),
+            ("timestamp", pa.timestamp("s")),
+            ("user_request", pa.string()),
+            ("categories", pa.list_(pa.string())),
+            ("priority", pa.string()),
+            ("total_agents", pa.int32()),
+            ("total_recommendations", pa.int32()),
+        ]),
+        "recommendations": pa.schema([
+            ("report_id", pa.string()),
+            ("agent", pa.string()),
+            ("role", pa.string()),
+            ("focus_area", pa.string()),
+            ("count", pa.int32()),
+            ("recommendations", pa.list_(pa.string())),
+        ]),
+        "risks": pa.schema([
+            ("report_id", pa.string()),
+            ("text", pa.string()),
+        ]),
+        "components": pa.schema([
+            ("report_id", pa.string()),
+            ("component_type", pa.string()),
+            ("description", pa.string()),
+        ]),
+    }
+
+
+def report_rows(detailed_report: Dict) -> Dict[str, List[Dict]]:
+    """Flatten one detailed report into rows for each columnar table"""
+    metadata = detailed_report["metadata"]
+    report_id = report_key(metadata)
+    timestamp = pd.to_datetime(metadata.get("timestamp"), errors="coerce")
+
+    return {
+        "reports": [{
+            "report_id": report_id,
+            "timestamp": None if pd.isna(timestamp) else timestamp.floor("s").to_pydatetime(),
+            "user_request": metadata.get("user_request", ""),
+            "categories": list(metadata.get("categories", [])),
+            "priority": metadata.get("priority"),
+            "total_agents": metadata.get("total_agents", 0),
+            "total_recommendations": metadata.get("total_recommendations", 0),
+        }],
+        "recommendations": [
+            {
+                "report_id": report_id,
+                "agent": agent_name,
+                "role": agent_data.get("role"),
+                "focus_area": agent_data.get("focus_area"),
+                "count": agent_data.get("count", len(agent_data.get("recommendations", []))),
+                "recommendations": list(agent_data.get("recommendations", [])),
+            }
+            for agent_name, agent_data in detailed_report.get("agent_summaries", {}).items()
+        ],
+        "risks": [
+            {"report_id": report_id, "text": text}
+            for text in detailed_report.get("risk_assessment", [])
+        ],
+        "components": [
+            {"report_id": report_id, "component_type": component_type, "description": description}
+            for component_type, descriptions in detailed_report.get("components", {}).items()
+            for description in descriptions
+        ],
+    }
+
+
+def reports_to_arrow(detailed_reports: Iterable[Dict]) -> Dict[str, Any]:
+    """Build one Arrow table per schema from a batch of detailed reports"""
+    pa, _ = _require_pyarrow()
+    schemas = report_schemas()
+    rows = {name: [] for name in schemas}
+    for detailed_report in detailed_reports:
+        for name, table_rows in report_rows(detailed_report).items():
+            rows[name].extend(table_rows)
+    return {name: pa.Table.from_pylist(rows[name], schema=schema) for name, schema in schemas.items()}
+
+
+def generate_markdown_report(detailed_report: Dict, summary_table: pd.DataFrame) -> str:
+    """Generate a comprehensive markdown report"""
+
+    metadata = detailed_report["metadata"]
+    parts = [f"""# Multi-Agent Architecture Advisory Report
+
+**Generated:** {metadata['timestamp']}  
+**Request:** {metadata['user_request']}  
+**Categories:** {', '.join(metadata['categories'])}  
+**Priority:** {metadata['priority']}  
+**Total Agents:** {metadata['total_agents']}  
+**Total Recommendations:** {metadata['total_recommendations']}
+
+---
+
+## 📋 Agent Recommendations Summary
+
+| Agent | Role | Focus Area | Recommendation Count |
+|-------|------|------------|---------------------|
+"""]
+    append = parts.append
+
+    # Add summary table rows
+    if not summary_table.empty:
+        columns = [summary_table[name].tolist() for name in ("Agent", "Role", "Focus Area", "Recommendation Count")]
+        parts.extend(
+            f"| {agent} | {role} | {focus_area} | {count} |\n"
+            for agent, role, focus_area, count in zip(*columns)
+        )
+
+    # Numbered sections share the same layout
+    sections = [
+        ("🔍 Key Insights", "key_insights", "No specific insights extracted from the conversation.\n"),
+        ("⚠️ Risk Assessment", "risk_assessment", "No specific risks identified in the conversation.\n"),
+        ("💰 Cost Considerations", "cost_considerations", "No specific cost considerations mentioned.\n"),
+    ]
+    for title, key, empty_text in sections:
+        append(f"\n---\n\n## {title}\n\n")
+        if detailed_report[key]:
+            parts.extend(f"{i}. {item}\n" for i, item in enumerate(detailed_report[key], 1))
+        else:
+            append(empty_text)
+
+    append("\n---\n\n## 📈 Implementation Roadmap\n\n")
+
+    # Add implementation roadmap
+    for phase in detailed_report["implementation_roadmap"]:
+        append(f"### {phase['phase']}\n**Duration:** {phase['duration']}\n**Description:** {phase['description']}\n\n")
+
+    append("\n---\n\n## 📊 Detailed Agent Recommendations\n\n")
+
+    # Add detailed agent recommendations
+    for agent_name, agent_data in detailed_report["agent_summaries"].items():
+        append(f"### {agent_name} - {agent_data['role']}\n")
+        append(f"**Focus Area:** {agent_data['focus_area']}\n")
+        append(f"**Recommendation Count:** {agent_data['count']}\n\n")
+
+        if agent_data['recommendations']:
+            append("**Key Recommendations:**\n")
+            parts.extend(f"{i}. {rec}\n" for i, rec in enumerate(agent_data['recommendations'], 1))
+        else:
+            append("No specific recommendations provided.\n")
+
+        append("\n---\n\n")
+
+    append(f"""
+## 📊 Report Summary
+
+This comprehensive architecture report was generated by analyzing the multi-agent conversation between {metadata['total_agents']} specialized architecture agents. The report includes {metadata['total_recommendations']} total recommendations across various architectural domains.
+
+### Report Sections:
+- **Agent Recommendations Summary**: Overview of each agent's contributions
+- **Key Insights**: Critical findings from the conversation
+- **Risk Assessment**: Identified risks and challenges
+- **Cost Considerations**: Financial implications and optimizations
+- **Implementation Roadmap**: Phased approach to implementation
+- **Detailed Agent Recommendations**: Comprehensive recommendations from each specialist
+
+### Next Steps:
+1. Review all agent recommendations carefully
+2. Prioritize recommendations based on business needs
+3. Develop detailed implementation plans
+4. Consider risk mitigation strategies
+5. Plan cost optimization approaches
+
+---
+*Report generated by Multi-Agent Architecture Advisory System*
+""")
+
+    return "".join(parts)
+
+
+class ReportExporter:
+    """Base class for a single report export format"""
+
+    name = ""
+    label = ""
+    file_prefix = "architecture_report"
+    extension = ""
+    mime = "application/octet-stream"
+
+    def export(self, detailed_report: Dict, summary_table: pd.DataFrame):
+        """Return the exported report as ``str`` or ``bytes``"""
+        raise NotImplementedError
+
+
+class CsvExporter(ReportExporter):
+    """Summary table as CSV"""
+
+    name = "csv"
+    label = "📊 Download Summary Table (CSV)"
+    file_prefix = "architecture_summary"
+    extension = "csv"
+    mime = "text/csv"
+
+    def export(self, detailed_report: Dict, summary_table: pd.DataFrame) -> str:
+        return summary_table.to_csv(index=False)
+
+
+class JsonExporter(ReportExporter):
+    """Full detailed report as JSON"""
+
+    name = "json"
+    label = "📋 Download Detailed Report (JSON)"
+    extension = "json"
+    mime = "application/json"
+
+    def export(self, detailed_report: Dict, summary_table: pd.DataFrame) -> str:
+        return json.dumps(detailed_report, indent=2)
+
+
+class MarkdownExporter(ReportExporter):
+    """Human-readable Markdown report"""
+
+    name = "markdown"
+    label = "📄 Download Report (Markdown)"
+    extension = "md"
+    mime = "text/markdown"
+
+    def export(self, detailed_report: Dict, summary_table: pd.DataFrame) -> str:
+        return generate_markdown_report(detailed_report, summary_table)
+
+
+class ParquetExporter(ReportExporter):
+    """Zip archive with one Parquet file per columnar table"""
+
+    name = "parquet"
+    label = "🗄️ Download Columnar Tables (Parquet)"
+    file_prefix = "architecture_tables"
+    extension = "zip"
+    mime = "application/zip"
+
+    def export(self, detailed_report: Dict, summary_table: pd.DataFrame) -> bytes:
+        _, pq = _require_pyarrow()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for name, table in reports_to_arrow([detailed_report]).items():
+                table_buffer = io.BytesIO()
+                pq.write_table(table, table_buffer)
+                archive.writestr(f"{name}.parquet", table_buffer.getvalue())
+        return buffer.getvalue()
+
+
+EXPORTERS: Dict[str, ReportExporter] = {}
+
+
+def register_exporter(exporter: ReportExporter) -> ReportExporter:
+    """Add an exporter to the registry used by the UI"""
+    EXPORTERS[exporter.name] = exporter
+    return exporter
+
+
+for _exporter in (CsvExporter(), JsonExporter(), MarkdownExporter(), ParquetExporter()):
+    register_exporter(_exporter)
+
+
+class JsonLinesReportWriter:
+    """Append detailed reports to a JSON Lines file, one report per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, detailed_report: Dict) -> None:
+        self._file.write(json.dumps(detailed_report, separators=(",", ":")))
+        self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetReportWriter:
+    """Stream detailed reports into per-table Parquet files in fixed-size row groups"""
+
+    def __init__(self, directory: str, batch_size: int = 1000):
+        _, self._pq = _require_pyarrow()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self._pending: List[Dict] = []
+        self._writers = {
+            name: self._pq.ParquetWriter(os.path.join(directory, f"{name}.parquet"), schema)
+            for name, schema in report_schemas().items()
+        }
+
+    def write(self, detailed_report: Dict) -> None:
+        self._pending.append(detailed_report)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered reports out as one row group per table"""
+        if not self._pending:
+            return
+        for name, table in reports_to_arrow(self._pending).items():
+            self._writers[name].write_table(table)
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,175 @@
+"""
+Deadline-bounded and hedged LLM calls.
+
+``HedgedCaller`` runs a call under a hard deadline. With hedging enabled,
+it fires one duplicate request once the primary has been outstanding
+longer than the observed p95 latency for that agent role, keeps whichever
+finishes first and cancels the other. Latencies come from a per-role
+``LatencyTracker`` that adapts as turns complete.
+
+Cancellation is cooperative: each attempt receives a ``threading.Event``
+that is set once the call is decided. Work that cannot observe the event
+(an in-flight HTTP request, for example) runs to completion in the
+background and its result is discarded. Pass ``in_flight`` to learn when
+those attempts actually finish; the scheduler holds the turn's slot until
+then.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+HEDGE_ENABLED = os.getenv("ARCHITECTURE_HEDGE", "").lower() in ("1", "true", "yes")
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("ARCHITECTURE_HEDGE_MIN_DELAY", "5"))
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per agent role with percentile estimates"""
+
+    def __init__(self, window: int = 200, min_samples: int = 5):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, role: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(role, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, role: str, q: float) -> Optional[float]:
+        """Latency at quantile ``q`` (0-1), or None until enough samples exist"""
+        with self._lock:
+            samples = sorted(self._samples.get(role, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Sample count and p50/p95/p99 per role"""
+        with self._lock:
+            roles = list(self._samples)
+        return {
+            role: {
+                "count": len(self._samples[role]),
+                "p50": self.percentile(role, 0.50),
+                "p95": self.percentile(role, 0.95),
+                "p99": self.percentile(role, 0.99),
+            }
+            for role in roles
+        }
+
+
+# Shared by every conversation in the process so percentiles reflect real traffic
+LATENCY_TRACKER = LatencyTracker()
+
+
+class HedgedCaller:
+    """Run a call under a deadline, optionally hedging after the role's observed p95"""
+
+    def __init__(self, tracker: LatencyTracker = LATENCY_TRACKER, executor: Optional[ThreadPoolExecutor] = None,
+                 hedge: bool = HEDGE_ENABLED, min_hedge_delay: float = HEDGE_MIN_DELAY_SECONDS):
+        self.tracker = tracker
+        self.executor = executor or ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedged-call")
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    def hedge_delay(self, role: str) -> Optional[float]:
+        """Seconds to wait before firing the duplicate, or None when there is no latency history yet"""
+        p95 = self.tracker.percentile(role, 0.95)
+        return None if p95 is None else max(p95, self.min_hedge_delay)
+
+    def call(self, role: str, func: Callable[[threading.Event], T], deadline: float,
+             in_flight: Optional[List[Future]] = None) -> T:
+        """Return the first successful result, raising TimeoutError once ``deadline`` seconds pass
+
+        Every submitted attempt is also appended to ``in_flight``, if given.
+        """
+        started = time.perf_counter()
+        cancel = threading.Event()
+        attempts: List[Future] = []
+
+        def submit() -> None:
+            attempts.append(self.executor.submit(func, cancel))
+            if in_flight is not None:
+                in_flight.append(attempts[-1])
+
+        submit()
+        hedge_at = self.hedge_delay(role) if self.hedge else None
+        last_error: Optional[BaseException] = None
+
+        try:
+            while True:
+                elapsed = time.perf_counter() - started
+                remaining = deadline - elapsed
+                if remaining <= 0:
+                    raise TimeoutError(f"{role} call exceeded {deadline:.1f}s deadline")
+
+                timeout = remaining
+                if hedge_at is not None and len(attempts) == 1:
+                    timeout = min(timeout, max(hedge_at - elapsed, 0))
+
+                pending = [future for future in attempts if not future.done()]
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future.exception() is None:
+                        self.tracker.record(role, time.perf_counter() - started)
+                        if future is not attempts[0]:
+                            self.hedges_won += 1
+                        return future.result()
+                    last_error = future.exception()
+
+                if all(future.done() for future in attempts):
+                    if len(attempts) > 1 or hedge_at is None:
+                        raise last_error
+                    # The primary failed before the hedge point; fall through and hedge now
+                    hedge_at = time.perf_counter() - started
+
+                if hedge_at is not None and len(attempts) == 1 and time.perf_counter() - started >= hedge_at:
+                    self.hedges_fired += 1
+                    submit()
+        finally:
+            cancel.set()
+            for future in attempts:
+                future.cancel()
+
+
+class MockLLMBackend:
+    """Local stand-in for the LLM with an injected latency distribution, for testing hedging"""
+
+    def __init__(self, latency: Callable[[random.Random], float], seed: int = 0):
+        self.latency = latency
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cancelled = 0
+
+    def complete(self, prompt: str, cancel: Optional[threading.Event] = None) -> str:
+        """Sleep for a sampled latency, stopping early if the call is cancelled"""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency(self._rng)
+        if cancel is not None and cancel.wait(delay):
+            with self._lock:
+                self.cancelled += 1
+            raise RuntimeError("cancelled")
+        if cancel is None:
+            time.sleep(delay)
+        return f"mock reply to: {prompt[:40]}"
+
+
+def long_tail_latency(base: float = 0.05, tail: float = 1.0, tail_probability: float = 0.05) -> Callable[[random.Random], float]:
+    """Mostly fast replies with an occasional slow outlier, like a congested API"""
+    def sample(rng: random.Random) -> float:
+        if rng.random() < tail_probability:
+            return tail * (1 + rng.random())
+        return base * (0.5 + rng.random())
+    return sample
@@ -0,0 +1,68 @@
+"""
+Deterministic, vectorized radial layout for architecture diagrams.
+
+Components are placed on concentric rings around the main application, one
+ring per component type. Every ring's radius is grown until its nodes are
+at least ``min_spacing`` apart along the circumference and rings never
+overlap each other, and all positions are computed in a single pass of
+NumPy operations. Layouts depend only on the per-type component counts, so
+they are cached by that signature.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+# Ring order from the centre outwards, with the preferred radius for each type
+RING_TYPES = ["apis", "microservices", "cloud_services", "databases", "storage", "security", "monitoring", "user_interfaces"]
+BASE_RADII = np.array([1.5, 3.0, 4.5, 6.0, 7.5, 9.0, 10.5, 12.0])
+
+LayoutSignature = Tuple[Tuple[str, int], ...]
+
+
+def layout_signature(components: Dict[str, List[str]]) -> LayoutSignature:
+    """Per-type component counts in ring order; the cache key for a layout"""
+    return tuple((component_type, len(components.get(component_type, []))) for component_type in RING_TYPES)
+
+
+@lru_cache(maxsize=256)
+def radial_layout(signature: LayoutSignature, min_spacing: float = 1.0, ring_gap: float = 1.0) -> Dict[str, np.ndarray]:
+    """Compute node positions for every component in one shot
+
+    Returns read-only arrays: ``x``/``y`` positions, ``ring`` (index into
+    ``RING_TYPES``) and ``index`` (position of the node within its ring).
+    """
+    counts = np.array([count for _, count in signature], dtype=np.int64)
+    ring_index = np.arange(len(counts))
+
+    # Adjacent nodes on a ring of n nodes are 2 r sin(pi / n) apart
+    chord_radius = min_spacing / (2 * np.sin(np.pi / np.maximum(counts, 2)))
+    required = np.maximum(BASE_RADII[:len(counts)], np.where(counts > 1, chord_radius, 0.0))
+    # Enforce r[k] >= r[k-1] + ring_gap with a running maximum instead of a loop
+    radii = np.maximum.accumulate(required - ring_index * ring_gap) + ring_index * ring_gap
+
+    ring = np.repeat(ring_index, counts)
+    starts = np.cumsum(counts) - counts
+    index = np.arange(counts.sum()) - np.repeat(starts, counts)
+
+    # Stagger alternate rings by half a step so spokes do not line up
+    step = 2 * np.pi / np.maximum(counts, 1)
+    angle = index * step[ring] + (ring % 2) * step[ring] / 2
+    x = radii[ring] * np.cos(angle)
+    y = radii[ring] * np.sin(angle)
+
+    layout = {"x": x, "y": y, "ring": ring, "index": index, "radii": radii}
+    for array in layout.values():
+        array.setflags(write=False)
+    return layout
+
+
+def spoke_segments(x: np.ndarray, y: np.ndarray, center: Tuple[float, float] = (0.0, 0.0)) -> Tuple[np.ndarray, np.ndarray]:
+    """Edge coordinates from the centre to every node, NaN-separated for a single Plotly trace"""
+    edge_x = np.empty((len(x), 3))
+    edge_y = np.empty((len(y), 3))
+    edge_x[:, 0], edge_x[:, 1], edge_x[:, 2] = center[0], x, np.nan
+    edge_y[:, 0], edge_y[:, 1], edge_y[:, 2] = center[1], y, np.nan
+    return edge_x.ravel(), edge_y.ravel()
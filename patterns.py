@@ -0,0 +1,448 @@
+"""
+Offline architecture-pattern knowledge base with a BM25 index.
+
+``PATTERN_CATALOG`` holds short, stable explanations of common patterns.
+``PatternIndex`` is an in-memory inverted index with BM25 scoring that
+answers queries in well under a millisecond. The top matches for a
+request are given to the specialists as numbered references, so they can
+cite a pattern by ID (``[P-CQRS]``) instead of explaining it again. The
+same index backs the pattern explorer in the UI.
+
+Extra patterns can be added as a JSON list of entries in the catalog
+format, pointed to by ``ARCHITECTURE_PATTERNS_FILE``.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+
+PATTERNS_FILE = os.getenv("ARCHITECTURE_PATTERNS_FILE", "")
+GROUNDING_PATTERNS = int(os.getenv("ARCHITECTURE_GROUNDING_PATTERNS", "5"))
+
+PATTERN_CATALOG: List[Dict[str, Any]] = [
+    {
+        "id": "P-MICROSERVICES", "name": "Microservices", "category": "Application Structure",
+        "summary": "Split the system into independently deployable services, each owning one business capability and its data.",
+        "use_when": "Several teams need to ship independently, or parts of the system scale very differently.",
+        "trade_offs": "Adds network latency, distributed failure modes and operational overhead; needs CI/CD, observability and service ownership.",
+        "tags": ["services", "decomposition", "independent deployment", "bounded context"],
+        "related": ["P-API-GATEWAY", "P-SERVICE-MESH", "P-DATABASE-PER-SERVICE", "P-MODULAR-MONOLITH"],
+    },
+    {
+        "id": "P-MODULAR-MONOLITH", "name": "Modular Monolith", "category": "Application Structure",
+        "summary": "One deployable unit with strictly separated internal modules and explicit interfaces between them.",
+        "use_when": "A small team or an early product needs fast iteration without distributed-systems cost.",
+        "trade_offs": "Scales as one unit; module boundaries erode without enforcement; later extraction to services still takes work.",
+        "tags": ["monolith", "modules", "startup", "small team"],
+        "related": ["P-MICROSERVICES", "P-STRANGLER-FIG"],
+    },
+    {
+        "id": "P-API-GATEWAY", "name": "API Gateway", "category": "Integration",
+        "summary": "A single entry point that routes client requests to backend services and handles authentication, rate limiting and TLS.",
+        "use_when": "Clients talk to many services, or cross-cutting edge concerns should live in one place.",
+        "trade_offs": "Extra hop and a critical component to scale and secure; risk of business logic creeping into the gateway.",
+        "tags": ["gateway", "routing", "rate limiting", "edge", "authentication", "kong", "apigee"],
+        "related": ["P-BFF", "P-MICROSERVICES", "P-RATE-LIMITING"],
+    },
+    {
+        "id": "P-BFF", "name": "Backend for Frontend", "category": "Integration",
+        "summary": "A dedicated backend per client type (web, mobile) that aggregates and shapes data for that client.",
+        "use_when": "Clients need very different payloads or release on different schedules.",
+        "trade_offs": "More services to own; duplicated logic across BFFs if not kept thin.",
+        "tags": ["frontend", "mobile", "aggregation", "graphql"],
+        "related": ["P-API-GATEWAY"],
+    },
+    {
+        "id": "P-CQRS", "name": "CQRS", "category": "Data",
+        "summary": "Separate the write model (commands) from one or more read models (queries) that are optimized and scaled independently.",
+        "use_when": "Read and write workloads differ sharply, or reads need denormalized views.",
+        "trade_offs": "Read models are eventually consistent; more moving parts and synchronization code.",
+        "tags": ["command query responsibility segregation", "read model", "write model", "projections"],
+        "related": ["P-EVENT-SOURCING", "P-MATERIALIZED-VIEW", "P-READ-REPLICAS"],
+    },
+    {
+        "id": "P-EVENT-SOURCING", "name": "Event Sourcing", "category": "Data",
+        "summary": "Persist state as an append-only log of domain events and rebuild current state by replaying them.",
+        "use_when": "A full audit trail, temporal queries or rebuilding projections is a requirement.",
+        "trade_offs": "Event schema evolution is hard; replay and snapshotting need care; steep learning curve.",
+        "tags": ["events", "audit", "append-only", "event store", "replay"],
+        "related": ["P-CQRS", "P-EVENT-DRIVEN"],
+    },
+    {
+        "id": "P-EVENT-DRIVEN", "name": "Event-Driven Architecture", "category": "Integration",
+        "summary": "Services publish domain events to a broker and others react asynchronously, decoupling producers from consumers.",
+        "use_when": "Workflows span services, spikes must be absorbed, or many consumers need the same facts.",
+        "trade_offs": "Eventual consistency, harder debugging and tracing, and the need for idempotent consumers.",
+        "tags": ["events", "asynchronous", "pub/sub", "kafka", "rabbitmq", "sns", "sqs", "eventbridge", "broker"],
+        "related": ["P-OUTBOX", "P-SAGA", "P-IDEMPOTENT-CONSUMER", "P-EVENT-SOURCING"],
+    },
+    {
+        "id": "P-SAGA", "name": "Saga", "category": "Integration",
+        "summary": "Coordinate a multi-service transaction as a sequence of local transactions with compensating actions on failure.",
+        "use_when": "A business transaction spans services that cannot share a database transaction.",
+        "trade_offs": "Compensations are business logic to design and test; intermediate states are visible.",
+        "tags": ["distributed transaction", "orchestration", "choreography", "compensation"],
+        "related": ["P-EVENT-DRIVEN", "P-OUTBOX"],
+    },
+    {
+        "id": "P-OUTBOX", "name": "Transactional Outbox", "category": "Integration",
+        "summary": "Write outgoing events to an outbox table in the same transaction as the state change, then relay them to the broker.",
+        "use_when": "A database update and its event must never diverge.",
+        "trade_offs": "Needs a relay or CDC process; delivery is at-least-once, so consumers must be idempotent.",
+        "tags": ["outbox", "change data capture", "cdc", "debezium", "consistency"],
+        "related": ["P-EVENT-DRIVEN", "P-IDEMPOTENT-CONSUMER"],
+    },
+    {
+        "id": "P-IDEMPOTENT-CONSUMER", "name": "Idempotent Consumer", "category": "Reliability",
+        "summary": "Make message handlers safe to run more than once, for example by recording processed message IDs.",
+        "use_when": "Messaging is at-least-once, which is almost always.",
+        "trade_offs": "Requires deduplication storage and care with side effects outside the database.",
+        "tags": ["idempotency", "deduplication", "at-least-once", "retries"],
+        "related": ["P-OUTBOX", "P-RETRY-BACKOFF"],
+    },
+    {
+        "id": "P-DATABASE-PER-SERVICE", "name": "Database per Service", "category": "Data",
+        "summary": "Each service owns its schema and data store; other services access the data only through its API or events.",
+        "use_when": "Services must evolve and scale independently.",
+        "trade_offs": "No cross-service joins or transactions; reporting needs replication or a data platform.",
+        "tags": ["data ownership", "polyglot persistence", "schema"],
+        "related": ["P-MICROSERVICES", "P-SAGA", "P-CQRS"],
+    },
+    {
+        "id": "P-READ-REPLICAS", "name": "Read Replicas", "category": "Data",
+        "summary": "Serve read traffic from asynchronous replicas of the primary database.",
+        "use_when": "Read-heavy relational workloads outgrow one database node.",
+        "trade_offs": "Replication lag means stale reads; writes still go to a single primary.",
+        "tags": ["postgresql", "mysql", "aurora", "rds", "replication", "read scaling"],
+        "related": ["P-CACHE-ASIDE", "P-SHARDING", "P-CQRS"],
+    },
+    {
+        "id": "P-SHARDING", "name": "Sharding", "category": "Data",
+        "summary": "Partition data horizontally across database nodes by a shard key.",
+        "use_when": "Write volume or data size exceeds what one primary can handle.",
+        "trade_offs": "Cross-shard queries and rebalancing are hard; a poor shard key creates hot spots.",
+        "tags": ["partitioning", "horizontal scaling", "shard key", "cassandra", "dynamodb", "citus", "vitess"],
+        "related": ["P-READ-REPLICAS"],
+    },
+    {
+        "id": "P-CACHE-ASIDE", "name": "Cache-Aside", "category": "Performance",
+        "summary": "The application reads from the cache first and on a miss loads from the database and populates the cache.",
+        "use_when": "Hot, read-mostly data is served repeatedly.",
+        "trade_offs": "Stale data until expiry or invalidation; cold starts and stampedes need mitigation.",
+        "tags": ["caching", "redis", "memcached", "ttl", "invalidation", "latency"],
+        "related": ["P-CDN", "P-READ-REPLICAS", "P-MATERIALIZED-VIEW"],
+    },
+    {
+        "id": "P-MATERIALIZED-VIEW", "name": "Materialized View", "category": "Performance",
+        "summary": "Precompute and store query results in the shape readers need, refreshed on change or on a schedule.",
+        "use_when": "Expensive aggregations or joins are read far more often than the data changes.",
+        "trade_offs": "Views lag the source and cost storage and refresh work.",
+        "tags": ["precompute", "aggregation", "reporting", "projection"],
+        "related": ["P-CQRS", "P-CACHE-ASIDE"],
+    },
+    {
+        "id": "P-CDN", "name": "Content Delivery Network", "category": "Performance",
+        "summary": "Serve static and cacheable content from edge locations close to users.",
+        "use_when": "Users are geographically spread or static assets dominate traffic.",
+        "trade_offs": "Cache invalidation and per-request pricing; dynamic content benefits less.",
+        "tags": ["cloudfront", "cloudflare", "akamai", "edge", "static assets"],
+        "related": ["P-CACHE-ASIDE", "P-STATIC-CONTENT-HOSTING"],
+    },
+    {
+        "id": "P-STATIC-CONTENT-HOSTING", "name": "Static Content Hosting", "category": "Performance",
+        "summary": "Serve front-end bundles and media directly from object storage behind a CDN instead of application servers.",
+        "use_when": "Single-page apps or media-heavy sites.",
+        "trade_offs": "Needs a separate deployment path and cache-busting for assets.",
+        "tags": ["s3", "blob storage", "spa", "object storage"],
+        "related": ["P-CDN"],
+    },
+    {
+        "id": "P-CIRCUIT-BREAKER", "name": "Circuit Breaker", "category": "Reliability",
+        "summary": "Stop calling a failing dependency after repeated errors and fail fast until it recovers.",
+        "use_when": "Remote calls can hang or fail and cascading failures must be contained.",
+        "trade_offs": "Thresholds need tuning; callers must handle the open state with fallbacks.",
+        "tags": ["resilience", "fault tolerance", "cascading failure", "resilience4j", "hystrix"],
+        "related": ["P-RETRY-BACKOFF", "P-BULKHEAD", "P-TIMEOUTS"],
+    },
+    {
+        "id": "P-RETRY-BACKOFF", "name": "Retry with Exponential Backoff", "category": "Reliability",
+        "summary": "Retry transient failures with growing, jittered delays and a bounded number of attempts.",
+        "use_when": "Dependencies fail transiently (throttling, network blips).",
+        "trade_offs": "Retries amplify load during outages; only safe for idempotent operations.",
+        "tags": ["retries", "jitter", "transient faults", "throttling"],
+        "related": ["P-CIRCUIT-BREAKER", "P-IDEMPOTENT-CONSUMER"],
+    },
+    {
+        "id": "P-TIMEOUTS", "name": "Timeouts and Deadlines", "category": "Reliability",
+        "summary": "Bound every remote call with a timeout and propagate an overall request deadline downstream.",
+        "use_when": "Always, for any network call.",
+        "trade_offs": "Too short causes false failures, too long ties up resources.",
+        "tags": ["latency", "deadline propagation", "tail latency"],
+        "related": ["P-CIRCUIT-BREAKER", "P-RETRY-BACKOFF"],
+    },
+    {
+        "id": "P-BULKHEAD", "name": "Bulkhead", "category": "Reliability",
+        "summary": "Isolate resources (thread pools, connections, instances) per dependency or tenant so one failure cannot exhaust them all.",
+        "use_when": "Mixed-criticality workloads share infrastructure.",
+        "trade_offs": "Lower utilization from reserved capacity; more configuration.",
+        "tags": ["isolation", "resource pools", "noisy neighbour", "multi-tenant"],
+        "related": ["P-CIRCUIT-BREAKER", "P-QUEUE-LOAD-LEVELING"],
+    },
+    {
+        "id": "P-QUEUE-LOAD-LEVELING", "name": "Queue-Based Load Leveling", "category": "Scalability",
+        "summary": "Put a queue between producers and workers so bursts are absorbed and workers process at a steady rate.",
+        "use_when": "Traffic is spiky and work can be done asynchronously.",
+        "trade_offs": "Adds latency and a queue to operate; needs back-pressure and dead-letter handling.",
+        "tags": ["queue", "sqs", "rabbitmq", "workers", "background jobs", "back-pressure", "dead letter"],
+        "related": ["P-COMPETING-CONSUMERS", "P-EVENT-DRIVEN"],
+    },
+    {
+        "id": "P-COMPETING-CONSUMERS", "name": "Competing Consumers", "category": "Scalability",
+        "summary": "Several worker instances consume from the same queue so throughput scales with the number of workers.",
+        "use_when": "Independent work items need horizontal processing capacity.",
+        "trade_offs": "No ordering guarantees across workers; poison messages must be handled.",
+        "tags": ["workers", "horizontal scaling", "autoscaling", "keda"],
+        "related": ["P-QUEUE-LOAD-LEVELING", "P-IDEMPOTENT-CONSUMER"],
+    },
+    {
+        "id": "P-AUTOSCALING", "name": "Horizontal Autoscaling", "category": "Scalability",
+        "summary": "Add and remove stateless instances automatically based on load metrics.",
+        "use_when": "Load varies over the day and the service is stateless.",
+        "trade_offs": "Scale-up lag, cold starts, and downstream systems must absorb the extra load.",
+        "tags": ["hpa", "auto scaling group", "elastic", "stateless", "kubernetes"],
+        "related": ["P-KUBERNETES", "P-SERVERLESS", "P-COMPETING-CONSUMERS"],
+    },
+    {
+        "id": "P-KUBERNETES", "name": "Container Orchestration with Kubernetes", "category": "Platform",
+        "summary": "Run containerized services on Kubernetes for scheduling, self-healing, rolling deploys and service discovery.",
+        "use_when": "Many services need a uniform deployment and runtime platform.",
+        "trade_offs": "Significant platform complexity; managed offerings (EKS, AKS, GKE) reduce but do not remove it.",
+        "tags": ["k8s", "containers", "docker", "eks", "aks", "gke", "helm", "orchestration"],
+        "related": ["P-AUTOSCALING", "P-SERVICE-MESH", "P-GITOPS"],
+    },
+    {
+        "id": "P-SERVERLESS", "name": "Serverless Functions", "category": "Platform",
+        "summary": "Run event-triggered functions on a managed platform that scales to zero and bills per invocation.",
+        "use_when": "Spiky or low, event-driven workloads and glue code.",
+        "trade_offs": "Cold starts, execution limits, vendor lock-in and costly at sustained high volume.",
+        "tags": ["lambda", "azure functions", "cloud functions", "faas", "scale to zero"],
+        "related": ["P-EVENT-DRIVEN", "P-AUTOSCALING"],
+    },
+    {
+        "id": "P-SERVICE-MESH", "name": "Service Mesh", "category": "Platform",
+        "summary": "Sidecar or node proxies provide mTLS, retries, traffic shifting and telemetry between services without code changes.",
+        "use_when": "Many services need uniform security and traffic policy.",
+        "trade_offs": "Extra latency and resource use per hop; a complex control plane to operate.",
+        "tags": ["istio", "linkerd", "envoy", "mtls", "sidecar"],
+        "related": ["P-KUBERNETES", "P-ZERO-TRUST"],
+    },
+    {
+        "id": "P-GITOPS", "name": "GitOps and Infrastructure as Code", "category": "Platform",
+        "summary": "Declare infrastructure and deployments in version control and let automation reconcile the environment to it.",
+        "use_when": "Environments must be reproducible and changes auditable.",
+        "trade_offs": "Secrets management and drift handling need care; slower for emergency changes.",
+        "tags": ["terraform", "argocd", "flux", "infrastructure as code", "iac", "pulumi"],
+        "related": ["P-KUBERNETES", "P-BLUE-GREEN"],
+    },
+    {
+        "id": "P-BLUE-GREEN", "name": "Blue-Green and Canary Deployment", "category": "Platform",
+        "summary": "Release to a parallel environment or a small traffic slice first, then shift traffic and keep instant rollback.",
+        "use_when": "Downtime or risky releases are unacceptable.",
+        "trade_offs": "Double capacity during cutover; database migrations must be backward compatible.",
+        "tags": ["deployment", "canary", "rollback", "feature flags", "progressive delivery"],
+        "related": ["P-GITOPS"],
+    },
+    {
+        "id": "P-STRANGLER-FIG", "name": "Strangler Fig Migration", "category": "Migration",
+        "summary": "Incrementally route functionality from a legacy system to new components behind a facade until the legacy can be retired.",
+        "use_when": "Modernizing a legacy system without a big-bang rewrite.",
+        "trade_offs": "Two systems run in parallel for a long time; data synchronization during transition.",
+        "tags": ["legacy", "modernization", "migration", "facade", "rewrite"],
+        "related": ["P-ANTI-CORRUPTION-LAYER", "P-MODULAR-MONOLITH"],
+    },
+    {
+        "id": "P-ANTI-CORRUPTION-LAYER", "name": "Anti-Corruption Layer", "category": "Migration",
+        "summary": "Translate between a new domain model and a legacy or external system so the foreign model does not leak in.",
+        "use_when": "Integrating with legacy or third-party systems with different models.",
+        "trade_offs": "Extra translation code and latency to maintain.",
+        "tags": ["legacy", "integration", "adapter", "domain model", "third party"],
+        "related": ["P-STRANGLER-FIG"],
+    },
+    {
+        "id": "P-ZERO-TRUST", "name": "Zero-Trust Networking", "category": "Security",
+        "summary": "Authenticate and authorize every request between users, devices and services; never trust network location.",
+        "use_when": "Hybrid or multi-cloud estates, remote users, or regulated data.",
+        "trade_offs": "Identity infrastructure and policy management effort; more certificates to rotate.",
+        "tags": ["security", "mtls", "identity", "least privilege", "compliance"],
+        "related": ["P-SERVICE-MESH", "P-OAUTH-OIDC", "P-SECRETS-MANAGEMENT"],
+    },
+    {
+        "id": "P-OAUTH-OIDC", "name": "Centralized Identity with OAuth 2.0 / OIDC", "category": "Security",
+        "summary": "Delegate authentication to an identity provider and authorize APIs with short-lived tokens and scopes.",
+        "use_when": "Multiple apps or APIs share users, or SSO is required.",
+        "trade_offs": "Token lifetime and revocation trade-offs; the identity provider becomes critical.",
+        "tags": ["authentication", "authorization", "sso", "jwt", "keycloak", "auth0", "cognito", "entra"],
+        "related": ["P-API-GATEWAY", "P-ZERO-TRUST"],
+    },
+    {
+        "id": "P-SECRETS-MANAGEMENT", "name": "Secrets Management", "category": "Security",
+        "summary": "Store credentials in a dedicated secrets manager with access policies, auditing and automatic rotation.",
+        "use_when": "Any system with credentials, keys or certificates.",
+        "trade_offs": "The secrets store is a critical dependency; applications must handle rotation.",
+        "tags": ["vault", "kms", "secrets manager", "key vault", "encryption", "rotation"],
+        "related": ["P-ZERO-TRUST"],
+    },
+    {
+        "id": "P-OBSERVABILITY", "name": "Observability with Metrics, Logs and Traces", "category": "Operations",
+        "summary": "Emit structured logs, metrics and distributed traces with shared correlation IDs and alert on SLOs.",
+        "use_when": "Any production system, and especially distributed ones.",
+        "trade_offs": "Telemetry volume costs money; needs sampling and retention policies.",
+        "tags": ["monitoring", "logging", "tracing", "opentelemetry", "prometheus", "grafana", "datadog", "slo"],
+        "related": ["P-MICROSERVICES", "P-SERVICE-MESH"],
+    },
+    {
+        "id": "P-RATE-LIMITING", "name": "Rate Limiting and Throttling", "category": "Reliability",
+        "summary": "Cap request rates per client or tenant to protect capacity and ensure fair use.",
+        "use_when": "Public APIs, multi-tenant systems or expensive downstream calls.",
+        "trade_offs": "Legitimate bursts get rejected; distributed counters add latency.",
+        "tags": ["throttling", "quota", "token bucket", "fairness", "multi-tenant"],
+        "related": ["P-API-GATEWAY", "P-BULKHEAD"],
+    },
+    {
+        "id": "P-MULTI-REGION", "name": "Multi-Region Active-Active", "category": "Availability",
+        "summary": "Serve traffic from several regions at once with data replicated between them and global traffic routing.",
+        "use_when": "Regional outages are unacceptable or users are global and latency-sensitive.",
+        "trade_offs": "Cross-region data consistency and conflict resolution; roughly double infrastructure cost.",
+        "tags": ["disaster recovery", "high availability", "failover", "global", "geo-replication", "route 53"],
+        "related": ["P-CDN", "P-SHARDING"],
+    },
+    {
+        "id": "P-DATA-LAKEHOUSE", "name": "Data Lakehouse", "category": "Data",
+        "summary": "Keep raw and curated data in open table formats on object storage and query it with SQL and ML engines.",
+        "use_when": "Analytics and ML need shared, governed access to large volumes of data.",
+        "trade_offs": "Table maintenance (compaction, vacuum) and governance effort.",
+        "tags": ["analytics", "data lake", "delta lake", "iceberg", "parquet", "spark", "warehouse", "etl"],
+        "related": ["P-EVENT-DRIVEN", "P-MATERIALIZED-VIEW"],
+    },
+    {
+        "id": "P-OSS-MANAGED-HYBRID", "name": "Open Source Core with Managed Services", "category": "Cost",
+        "summary": "Standardize on open source engines (PostgreSQL, Kafka, Redis) and run them as managed services where ops cost outweighs fees.",
+        "use_when": "Avoiding lock-in matters but the team cannot operate every component itself.",
+        "trade_offs": "Managed premiums; feature gaps between upstream and provider versions; license changes upstream.",
+        "tags": ["open source", "oss", "lock-in", "licensing", "self-hosted", "managed service", "cost"],
+        "related": ["P-GITOPS"],
+    },
+]
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from how i in into is it its of on or our should so that the their this to "
+    "we what when where which with without need needs want design system".split()
+)
+
+# Field repetition weights: a match in the name or tags counts more than one in the prose
+FIELD_WEIGHTS = {"name": 3, "tags": 3, "category": 1, "summary": 1, "use_when": 1, "trade_offs": 1}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords and with a trailing plural 's' removed"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        for part in [token] + (re.split(r"[-/]", token) if re.search(r"[-/]", token) else []):
+            if part in _STOPWORDS or len(part) < 2:
+                continue
+            tokens.append(part[:-1] if len(part) > 3 and part.endswith("s") and not part.endswith("ss") else part)
+    return tokens
+
+
+class PatternIndex:
+    """Inverted index with Okapi BM25 ranking over the pattern catalog"""
+
+    def __init__(self, patterns: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        self.patterns = patterns
+        self.by_id = {pattern["id"]: pattern for pattern in patterns}
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for doc_id, pattern in enumerate(patterns):
+            terms: List[str] = []
+            for field, weight in FIELD_WEIGHTS.items():
+                value = pattern.get(field, "")
+                text = " ".join(value) if isinstance(value, list) else value
+                terms.extend(tokenize(text) * weight)
+            for term, frequency in Counter(terms).items():
+                self.postings[term].append((doc_id, frequency))
+            self.doc_lengths.append(len(terms))
+        self.average_length = sum(self.doc_lengths) / max(len(self.doc_lengths), 1)
+        count = len(patterns)
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        self.categories = sorted({pattern["category"] for pattern in patterns})
+
+    def search(self, query: str, k: int = 5, categories: Optional[List[str]] = None,
+               min_score: float = 0.0) -> List[Tuple[Dict[str, Any], float]]:
+        """Top ``k`` patterns for ``query`` as (pattern, score), best first"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, frequency in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = []
+        for doc_id, score in ranked:
+            pattern = self.patterns[doc_id]
+            if score <= min_score or (categories and pattern["category"] not in categories):
+                continue
+            results.append((pattern, score))
+            if len(results) == k:
+                break
+        return results
+
+    def cited_patterns(self, text: str) -> List[Dict[str, Any]]:
+        """Catalog patterns referenced by ID (e.g. ``[P-CQRS]``) in ``text``, in first-mention order"""
+        seen = []
+        for pattern_id in re.findall(r"\bP-[A-Z0-9-]*[A-Z0-9]\b", text or ""):
+            if pattern_id in self.by_id and pattern_id not in seen:
+                seen.append(pattern_id)
+        return [self.by_id[pattern_id] for pattern_id in seen]
+
+
+@lru_cache(maxsize=1)
+def default_index() -> PatternIndex:
+    """Index over the built-in catalog plus ``ARCHITECTURE_PATTERNS_FILE``, built once per process"""
+    patterns = list(PATTERN_CATALOG)
+    if PATTERNS_FILE and os.path.exists(PATTERNS_FILE):
+        with open(PATTERNS_FILE, encoding="utf-8") as f:
+            extra = json.load(f)
+        known = {pattern["id"] for pattern in patterns}
+        patterns.extend(pattern for pattern in extra if pattern["id"] not in known)
+    return PatternIndex(patterns)
+
+
+def grounding_context(user_request: str, categories: List[str], k: int = GROUNDING_PATTERNS) -> Tuple[str, List[str]]:
+    """Reference block of the patterns most relevant to a request, and their IDs
+
+    Returns an empty block when nothing in the catalog matches.
+    """
+    results = default_index().search(" ".join([user_request] + list(categories)), k=k)
+    if not results:
+        return "", []
+    lines = [
+        "**Reference Patterns:** the team already knows these. Cite them by ID (e.g. "
+        f"[{results[0][0]['id']}]) instead of explaining them, and spend the words on request-specific decisions."
+    ]
+    for pattern, _ in results:
+        lines.append(f"- [{pattern['id']}] {pattern['name']}: {pattern['summary']} Trade-offs: {pattern['trade_offs']}")
+    return "\n".join(lines), [pattern["id"] for pattern, _ in results]
@@ -0,0 +1,404 @@
+"""
+Opt-in memory and allocation profiling for long-lived Streamlit processes.
+
+With ``ARCHITECTURE_MEMORY_PROFILING=1`` (or from the hidden admin panel at
+``?admin=memory&admin_token=...``, available only when
+``ARCHITECTURE_ADMIN_TOKEN`` is set), ``PROFILER`` starts ``tracemalloc`` and the app takes a
+snapshot after every request. For each request it records the process RSS,
+the traced total, the top allocators grouped by module (``autogen``,
+``plotly``, ``pandas``, ``app``, ...) and a leak diff: the source lines whose
+allocations grew the most since the previous request. Each rerun also records
+the size of every ``st.session_state`` key for that session, so growth can be
+traced to a session, a key or a library. Sessions are recorded under a
+one-way label rather than their id, and sessions that stop rerunning are
+forgotten after ``SESSION_TTL_SECONDS``.
+
+Only the baseline, previous and latest snapshots are kept in memory. The
+per-request summaries are small dicts. While profiling, each one is also
+written as JSON to ``ARCHITECTURE_MEMORY_DUMP_DIR`` (the newest
+``MAX_DUMPS`` are kept) for headless use by on-call engineers:
+
+    python profiling.py show            # latest dump in the dump directory
+    python profiling.py diff A.json B.json
+"""
+
+import argparse
+import glob
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Mapping, Optional, Set, Tuple
+
+import pandas as pd
+
+
+PROFILING_ENABLED = os.getenv("ARCHITECTURE_MEMORY_PROFILING", "").lower() in ("1", "true", "yes")
+PROFILING_FRAMES = int(os.getenv("ARCHITECTURE_MEMORY_PROFILING_FRAMES", "1"))
+MEMORY_DUMP_DIR = os.getenv("ARCHITECTURE_MEMORY_DUMP_DIR", ".memprofile")
+MAX_DUMPS = 50
+SESSION_TTL_SECONDS = float(os.getenv("ARCHITECTURE_MEMORY_SESSION_TTL_SECONDS", "3600"))
+ADMIN_TOKEN = os.getenv("ARCHITECTURE_ADMIN_TOKEN", "")
+
+# The profiler's own bookkeeping would otherwise show up as the top allocator
+_IGNORED_FILES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap", "<unknown>")
+
+# (filename, line) -> (traced bytes, blocks) for one snapshot
+LineStats = Dict[Tuple[str, int], Tuple[int, int]]
+
+# Objects that are shared process-wide, not owned by a session
+_SHARED_TYPES = (type, type(sys), type(len), type(lambda: None), threading.Thread)
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, or None where it can't be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def admin_authorized(token: Optional[str]) -> bool:
+    """Whether ``token`` opens the admin panel; the panel is disabled while no token is configured"""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(str(token or ""), ADMIN_TOKEN)
+
+
+def session_label(session_id: str) -> str:
+    """Stable label for a session that does not reveal its id"""
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:12]
+
+
+@lru_cache(maxsize=4096)
+def module_for(filename: str) -> str:
+    """Top-level module or package a source file belongs to, e.g. ``plotly`` or ``app``"""
+    best = ""
+    for entry in sys.path:
+        entry = os.path.abspath(entry or ".")
+        if filename.startswith(entry + os.sep) and len(entry) > len(best):
+            best = entry
+    relative = filename[len(best) + 1:] if best else os.path.basename(filename)
+    top = relative.split(os.sep, 1)[0]
+    return top[:-3] if top.endswith(".py") else top
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Approximate bytes reachable from ``obj``, counting shared objects once"""
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+        if isinstance(item, pd.DataFrame):
+            total += int(item.memory_usage(deep=True).sum())
+            continue
+        if isinstance(item, pd.Series):
+            total += int(item.memory_usage(deep=True))
+            continue
+        try:
+            total += sys.getsizeof(item)
+        except TypeError:
+            continue
+        if isinstance(item, (str, bytes, bytearray, int, float, bool)):
+            continue
+        if isinstance(item, Mapping):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        if hasattr(item, "__dict__"):
+            stack.append(vars(item))
+        for slot in getattr(type(item), "__slots__", ()):
+            if hasattr(item, slot):
+                stack.append(getattr(item, slot))
+    return total
+
+
+def session_state_sizes(session_state: Mapping) -> Dict[str, int]:
+    """Approximate bytes held by each ``st.session_state`` key, largest first"""
+    sizes = {}
+    for key in list(session_state.keys()):
+        try:
+            sizes[str(key)] = deep_sizeof(session_state[key])
+        except Exception:
+            # Widgets can disappear between listing and reading the state
+            continue
+    return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots per request, top allocators by module and leak diffs between requests
+
+    Snapshots are reduced to per-line ``(bytes, blocks)`` totals as soon as
+    they are taken; the raw snapshots, which hold every traced block, are not kept.
+    """
+
+    def __init__(self, frames: int = PROFILING_FRAMES, dump_dir: str = MEMORY_DUMP_DIR,
+                 top: int = 20, window: int = 100, session_ttl: float = SESSION_TTL_SECONDS):
+        self.frames = frames
+        self.dump_dir = dump_dir
+        self.top = top
+        self.session_ttl = session_ttl
+        self._baseline: Optional[LineStats] = None
+        self._previous: Optional[LineStats] = None
+        self._latest: Optional[LineStats] = None
+        self.requests: Deque[Dict[str, Any]] = deque(maxlen=window)
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Start tracing allocations (a no-op if already tracing) and take the baseline snapshot"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        with self._lock:
+            if self._baseline is None:
+                self._baseline = self._take()
+
+    def stop(self) -> None:
+        """Stop tracing and drop the snapshots; recorded summaries are kept"""
+        tracemalloc.stop()
+        with self._lock:
+            self._baseline = self._previous = self._latest = None
+
+    def _take(self) -> LineStats:
+        # One grouping pass; filtering at this level is far cheaper than Snapshot.filter_traces
+        lines = {}
+        for stat in tracemalloc.take_snapshot().statistics("lineno"):
+            frame = stat.traceback[0]
+            if not frame.filename.startswith(_IGNORED_FILES):
+                lines[(frame.filename, frame.lineno)] = (stat.size, stat.count)
+        return lines
+
+    def record_request(self, label: str, **details) -> Optional[Dict[str, Any]]:
+        """Snapshot after a request and record its summary; returns None when not tracing"""
+        if not self.enabled:
+            return None
+        lines = self._take()
+        with self._lock:
+            self._previous, self._latest = self._latest or self._baseline, lines
+            previous = self._previous
+        current, peak = tracemalloc.get_traced_memory()
+        summary = {
+            "label": label,
+            "timestamp": time.time(),
+            "rss_bytes": rss_bytes(),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "top_modules": self.top_modules(lines),
+            "leak_diff": self.diff(previous, lines) if previous is not None else [],
+            "details": details,
+        }
+        self.requests.append(summary)
+        self._dump(summary)
+        return summary
+
+    def account_session(self, session_id: str, session_state: Mapping) -> Dict[str, int]:
+        """Record the size of one session's state; cheap enough to call once per rerun while profiling"""
+        sizes = session_state_sizes(session_state)
+        now = time.time()
+        with self._lock:
+            self.sessions[session_label(session_id)] = {"updated_at": now, "total_bytes": sum(sizes.values()), "keys": sizes}
+            self._expire_sessions(now)
+        return sizes
+
+    def forget_session(self, session_id: str) -> None:
+        """Drop a session's size accounting"""
+        with self._lock:
+            self.sessions.pop(session_label(session_id), None)
+
+    def _expire_sessions(self, now: float) -> None:
+        # Streamlit gives no signal when a browser tab goes away
+        for label in [label for label, entry in self.sessions.items() if now - entry["updated_at"] > self.session_ttl]:
+            del self.sessions[label]
+
+    def top_modules(self, lines: Optional[LineStats] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Traced bytes and block counts grouped by top-level module, largest first"""
+        lines = lines if lines is not None else self._latest
+        if lines is None:
+            return []
+        modules: Dict[str, List[int]] = {}
+        for (filename, _), (size, count) in lines.items():
+            totals = modules.setdefault(module_for(filename), [0, 0])
+            totals[0] += size
+            totals[1] += count
+        ranked = sorted(modules.items(), key=lambda item: -item[1][0])[:limit or self.top]
+        return [{"module": module, "size_bytes": size, "blocks": count} for module, (size, count) in ranked]
+
+    def diff(self, older: LineStats, newer: LineStats, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Source lines whose traced memory grew the most from ``older`` to ``newer``"""
+        growth = []
+        for (filename, lineno), (size, count) in newer.items():
+            old_size, old_count = older.get((filename, lineno), (0, 0))
+            if size > old_size:
+                growth.append({
+                    "location": f"{filename}:{lineno}",
+                    "module": module_for(filename),
+                    "size_diff_bytes": size - old_size,
+                    "count_diff": count - old_count,
+                    "size_bytes": size,
+                })
+        growth.sort(key=lambda item: -item["size_diff_bytes"])
+        return growth[:limit or self.top]
+
+    def growth_since_baseline(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Leak diff from the baseline snapshot to the latest one"""
+        with self._lock:
+            baseline, latest = self._baseline, self._latest
+        if baseline is None or latest is None:
+            return []
+        return self.diff(baseline, latest, limit)
+
+    def report(self) -> Dict[str, Any]:
+        """Everything the admin panel and the headless dump show, as plain data"""
+        traced, peak = tracemalloc.get_traced_memory() if self.enabled else (0, 0)
+        with self._lock:
+            sessions = {session_id: dict(entry) for session_id, entry in self.sessions.items()}
+        return {
+            "pid": os.getpid(),
+            "timestamp": time.time(),
+            "tracing": self.enabled,
+            "rss_bytes": rss_bytes(),
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "top_modules": self.top_modules(),
+            "growth_since_baseline": self.growth_since_baseline(),
+            "requests": list(self.requests),
+            "sessions": sessions,
+        }
+
+    def requests_frame(self) -> pd.DataFrame:
+        """One row per profiled request: RSS and traced memory over time"""
+        return pd.DataFrame([
+            {
+                "label": summary["label"],
+                "time": pd.to_datetime(summary["timestamp"], unit="s"),
+                "rss_mb": (summary["rss_bytes"] or 0) / 2 ** 20,
+                "traced_mb": summary["traced_bytes"] / 2 ** 20,
+                "top_module": summary["top_modules"][0]["module"] if summary["top_modules"] else "",
+            }
+            for summary in self.requests
+        ])
+
+    def sessions_frame(self) -> pd.DataFrame:
+        """One row per (session, state key) with its approximate size"""
+        with self._lock:
+            rows = [
+                {"session": session_id, "key": key, "size_mb": size / 2 ** 20}
+                for session_id, entry in self.sessions.items()
+                for key, size in entry["keys"].items()
+            ]
+        return pd.DataFrame(rows, columns=["session", "key", "size_mb"])
+
+    def dump_report(self) -> Optional[str]:
+        """Write the full ``report()`` to the dump directory now; returns the file path"""
+        return self._dump(dict(self.report(), label="report"))
+
+    def _dump(self, summary: Dict[str, Any]) -> Optional[str]:
+        if not self.dump_dir:
+            return None
+        if "sessions" not in summary:
+            with self._lock:
+                summary = dict(summary, sessions={session_id: dict(entry) for session_id, entry in self.sessions.items()})
+        os.makedirs(self.dump_dir, exist_ok=True)
+        path = os.path.join(self.dump_dir, f"memory_{os.getpid()}_{summary['timestamp']:.3f}.json")
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2, default=str)
+        # File names start with the pid, so order by age rather than by name
+        dumps = sorted(glob.glob(os.path.join(self.dump_dir, "memory_*.json")), key=os.path.getmtime)
+        for old in dumps[:-MAX_DUMPS]:
+            os.remove(old)
+        return path
+
+
+# One profiler per process; Streamlit sessions share the same heap
+PROFILER = MemoryProfiler()
+if PROFILING_ENABLED:
+    PROFILER.start()
+
+
+def _format_bytes(size: Optional[float]) -> str:
+    return "n/a" if size is None else f"{size / 2 ** 20:,.1f} MB"
+
+
+def _print_dump(dump: Dict[str, Any], limit: int) -> None:
+    print(f"{dump.get('label', 'report')}: RSS {_format_bytes(dump.get('rss_bytes'))}, "
+          f"traced {_format_bytes(dump.get('traced_bytes'))} (peak {_format_bytes(dump.get('traced_peak_bytes'))})")
+    print("\nTop allocators by module:")
+    for entry in dump.get("top_modules", [])[:limit]:
+        print(f"  {entry['module']:<30} {_format_bytes(entry['size_bytes']):>12} {entry['blocks']:>10,} blocks")
+    # Per-request dumps diff against the previous request, full reports against the start of tracing
+    if "leak_diff" in dump:
+        print("\nGrowth since the previous request:")
+    else:
+        print("\nGrowth since tracing started:")
+    for entry in dump.get("leak_diff", dump.get("growth_since_baseline", []))[:limit]:
+        print(f"  +{_format_bytes(entry['size_diff_bytes']):>10} {entry['count_diff']:>+8,} blocks  {entry['location']}")
+    print("\nSession state:")
+    for session_id, entry in sorted(dump.get("sessions", {}).items(), key=lambda item: -item[1]["total_bytes"])[:limit]:
+        largest = ", ".join(f"{key} {_format_bytes(size)}" for key, size in list(entry["keys"].items())[:3])
+        print(f"  {session_id:<12} {_format_bytes(entry['total_bytes']):>12}  ({largest})")
+
+
+def _diff_dumps(older: Dict[str, Any], newer: Dict[str, Any], limit: int) -> None:
+    print(f"RSS {_format_bytes(older.get('rss_bytes'))} -> {_format_bytes(newer.get('rss_bytes'))}, "
+          f"traced {_format_bytes(older['traced_bytes'])} -> {_format_bytes(newer['traced_bytes'])}")
+    before = {entry["module"]: entry["size_bytes"] for entry in older.get("top_modules", [])}
+    after = {entry["module"]: entry["size_bytes"] for entry in newer.get("top_modules", [])}
+    changes: List[Tuple[str, int]] = sorted(
+        ((module, after.get(module, 0) - before.get(module, 0)) for module in set(before) | set(after)),
+        key=lambda item: -abs(item[1])
+    )
+    print("\nChange by module:")
+    for module, change in changes[:limit]:
+        print(f"  {module:<30} {'+' if change >= 0 else '-'}{_format_bytes(abs(change)):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect memory profiling dumps written by the app")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    show_parser = subparsers.add_parser("show", help="Summarize a dump (default: the newest in the dump directory)")
+    show_parser.add_argument("dump", nargs="?")
+    show_parser.add_argument("--dir", default=MEMORY_DUMP_DIR)
+    show_parser.add_argument("--top", type=int, default=15)
+    diff_parser = subparsers.add_parser("diff", help="Compare two dumps by module")
+    diff_parser.add_argument("older")
+    diff_parser.add_argument("newer")
+    diff_parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    if args.command == "show":
+        path = args.dump or max(glob.glob(os.path.join(args.dir, "memory_*.json")), key=os.path.getmtime, default=None)
+        if path is None:
+            parser.error(f"No dumps in {args.dir}; run the app with ARCHITECTURE_MEMORY_PROFILING=1")
+        with open(path) as f:
+            _print_dump(json.load(f), args.top)
+    else:
+        with open(args.older) as f:
+            older = json.load(f)
+        with open(args.newer) as f:
+            newer = json.load(f)
+        _diff_dumps(older, newer, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Relevance-based specialist roster planning.
+
+Before a conversation starts, ``RosterPlanner`` decides which specialists
+the request actually needs from the selected categories, the priority and
+a local keyword classifier over the request text. Specialists that would
+add little are skipped, saving one LLM call each. Critical requests,
+requests the classifier cannot place, and an explicit override all get
+the full panel.
+"""
+
+import re
+from typing import Dict, List, Any, Optional
+
+
+SPECIALISTS = ["HeadOfArchitecture", "CloudArchitect", "OSSArchitect", "LeadArchitect"]
+
+# LeadArchitect synthesizes across domains, so it stays on every roster
+ALWAYS_INCLUDED = {"LeadArchitect"}
+
+CATEGORY_SPECIALISTS = {
+    "Cloud Architecture": {"CloudArchitect"},
+    "Open Source": {"OSSArchitect"},
+    "Scalability": {"CloudArchitect"},
+    "Security": {"CloudArchitect", "OSSArchitect"},
+    "Cost Optimization": {"CloudArchitect", "OSSArchitect", "HeadOfArchitecture"},
+    "Integration": set(),
+}
+
+SPECIALIST_KEYWORDS = {
+    "HeadOfArchitecture": [
+        "strategy", "strategic", "business", "roadmap", "stakeholder", "budget", "governance",
+        "organization", "team", "vendor", "compliance", "migration plan", "roi"
+    ],
+    "CloudArchitect": [
+        "aws", "azure", "gcp", "cloud", "serverless", "lambda", "kubernetes", "k8s", "eks", "aks", "gke",
+        "docker", "container", "autoscal", "region", "multi-region", "iaas", "paas", "saas", "terraform"
+    ],
+    "OSSArchitect": [
+        "open source", "open-source", "oss", "license", "licensing", "gpl", "apache", "mit license",
+        "community", "self-host", "self host", "kafka", "rabbitmq", "postgres", "redis", "nats", "broker"
+    ],
+}
+
+PRIORITY_INCLUDES = {
+    "High": {"HeadOfArchitecture"},
+}
+
+_KEYWORD_PATTERNS = {
+    specialist: [re.compile(r"\b" + re.escape(keyword)) for keyword in keywords]
+    for specialist, keywords in SPECIALIST_KEYWORDS.items()
+}
+
+
+class RosterPlanner:
+    """Choose the specialists to invoke for a request before the conversation starts"""
+
+    def __init__(self, keyword_threshold: int = 1):
+        self.keyword_threshold = keyword_threshold
+
+    def score(self, user_request: str, categories: List[str]) -> Dict[str, int]:
+        """Relevance score per specialist: 2 per matching category, 1 per matched keyword"""
+        text = user_request.lower()
+        scores = {specialist: 0 for specialist in SPECIALISTS}
+        for category in categories:
+            for specialist in CATEGORY_SPECIALISTS.get(category, set()):
+                scores[specialist] += 2
+        for specialist, patterns in _KEYWORD_PATTERNS.items():
+            scores[specialist] += sum(1 for pattern in patterns if pattern.search(text))
+        return scores
+
+    def plan(self, user_request: str, categories: List[str], priority: str,
+             force_full_panel: bool = False, max_specialists: Optional[int] = None) -> Dict[str, Any]:
+        """Return the roster (in speaking order), skipped specialists and LLM calls saved
+
+        ``max_specialists`` caps the roster size under load; the always-included
+        specialists stay and the rest are kept in order of relevance score.
+        """
+        scores = self.score(user_request, categories)
+
+        if force_full_panel:
+            selected, reason = set(SPECIALISTS), "Full panel requested"
+        elif priority == "Critical":
+            selected, reason = set(SPECIALISTS), "Critical priority always gets the full panel"
+        else:
+            selected = {specialist for specialist, value in scores.items() if value >= self.keyword_threshold}
+            if not selected - ALWAYS_INCLUDED:
+                # Nothing domain-specific detected: no basis for skipping anyone
+                selected, reason = set(SPECIALISTS), "No clear domain signal; using the full panel"
+            else:
+                reason = "Selected from categories, priority and request keywords"
+            selected |= ALWAYS_INCLUDED | PRIORITY_INCLUDES.get(priority, set())
+
+        if max_specialists is not None and len(selected) > max_specialists:
+            optional = sorted(selected - ALWAYS_INCLUDED, key=lambda specialist: -scores[specialist])
+            selected = ALWAYS_INCLUDED | set(optional[:max(max_specialists - len(ALWAYS_INCLUDED), 0)])
+            reason += f"; capped at {max_specialists} specialists under load"
+
+        roster = [specialist for specialist in SPECIALISTS if specialist in selected]
+        return {
+            "specialists": roster,
+            "skipped": [specialist for specialist in SPECIALISTS if specialist not in selected],
+            "scores": scores,
+            "reason": reason,
+            "llm_calls_saved": len(SPECIALISTS) - len(roster),
+        }
+
@@ -0,0 +1,507 @@
+"""
+Priority- and deadline-aware scheduling of LLM calls.
+
+Every agent turn acquires one of ``capacity`` concurrent call slots from a
+``TurnScheduler`` before it reaches the API. Free slots go to the waiting
+turn with the best key:
+
+1. priority class (Critical, High, Medium, Low), with a turn promoted one
+   class once its request deadline is less than ``promote_within`` away;
+2. weighted fair share: the team, then the user, that has received the
+   least service relative to its weight;
+3. earliest request deadline, then arrival order.
+
+Batch work (background worker jobs) may never hold the last
+``batch_reserve`` slots, so interactive and Critical requests always find
+a slot quickly. Because conversations are checkpointed turn by turn, batch
+conversations are preempted at turn boundaries: once a batch turn
+finishes, its slot goes to higher-priority waiters first. In-flight calls
+are never aborted. A call abandoned at its deadline keeps its slot until it
+actually finishes (see ``TurnTicket.in_flight``), so the cap bounds real
+in-flight API calls, not only the ones a turn is still waiting for. A hedge
+runs inside its turn's slot.
+
+Queue-wait times are recorded per priority class; ``wait_stats`` returns
+them and ``wait_stats_frame`` exports them as a DataFrame.
+
+``TurnScheduler`` keeps its state in memory, for one process.
+``SharedTurnScheduler`` keeps the same state in SQLite next to the job
+queue, so the Streamlit app and every worker pool process draw from one
+pool of slots. The process-wide ``SCHEDULER`` is a ``SharedTurnScheduler``.
+"""
+
+import itertools
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+
+PRIORITY_CLASSES = ["Critical", "High", "Medium", "Low"]
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_CLASSES)}
+
+# Default time budget for a whole conversation, from submission, per priority class
+PRIORITY_DEADLINES = {"Critical": 120.0, "High": 600.0, "Medium": 1800.0, "Low": 7200.0}
+
+SCHEDULER_CAPACITY = int(os.getenv("ARCHITECTURE_LLM_CONCURRENCY", "8"))
+BATCH_RESERVE = int(os.getenv("ARCHITECTURE_BATCH_RESERVE", "1"))
+SCHEDULER_DB_PATH = os.getenv("ARCHITECTURE_SCHEDULER_DB", os.path.join(".jobs", "scheduler.sqlite3"))
+SLOT_LEASE_SECONDS = float(os.getenv("ARCHITECTURE_SLOT_LEASE_SECONDS", "30"))
+
+
+def parse_team_weights(spec: str) -> Dict[str, float]:
+    """Parse ``"platform=3,data=1"`` into a team weight mapping"""
+    weights = {}
+    for item in spec.split(","):
+        if "=" in item:
+            team, weight = item.split("=", 1)
+            weights[team.strip()] = float(weight)
+    return weights
+
+
+TEAM_WEIGHTS = parse_team_weights(os.getenv("ARCHITECTURE_TEAM_WEIGHTS", ""))
+
+
+def request_deadline(priority: str, submitted_at: Optional[float] = None) -> float:
+    """Absolute deadline (``time.time()`` based) for a request of the given priority"""
+    return (submitted_at or time.time()) + PRIORITY_DEADLINES.get(priority, PRIORITY_DEADLINES["Medium"])
+
+
+class TurnTicket:
+    """One pending or granted request for a call slot"""
+
+    __slots__ = ("seq", "priority", "user", "team", "deadline", "batch", "enqueued_at", "wait_seconds", "granted",
+                 "in_flight")
+
+    def __init__(self, seq: int, priority: str, user: str, team: str, deadline: float, batch: bool):
+        self.seq = seq
+        self.priority = priority
+        self.user = user
+        self.team = team
+        self.deadline = deadline
+        self.batch = batch
+        self.enqueued_at = time.perf_counter()
+        self.wait_seconds = 0.0
+        self.granted = False
+        # Calls made on this slot; the slot is released once the ``with`` body exits and all of them finish
+        self.in_flight: List[Future] = []
+
+
+def release_when_settled(ticket: TurnTicket, release: Callable[[], None]) -> None:
+    """Call ``release`` now, or once every call still running on the ticket's slot has finished"""
+    pending = [future for future in ticket.in_flight if not future.done()]
+    if not pending:
+        release()
+        return
+    remaining = [len(pending)]
+    lock = threading.Lock()
+
+    def settled(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            release()
+
+    for future in pending:
+        future.add_done_callback(settled)
+
+
+class TurnScheduler:
+    """Grant a fixed number of concurrent LLM call slots by priority, fair share and deadline"""
+
+    def __init__(self, capacity: int = SCHEDULER_CAPACITY, batch_reserve: int = BATCH_RESERVE,
+                 team_weights: Optional[Dict[str, float]] = None, promote_within: float = 60.0,
+                 window: int = 1000):
+        self.capacity = capacity
+        self.batch_reserve = min(batch_reserve, capacity - 1)
+        self.team_weights = TEAM_WEIGHTS if team_weights is None else team_weights
+        self.promote_within = promote_within
+        self._condition = threading.Condition()
+        self._waiting: List[TurnTicket] = []
+        self._in_use = 0
+        self._seq = itertools.count()
+        # Virtual service received, normalized by weight (start-time fair queueing)
+        self._team_service: Dict[str, float] = {}
+        self._user_service: Dict[str, float] = {}
+        self._waits: Dict[str, Deque[float]] = {priority: deque(maxlen=window) for priority in PRIORITY_CLASSES}
+        self._deadline_misses: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+
+    @contextmanager
+    def slot(self, priority: str = "Medium", user: str = "anonymous", team: str = "default",
+             deadline: Optional[float] = None, batch: bool = False) -> Iterator[TurnTicket]:
+        """Block until a call slot is granted, hold it for the ``with`` body, then release it"""
+        priority = priority if priority in PRIORITY_RANK else "Medium"
+        ticket = TurnTicket(
+            next(self._seq), priority, user, team,
+            deadline if deadline is not None else request_deadline(priority), batch
+        )
+        with self._condition:
+            self._join(ticket)
+            self._waiting.append(ticket)
+            try:
+                while not self._grantable(ticket):
+                    # Wake periodically so deadline promotion is re-evaluated
+                    self._condition.wait(timeout=1.0)
+            except BaseException:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+                raise
+            self._grant(ticket)
+        try:
+            yield ticket
+        finally:
+            release_when_settled(ticket, self._free_slot)
+
+    def _free_slot(self) -> None:
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify_all()
+
+    def _join(self, ticket: TurnTicket) -> None:
+        # Idle tenants rejoin at the current virtual time instead of cashing in banked credit
+        floor_team = min(self._team_service.values(), default=0.0)
+        floor_user = min(self._user_service.values(), default=0.0)
+        self._team_service[ticket.team] = max(self._team_service.get(ticket.team, floor_team), floor_team)
+        user_key = f"{ticket.team}/{ticket.user}"
+        self._user_service[user_key] = max(self._user_service.get(user_key, floor_user), floor_user)
+
+    def _key(self, ticket: TurnTicket, now: float, team_service: Optional[Dict[str, float]] = None,
+             user_service: Optional[Dict[str, float]] = None):
+        team_service = self._team_service if team_service is None else team_service
+        user_service = self._user_service if user_service is None else user_service
+        rank = PRIORITY_RANK[ticket.priority]
+        if rank > 0 and ticket.deadline - now < self.promote_within:
+            rank -= 1
+        return (
+            rank,
+            team_service.get(ticket.team, 0.0),
+            user_service.get(f"{ticket.team}/{ticket.user}", 0.0),
+            ticket.deadline,
+            ticket.seq,
+        )
+
+    def _eligible(self, ticket: TurnTicket, in_use: Optional[int] = None) -> bool:
+        limit = self.capacity - self.batch_reserve if ticket.batch else self.capacity
+        return (self._in_use if in_use is None else in_use) < limit
+
+    def _grantable(self, ticket: TurnTicket) -> bool:
+        if not self._eligible(ticket):
+            return False
+        now = time.time()
+        best = min((waiter for waiter in self._waiting if self._eligible(waiter)), key=lambda w: self._key(w, now))
+        return best is ticket
+
+    def _grant(self, ticket: TurnTicket) -> None:
+        self._waiting.remove(ticket)
+        self._in_use += 1
+        ticket.granted = True
+        ticket.wait_seconds = time.perf_counter() - ticket.enqueued_at
+        self._team_service[ticket.team] += 1.0 / self.team_weights.get(ticket.team, 1.0)
+        self._user_service[f"{ticket.team}/{ticket.user}"] += 1.0
+        self._waits[ticket.priority].append(ticket.wait_seconds)
+        if time.time() > ticket.deadline:
+            self._deadline_misses[ticket.priority] += 1
+        # Another waiter may be eligible for a remaining slot
+        self._condition.notify_all()
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Number of waiting turns per priority class"""
+        with self._condition:
+            depth = {priority: 0 for priority in PRIORITY_CLASSES}
+            for ticket in self._waiting:
+                depth[ticket.priority] += 1
+            return depth
+
+    def wait_stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue-wait count, mean, p50, p95 and max (seconds) plus deadline misses per priority class"""
+        with self._condition:
+            waits = {priority: sorted(samples) for priority, samples in self._waits.items()}
+            misses = dict(self._deadline_misses)
+        stats = {}
+        for priority in PRIORITY_CLASSES:
+            samples = waits[priority]
+            count = len(samples)
+            stats[priority] = {
+                "count": count,
+                "mean": sum(samples) / count if count else 0.0,
+                "p50": samples[int(0.50 * (count - 1))] if count else 0.0,
+                "p95": samples[int(0.95 * (count - 1))] if count else 0.0,
+                "max": samples[-1] if count else 0.0,
+                "deadline_misses": misses[priority],
+            }
+        return stats
+
+    def wait_stats_frame(self) -> pd.DataFrame:
+        """``wait_stats`` as a DataFrame indexed by priority class, for display and CSV export"""
+        frame = pd.DataFrame.from_dict(self.wait_stats(), orient="index")
+        frame.index.name = "priority"
+        return frame
+
+
+class SharedTurnScheduler(TurnScheduler):
+    """``TurnScheduler`` whose slots, waiting turns and fair-share state live in SQLite
+
+    Every process opening the same database shares ``capacity`` slots, so the
+    batch reserve, fair share and priority order hold between the UI and the
+    worker pool processes. Each ticket row is a lease that its process
+    refreshes every few seconds; rows of a crashed process expire after
+    ``lease_seconds`` and free their slots. A process grants only its own
+    tickets, and only when one of them is the best eligible ticket overall,
+    so a waiting interactive turn in one process holds back batch turns in
+    the others. Other processes notice freed slots by polling every
+    ``poll_interval`` seconds.
+    """
+
+    def __init__(self, path: str = SCHEDULER_DB_PATH, capacity: int = SCHEDULER_CAPACITY,
+                 batch_reserve: int = BATCH_RESERVE, team_weights: Optional[Dict[str, float]] = None,
+                 promote_within: float = 60.0, window: int = 1000, lease_seconds: float = SLOT_LEASE_SECONDS,
+                 poll_interval: float = 0.05):
+        super().__init__(capacity, batch_reserve, team_weights, promote_within, window)
+        self.path = path
+        self.window = window
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local: Dict[int, TurnTicket] = {}
+        self._dispatching = threading.Lock()
+        self._initialized = False
+        self._heartbeat: Optional[threading.Thread] = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._initialized:
+            self._initialize()
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level="IMMEDIATE")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize(self) -> None:
+        # Created on first use so importing the module never touches the disk
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS slot_tickets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    owner TEXT NOT NULL,
+                    priority TEXT NOT NULL,
+                    user TEXT NOT NULL,
+                    team TEXT NOT NULL,
+                    deadline REAL NOT NULL,
+                    batch INTEGER NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    granted_at REAL,
+                    heartbeat REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS slot_service (
+                    kind TEXT NOT NULL,
+                    tenant TEXT NOT NULL,
+                    service REAL NOT NULL,
+                    PRIMARY KEY (kind, tenant)
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS slot_waits (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    priority TEXT NOT NULL,
+                    wait_seconds REAL NOT NULL,
+                    missed INTEGER NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS slot_waits_priority ON slot_waits (priority, id)")
+        conn.close()
+        self._initialized = True
+
+    @contextmanager
+    def slot(self, priority: str = "Medium", user: str = "anonymous", team: str = "default",
+             deadline: Optional[float] = None, batch: bool = False) -> Iterator[TurnTicket]:
+        """Block until a shared call slot is granted, hold it for the ``with`` body, then release it"""
+        priority = priority if priority in PRIORITY_RANK else "Medium"
+        ticket = TurnTicket(0, priority, user, team,
+                            deadline if deadline is not None else request_deadline(priority), batch)
+        now = time.time()
+        with self._connect() as conn:
+            self._join_shared(conn, "team", team)
+            self._join_shared(conn, "user", f"{team}/{user}")
+            ticket.seq = conn.execute(
+                "INSERT INTO slot_tickets (owner, priority, user, team, deadline, batch, enqueued_at, heartbeat) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.owner, priority, user, team, ticket.deadline, int(batch), now, now)
+            ).lastrowid
+        with self._condition:
+            self._local[ticket.seq] = ticket
+        self._start_heartbeat()
+        try:
+            while True:
+                self._dispatch()
+                with self._condition:
+                    if not ticket.granted:
+                        # Woken early when a slot of this process frees up
+                        self._condition.wait(timeout=self.poll_interval)
+                    if ticket.granted:
+                        break
+        except BaseException:
+            self._release(ticket)
+            raise
+        try:
+            yield ticket
+        finally:
+            # The ticket keeps its lease until abandoned calls on the slot finish
+            release_when_settled(ticket, lambda: self._release(ticket))
+
+    @staticmethod
+    def _join_shared(conn: sqlite3.Connection, kind: str, tenant: str) -> None:
+        # Idle tenants rejoin at the current virtual time instead of cashing in banked credit
+        floor = conn.execute("SELECT COALESCE(MIN(service), 0) FROM slot_service WHERE kind = ?", (kind,)).fetchone()[0]
+        conn.execute(
+            "INSERT INTO slot_service (kind, tenant, service) VALUES (?, ?, ?) "
+            "ON CONFLICT (kind, tenant) DO UPDATE SET service = MAX(service, excluded.service)",
+            (kind, tenant, floor)
+        )
+
+    def _dispatch(self) -> None:
+        """Grant this process's tickets while one of them is the best eligible waiter"""
+        if not self._dispatching.acquire(blocking=False):
+            # Another thread of this process is dispatching and will wake us
+            return
+        try:
+            granted: List[Tuple[int, float]] = []
+            with self._connect() as conn:
+                now = time.time()
+                conn.execute("DELETE FROM slot_tickets WHERE heartbeat < ?", (now - self.lease_seconds,))
+                rows = conn.execute(
+                    "SELECT id, owner, priority, user, team, deadline, batch, enqueued_at, granted_at FROM slot_tickets"
+                ).fetchall()
+                in_use = sum(row[8] is not None for row in rows)
+                waiting = []
+                for seq, owner, priority, user, team, deadline, batch, enqueued_at, granted_at in rows:
+                    if granted_at is None:
+                        waiter = TurnTicket(seq, priority, user, team, deadline, bool(batch))
+                        waiting.append((waiter, owner, enqueued_at))
+                service = {"team": {}, "user": {}}
+                for kind, tenant, value in conn.execute("SELECT kind, tenant, service FROM slot_service"):
+                    service[kind][tenant] = value
+
+                while waiting:
+                    eligible = [entry for entry in waiting if self._eligible(entry[0], in_use)]
+                    if not eligible:
+                        break
+                    best = min(eligible, key=lambda entry: self._key(entry[0], now, service["team"], service["user"]))
+                    waiter, owner, enqueued_at = best
+                    if owner != self.owner:
+                        # The next slot belongs to another process's turn
+                        break
+                    waiting.remove(best)
+                    in_use += 1
+                    conn.execute("UPDATE slot_tickets SET granted_at = ? WHERE id = ?", (now, waiter.seq))
+                    team_share = 1.0 / self.team_weights.get(waiter.team, 1.0)
+                    service["team"][waiter.team] = service["team"].get(waiter.team, 0.0) + team_share
+                    user_key = f"{waiter.team}/{waiter.user}"
+                    service["user"][user_key] = service["user"].get(user_key, 0.0) + 1.0
+                    conn.execute("UPDATE slot_service SET service = service + ? WHERE kind = 'team' AND tenant = ?",
+                                 (team_share, waiter.team))
+                    conn.execute("UPDATE slot_service SET service = service + 1 WHERE kind = 'user' AND tenant = ?",
+                                 (user_key,))
+                    conn.execute(
+                        "INSERT INTO slot_waits (priority, wait_seconds, missed) VALUES (?, ?, ?)",
+                        (waiter.priority, now - enqueued_at, int(now > waiter.deadline))
+                    )
+                    granted.append((waiter.seq, now - enqueued_at))
+                if granted:
+                    conn.execute(
+                        "DELETE FROM slot_waits WHERE id <= (SELECT MAX(id) FROM slot_waits) - ?",
+                        (self.window * len(PRIORITY_CLASSES),)
+                    )
+        finally:
+            self._dispatching.release()
+        if granted:
+            with self._condition:
+                for seq, wait_seconds in granted:
+                    ticket = self._local.get(seq)
+                    if ticket is not None:
+                        ticket.granted = True
+                        ticket.wait_seconds = wait_seconds
+                self._condition.notify_all()
+
+    def _release(self, ticket: TurnTicket) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM slot_tickets WHERE id = ?", (ticket.seq,))
+        with self._condition:
+            self._local.pop(ticket.seq, None)
+            self._condition.notify_all()
+
+    def _start_heartbeat(self) -> None:
+        with self._condition:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._renew_leases, name="slot-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _renew_leases(self) -> None:
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            with self._condition:
+                seqs = list(self._local)
+            if seqs:
+                with self._connect() as conn:
+                    conn.executemany("UPDATE slot_tickets SET heartbeat = ? WHERE id = ?",
+                                     [(time.time(), seq) for seq in seqs])
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Number of waiting turns per priority class, across every process"""
+        depth = {priority: 0 for priority in PRIORITY_CLASSES}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT priority, COUNT(*) FROM slot_tickets WHERE granted_at IS NULL AND heartbeat >= ? "
+                "GROUP BY priority", (time.time() - self.lease_seconds,)
+            ).fetchall()
+        depth.update(rows)
+        return depth
+
+    def in_use(self) -> int:
+        """Slots currently held across every process"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM slot_tickets WHERE granted_at IS NOT NULL AND heartbeat >= ?",
+                (time.time() - self.lease_seconds,)
+            ).fetchone()[0]
+
+    def wait_stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue-wait statistics per priority class over the last ``window`` grants of every process"""
+        stats = {}
+        with self._connect() as conn:
+            for priority in PRIORITY_CLASSES:
+                rows = conn.execute(
+                    "SELECT wait_seconds, missed FROM slot_waits WHERE priority = ? ORDER BY id DESC LIMIT ?",
+                    (priority, self.window)
+                ).fetchall()
+                samples = sorted(wait for wait, _ in rows)
+                count = len(samples)
+                stats[priority] = {
+                    "count": count,
+                    "mean": sum(samples) / count if count else 0.0,
+                    "p50": samples[int(0.50 * (count - 1))] if count else 0.0,
+                    "p95": samples[int(0.95 * (count - 1))] if count else 0.0,
+                    "max": samples[-1] if count else 0.0,
+                    "deadline_misses": sum(missed for _, missed in rows),
+                }
+        return stats
+
+
+# Shared by every session and worker process so all turns compete for the same API capacity
+SCHEDULER = SharedTurnScheduler()
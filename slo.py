@@ -0,0 +1,300 @@
+"""
+SLO-driven load shedding and graceful degradation.
+
+``SLOController`` watches four pressure signals: how many turns are
+waiting for an LLM call slot, how many conversation jobs are waiting in
+the durable job queue, the p95 latency of recent turns against the
+latency SLO, and the share of recent calls that were rate limited. From
+them it picks one of ``DEGRADATION_LEVELS``:
+
+0. normal: the planned roster at full answer length;
+1. reduced panel: at most two specialists;
+2. short answers: two specialists with a lower ``max_tokens``;
+3. cached only: answer from a previous, similar conversation, no LLM calls;
+4. reject: refuse new requests with a retry-after estimate.
+
+Pressure moves the level up immediately. It only steps back down one
+level at a time, after the pressure has stayed low for ``cooldown_seconds``,
+so the level does not flap.
+
+``SLOController`` keeps its samples and level in memory, for one process.
+``SharedSLOController`` keeps them in SQLite, so the UI and every worker
+process see the same latency samples and apply the same level. The
+process-wide ``SLO_CONTROLLER`` is a ``SharedSLOController``.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Any, Optional, Tuple
+
+from patterns import tokenize
+from scheduler import SCHEDULER, TurnScheduler
+from worker_pool import DEFAULT_QUEUE_PATH, JobQueue
+
+
+LATENCY_SLO_SECONDS = float(os.getenv("ARCHITECTURE_LATENCY_SLO_SECONDS", "45"))
+QUEUE_DEPTH_SLO = int(os.getenv("ARCHITECTURE_QUEUE_DEPTH_SLO", "16"))
+JOB_BACKLOG_SLO = int(os.getenv("ARCHITECTURE_JOB_BACKLOG_SLO", "32"))
+SLO_DB_PATH = os.getenv("ARCHITECTURE_SLO_DB", os.path.join(".jobs", "slo.sqlite3"))
+SHED_COOLDOWN_SECONDS = float(os.getenv("ARCHITECTURE_SHED_COOLDOWN_SECONDS", "60"))
+SIMILAR_ANSWER_THRESHOLD = float(os.getenv("ARCHITECTURE_SIMILAR_ANSWER_THRESHOLD", "0.5"))
+
+DEGRADATION_LEVELS: List[Dict[str, Any]] = [
+    {"level": 0, "name": "normal", "label": "Normal", "max_specialists": None, "max_tokens": None, "llm": True},
+    {"level": 1, "name": "reduced_panel", "label": "Reduced panel", "max_specialists": 2, "max_tokens": None, "llm": True},
+    {"level": 2, "name": "short_answers", "label": "Short answers", "max_specialists": 2, "max_tokens": 800, "llm": True},
+    {"level": 3, "name": "cached_only", "label": "Cached answers only", "max_specialists": 0, "max_tokens": None, "llm": False},
+    {"level": 4, "name": "reject", "label": "Rejecting new requests", "max_specialists": 0, "max_tokens": None, "llm": False},
+]
+
+# Queued background jobs were already accepted: they are degraded at most this far, never shed
+MAX_QUEUED_LEVEL = 2
+
+# Pressure (1.0 = exactly at SLO) at which each level above normal engages
+LEVEL_THRESHOLDS = [1.0, 1.5, 2.5, 4.0]
+
+
+class ServiceOverloadedError(RuntimeError):
+    """Raised when a request is shed; ``retry_after`` is a suggested wait in seconds"""
+
+    def __init__(self, retry_after: float, reason: str = "The architecture team is at capacity"):
+        self.retry_after = retry_after
+        super().__init__(f"{reason}. Please retry in about {retry_after:.0f}s.")
+
+
+class SLOController:
+    """Pick a degradation level from queue depth, job backlog, recent turn latency and rate limiting"""
+
+    def __init__(self, scheduler: TurnScheduler = SCHEDULER, latency_slo: float = LATENCY_SLO_SECONDS,
+                 queue_depth_slo: int = QUEUE_DEPTH_SLO, cooldown_seconds: float = SHED_COOLDOWN_SECONDS,
+                 window: int = 50, window_seconds: float = 300.0, job_queue: Optional[JobQueue] = None,
+                 job_backlog_slo: int = JOB_BACKLOG_SLO):
+        self.scheduler = scheduler
+        self.latency_slo = latency_slo
+        self.queue_depth_slo = queue_depth_slo
+        self.cooldown_seconds = cooldown_seconds
+        self.window = window
+        self.window_seconds = window_seconds
+        # Queued conversation jobs count as pending work; None ignores the job queue
+        self.job_queue = job_queue
+        self.job_backlog_slo = job_backlog_slo
+        self._turns: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self._level = 0
+        self._calm_since: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record_turn(self, latency_seconds: float, rate_limited: bool = False) -> None:
+        """Feed one finished (or failed) LLM call into the latency and rate-limit signals"""
+        with self._lock:
+            self._turns.append((time.time(), latency_seconds, rate_limited))
+
+    def _recent_turns(self, cutoff: float) -> List[Tuple[float, bool]]:
+        with self._lock:
+            return [(latency, limited) for at, latency, limited in self._turns if at >= cutoff]
+
+    def signals(self) -> Dict[str, float]:
+        """Current raw signals and the combined pressure (1.0 = at SLO)"""
+        recent = self._recent_turns(time.time() - self.window_seconds)
+        latencies = sorted(latency for latency, _ in recent)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        rate_limited = sum(limited for _, limited in recent) / len(recent) if recent else 0.0
+        queue_depth = sum(self.scheduler.queue_depth().values())
+        queued_jobs = self.job_queue.stats().get("queued", 0) if self.job_queue is not None else 0
+        pressure = max(
+            p95 / self.latency_slo,
+            queue_depth / self.queue_depth_slo,
+            queued_jobs / self.job_backlog_slo,
+            # A quarter of calls being throttled counts as being at SLO
+            rate_limited * 4,
+        )
+        return {"queue_depth": queue_depth, "queued_jobs": queued_jobs, "p95_latency": p95,
+                "rate_limited": rate_limited, "pressure": pressure}
+
+    def _step(self, level: int, calm_since: Optional[float], target: int, now: float) -> Tuple[int, Optional[float]]:
+        """Next ``(level, calm_since)``: up at once, down one level per calm cooldown"""
+        if target >= level:
+            return target, None
+        if calm_since is None:
+            return level, now
+        if now - calm_since >= self.cooldown_seconds:
+            return level - 1, now
+        return level, calm_since
+
+    def _advance(self, target: int) -> int:
+        with self._lock:
+            self._level, self._calm_since = self._step(self._level, self._calm_since, target, time.time())
+            return self._level
+
+    def evaluate(self) -> Dict[str, Any]:
+        """The degradation level to apply to a new request, plus the signals behind it"""
+        signals = self.signals()
+        target = sum(signals["pressure"] >= threshold for threshold in LEVEL_THRESHOLDS)
+        level = dict(DEGRADATION_LEVELS[self._advance(target)])
+        level["signals"] = signals
+        level["retry_after"] = self.retry_after(signals)
+        return level
+
+    def retry_after(self, signals: Optional[Dict[str, float]] = None) -> float:
+        """Rough wait until the backlog drains: queued turns times p95 latency over capacity"""
+        signals = signals or self.signals()
+        per_turn = signals["p95_latency"] or self.latency_slo
+        backlog = signals["queue_depth"] * per_turn / max(self.scheduler.capacity, 1)
+        return max(self.cooldown_seconds, backlog)
+
+
+class SharedSLOController(SLOController):
+    """``SLOController`` whose turn samples and current level live in SQLite
+
+    The UI and every worker process record into and evaluate from the same
+    database, so they all see the same latency and rate-limit signals and
+    apply one degradation level with one cooldown.
+    """
+
+    def __init__(self, path: str = SLO_DB_PATH, job_queue_path: Optional[str] = None, **options):
+        super().__init__(**options)
+        self.path = path
+        self.job_queue_path = job_queue_path
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._initialized:
+            self._initialize()
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level="IMMEDIATE")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize(self) -> None:
+        # Created on first use so importing the module never touches the disk
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS slo_turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    at REAL NOT NULL,
+                    latency REAL NOT NULL,
+                    rate_limited INTEGER NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS slo_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    level INTEGER NOT NULL,
+                    calm_since REAL
+                )"""
+            )
+            conn.execute("INSERT OR IGNORE INTO slo_state (id, level, calm_since) VALUES (1, 0, NULL)")
+        conn.close()
+        if self.job_queue is None and self.job_queue_path:
+            self.job_queue = JobQueue(self.job_queue_path)
+        self._initialized = True
+
+    def record_turn(self, latency_seconds: float, rate_limited: bool = False) -> None:
+        """Feed one finished (or failed) LLM call into the shared latency and rate-limit signals"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO slo_turns (at, latency, rate_limited) VALUES (?, ?, ?)",
+                         (now, latency_seconds, int(rate_limited)))
+            conn.execute(
+                "DELETE FROM slo_turns WHERE at < ? OR id <= (SELECT MAX(id) FROM slo_turns) - ?",
+                (now - self.window_seconds, self.window)
+            )
+
+    def _recent_turns(self, cutoff: float) -> List[Tuple[float, bool]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT latency, rate_limited FROM slo_turns WHERE at >= ? ORDER BY id DESC LIMIT ?",
+                (cutoff, self.window)
+            ).fetchall()
+        return [(latency, bool(limited)) for latency, limited in rows]
+
+    def _advance(self, target: int) -> int:
+        while True:
+            with self._connect() as conn:
+                current = conn.execute("SELECT level, calm_since FROM slo_state WHERE id = 1").fetchone()
+                level, calm_since = self._step(*current, target, time.time())
+                # Only apply the step to the state it was computed from; another process may have moved it
+                updated = conn.execute(
+                    "UPDATE slo_state SET level = ?, calm_since = ? WHERE id = 1 AND level = ? AND calm_since IS ?",
+                    (level, calm_since, *current)
+                ).rowcount
+            if updated:
+                return level
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception from an LLM call means we were throttled (HTTP 429 or overloaded)"""
+    status = getattr(error, "status_code", None)
+    return status in (429, 529) or "RateLimit" in type(error).__name__ or "overloaded" in str(error).lower()
+
+
+_REQUEST_LINE = re.compile(r"\*\*Architecture Request:\*\*\s*(.+)")
+_CATEGORIES_LINE = re.compile(r"\*\*Categories:\*\*\s*(.+)")
+
+
+class SimilarAnswerCache:
+    """Find a completed conversation for a similar request, for the cached-only level
+
+    Completed transcripts come from the checkpoint store. Requests are
+    compared by token-set (Jaccard) similarity over the request text and
+    categories. The candidate list is refreshed at most once per ``refresh_seconds``.
+    """
+
+    def __init__(self, store=None, max_entries: int = 500, threshold: float = SIMILAR_ANSWER_THRESHOLD,
+                 refresh_seconds: float = 60.0):
+        self.store = store
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.refresh_seconds = refresh_seconds
+        self._entries: List[Tuple[frozenset, str]] = []
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        if self.store is None:
+            from checkpoints import ConversationCheckpointStore
+            self.store = ConversationCheckpointStore()
+        entries = []
+        for conversation_id, opening in self.store.completed_openings(self.max_entries):
+            request = _REQUEST_LINE.search(opening)
+            if request is None:
+                continue
+            categories = _CATEGORIES_LINE.search(opening)
+            text = request.group(1) + " " + (categories.group(1) if categories else "")
+            entries.append((frozenset(tokenize(text)), conversation_id))
+        self._entries = entries
+        self._loaded_at = time.time()
+
+    def lookup(self, user_request: str, categories: List[str]) -> Optional[Tuple[List[Dict], float]]:
+        """Transcript and similarity of the closest previous conversation, or None below the threshold"""
+        query = frozenset(tokenize(user_request + " " + " ".join(categories)))
+        if not query:
+            return None
+        with self._lock:
+            if time.time() - self._loaded_at > self.refresh_seconds:
+                self._refresh()
+            best_id, best_score = None, 0.0
+            for tokens, conversation_id in self._entries:
+                score = len(query & tokens) / len(query | tokens)
+                if score > best_score:
+                    best_id, best_score = conversation_id, score
+        if best_id is None or best_score < self.threshold:
+            return None
+        messages, _ = self.store.load(best_id)
+        return (messages, best_score) if messages else None
+
+
+# Shared by every session and worker process, like the scheduler it watches
+SLO_CONTROLLER = SharedSLOController(job_queue_path=DEFAULT_QUEUE_PATH)
+ANSWER_CACHE = SimilarAnswerCache()
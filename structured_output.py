@@ -0,0 +1,119 @@
+"""
+Structured output mode for the specialist agents.
+
+When enabled, each specialist ends its answer with a fenced ``json`` block
+that follows ``STRUCTURED_OUTPUT_SCHEMA``. The report pipeline then reads
+recommendations, risks, costs, insights and components by direct field
+access and only falls back to the text heuristics for answers without a
+valid block. The Message Batches runner calls the Messages API directly,
+so it sends the same schema as the ``ARCHITECTURE_ADVICE_TOOL`` tool
+instead and stores the tool call's input as the same fenced block.
+
+Parsed blocks are cached by content; every caller gets its own copy.
+"""
+
+import copy
+import json
+import re
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+
+
+COMPONENT_CATEGORIES = [
+    "cloud_services", "databases", "apis", "microservices",
+    "storage", "security", "monitoring", "user_interfaces"
+]
+
+STRUCTURED_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "recommendations": {"type": "array", "items": {"type": "string"}, "maxItems": 10},
+        "risks": {"type": "array", "items": {"type": "string"}},
+        "costs": {"type": "array", "items": {"type": "string"}},
+        "insights": {"type": "array", "items": {"type": "string"}},
+        "components": {
+            "type": "object",
+            "properties": {category: {"type": "array", "items": {"type": "string"}} for category in COMPONENT_CATEGORIES},
+            "additionalProperties": False,
+        },
+    },
+    "required": ["recommendations", "risks", "costs", "components"],
+}
+
+ARCHITECTURE_ADVICE_TOOL: Dict[str, Any] = {
+    "name": "submit_architecture_advice",
+    "description": "Submit the structured summary of your architectural recommendations.",
+    "input_schema": STRUCTURED_OUTPUT_SCHEMA,
+}
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = f"""
+
+After your answer, append a summary as a fenced ```json code block matching this JSON schema:
+{json.dumps(STRUCTURED_OUTPUT_SCHEMA)}
+Keep each list item to one short sentence. Use an empty list when a field does not apply."""
+
+TOOL_OUTPUT_INSTRUCTIONS = f"""
+
+After your answer, call the {ARCHITECTURE_ADVICE_TOOL["name"]} tool once with a summary of it.
+Keep each list item to one short sentence. Use an empty list when a field does not apply."""
+
+_JSON_BLOCK = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def _string_list(value: Any) -> Optional[List[str]]:
+    if not isinstance(value, list):
+        return None
+    return [item.strip() for item in value if isinstance(item, str) and item.strip()]
+
+
+def parse_structured_response(content: str) -> Optional[Dict[str, Any]]:
+    """Return the validated structured block of an answer, or None to fall back to heuristics
+
+    Results are cached by content, so the several report sections built from
+    the same transcript parse each answer only once. The caller owns the
+    returned dict.
+    """
+    structured = _parse_structured(content)
+    return copy.deepcopy(structured) if structured is not None else None
+
+
+@lru_cache(maxsize=1024)
+def _parse_structured(content: str) -> Optional[Dict[str, Any]]:
+    matches = _JSON_BLOCK.findall(content or "")
+    if not matches:
+        return None
+    try:
+        data = json.loads(matches[-1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    structured = {}
+    for field in ("recommendations", "risks", "costs", "insights"):
+        structured[field] = _string_list(data.get(field, []))
+        if structured[field] is None:
+            return None
+
+    components = data.get("components", {})
+    if not isinstance(components, dict):
+        return None
+    structured["components"] = {
+        category: _string_list(components.get(category, [])) or []
+        for category in COMPONENT_CATEGORIES
+    }
+    return structured
+
+
+# Lets benchmarks start from a cold cache
+parse_structured_response.cache_clear = _parse_structured.cache_clear
+
+
+def structured_block(summary: Dict[str, Any]) -> str:
+    """A structured summary as the fenced ``json`` block text mode appends to an answer"""
+    return f"```json\n{json.dumps(summary)}\n```"
+
+
+def strip_structured_block(content: str) -> str:
+    """Answer text without the trailing JSON summary, for display"""
+    return _JSON_BLOCK.sub("", content or "").rstrip()
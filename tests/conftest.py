@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_slo_controller(tmp_path, monkeypatch):
+    """Keep the process-wide SLO controller's shared state in each test's own directory"""
+    import slo
+    from scheduler import TurnScheduler
+
+    controller = slo.SharedSLOController(str(tmp_path / "slo.sqlite3"), scheduler=TurnScheduler())
+    monkeypatch.setattr(slo, "SLO_CONTROLLER", controller)
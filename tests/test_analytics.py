@@ -0,0 +1,42 @@
+import pandas as pd
+
+from analytics import RISK_KEYWORDS, ReportAnalytics
+
+
+def make_report(timestamp, risks, priority="Medium"):
+    return {
+        "metadata": {"timestamp": timestamp, "priority": priority, "categories": ["Security"], "user_request": "r"},
+        "agent_summaries": {"CloudArchitect": {"count": 1, "recommendations": ["Use a CDN"]}},
+        "risk_assessment": risks,
+        "components": {"databases": ["PostgreSQL"]},
+    }
+
+
+def test_risk_keyword_trends_counts_keywords_per_period():
+    analytics = ReportAnalytics.from_reports([
+        make_report("2024-01-01 10:00:00", ["The main risk is lock-in", "A scaling problem"]),
+        make_report("2024-01-02 10:00:00", ["One concern about cost"]),
+    ])
+    trends = analytics.risk_keyword_trends(freq="D")
+    assert list(trends.columns) == RISK_KEYWORDS
+    assert trends.loc["2024-01-01", "risk"] == 1
+    assert trends.loc["2024-01-01", "problem"] == 1
+    assert trends.loc["2024-01-02", "concern"] == 1
+
+
+def test_risk_keyword_trends_on_empty_collection():
+    trends = ReportAnalytics.from_reports([]).risk_keyword_trends()
+    assert trends.empty
+    assert list(trends.columns) == RISK_KEYWORDS
+    assert isinstance(trends.index, pd.DatetimeIndex)
+
+
+def test_risk_keyword_trends_without_timestamps():
+    analytics = ReportAnalytics.from_reports([make_report(None, ["A risk"]), make_report("not a date", ["An issue"])])
+    assert analytics.risk_keyword_trends().empty
+
+
+def test_risk_keyword_trends_skips_undated_reports():
+    analytics = ReportAnalytics.from_reports([make_report(None, ["A risk"]), make_report("2024-01-01", ["A risk"])])
+    trends = analytics.risk_keyword_trends()
+    assert trends["risk"].sum() == 1
@@ -0,0 +1,40 @@
+import json
+
+from app import build_report, format_request
+from patterns import default_index, grounding_context
+
+
+REQUEST = "Serverless event-driven order platform on Kubernetes with Kafka, cost and risk trade-offs"
+
+ANSWERS = {
+    "CloudArchitect": "We recommend managed Kafka on AWS for the order events. "
+                      "The main risk is consumer lag during flash sales.",
+    "LeadArchitect": "We recommend PostgreSQL with read replicas for orders. "
+                     "Reserved capacity keeps the monthly cost predictable.",
+}
+
+
+def grounded_transcript():
+    pattern_context, pattern_ids = grounding_context(REQUEST, ["Scalability"])
+    assert pattern_ids, "the catalog should match this request"
+    opening = format_request(REQUEST, ["Scalability"], "High", pattern_context)
+    messages = [{"content": opening, "role": "user", "name": "BusinessUser"}]
+    messages += [{"content": answer, "role": "user", "name": name} for name, answer in ANSWERS.items()]
+    return messages, pattern_ids
+
+
+def test_grounded_report_contains_no_catalog_text():
+    messages, pattern_ids = grounded_transcript()
+    _, report = build_report(messages, REQUEST, ["Scalability"], "High")
+    sections = {key: value for key, value in report.items() if key != "metadata"}
+    text = json.dumps(sections)
+
+    patterns = {pattern["id"]: pattern for pattern in default_index().patterns}
+    for pattern_id in pattern_ids:
+        assert pattern_id not in text
+        assert patterns[pattern_id]["trade_offs"][:40] not in text
+    assert "Trade-offs" not in text
+    assert "Reference Patterns" not in text
+    assert "Architecture Request" not in text
+    assert report["risk_assessment"] == ["The main risk is consumer lag during flash sales"]
+    assert report["cost_considerations"] == ["Reserved capacity keeps the monthly cost predictable"]
@@ -0,0 +1,85 @@
+import sys
+
+import pytest
+
+import batch_runner
+from batch_runner import BatchConversationRunner, LocalBatchClient
+from checkpoints import ConversationCheckpointStore
+from structured_output import ARCHITECTURE_ADVICE_TOOL, parse_structured_response
+from worker_pool import JobQueue
+
+
+def run_batch(tmp_path, monkeypatch, request):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "local")
+    monkeypatch.chdir(tmp_path)
+    client = LocalBatchClient()
+    sent = []
+    create = client.messages.batches.create
+    client.messages.batches.create = lambda requests: sent.extend(requests) or create(requests=requests)
+    runner = BatchConversationRunner(client=client, store=ConversationCheckpointStore(str(tmp_path / "c.sqlite3")),
+                                     poll_interval=0)
+    return runner.run([request]), sent
+
+
+def test_structured_request_uses_the_advice_tool(tmp_path, monkeypatch):
+    request = {"user_request": "Event-driven order platform on AWS", "categories": [], "urgency": "Low",
+               "structured_output": True, "ground_patterns": False}
+    (conversation,), sent = run_batch(tmp_path, monkeypatch, request)
+
+    assert conversation.error is None
+    assert all(entry["params"]["tools"] == [ARCHITECTURE_ADVICE_TOOL] for entry in sent)
+    assert all(entry["params"]["tool_choice"] == {"type": "auto"} for entry in sent)
+    # The tool input is stored as the fenced block the report pipeline reads
+    for msg in conversation.messages[1:]:
+        structured = parse_structured_response(msg["content"])
+        assert structured["recommendations"][0].startswith("We recommend an API gateway")
+        assert structured["components"]["databases"] == ["PostgreSQL with read replicas"]
+
+
+def test_plain_request_sends_no_tools(tmp_path, monkeypatch):
+    request = {"user_request": "Event-driven order platform on AWS", "categories": [], "urgency": "Low",
+               "ground_patterns": False}
+    (conversation,), sent = run_batch(tmp_path, monkeypatch, request)
+    assert conversation.error is None
+    assert not any("tools" in entry["params"] for entry in sent)
+    assert all(parse_structured_response(msg["content"]) is None for msg in conversation.messages[1:])
+
+
+def test_queued_degradation_caps_batch_output(tmp_path, monkeypatch):
+    request = {"user_request": "Event-driven order platform on AWS", "categories": [], "urgency": "Low",
+               "ground_patterns": False, "force_full_panel": True, "degradation_level": 2}
+    (conversation,), sent = run_batch(tmp_path, monkeypatch, request)
+
+    assert conversation.degradation["name"] == "short_answers"
+    assert {entry["params"]["max_tokens"] for entry in sent} == {800}
+    assert len(conversation.roster_plan["specialists"]) <= 2
+
+
+def test_full_output_without_degradation(tmp_path, monkeypatch):
+    request = {"user_request": "Event-driven order platform on AWS", "categories": [], "urgency": "Low",
+               "ground_patterns": False}
+    (conversation,), sent = run_batch(tmp_path, monkeypatch, request)
+    assert conversation.degradation["level"] == 0
+    assert {entry["params"]["max_tokens"] for entry in sent} == {2000}
+
+
+def test_claimed_jobs_fail_when_the_run_raises(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "local")
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "queue.sqlite3")
+    queue = JobQueue(path)
+    job_ids = [queue.enqueue({"user_request": "Order platform", "categories": [], "urgency": "Low"}, priority="Low")
+               for _ in range(2)]
+
+    def broken_run(self, requests):
+        raise RuntimeError("batch API unavailable")
+
+    monkeypatch.setattr(BatchConversationRunner, "run", broken_run)
+    monkeypatch.setattr(sys, "argv", ["batch_runner.py", "--from-queue", "--local", "--queue", path])
+    with pytest.raises(RuntimeError):
+        batch_runner.main()
+
+    for job_id in job_ids:
+        job = queue.get(job_id)
+        assert job["status"] == "failed"
+        assert "batch API unavailable" in job["error"]
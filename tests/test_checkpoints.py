@@ -0,0 +1,78 @@
+import sqlite3
+import time
+
+from checkpoints import ConversationCheckpointStore
+
+
+def opening(text="Design a payments platform"):
+    return [{"content": text, "role": "user", "name": "BusinessUser"}]
+
+
+def test_sessions_sending_the_same_request_do_not_share_checkpoints(tmp_path):
+    store = ConversationCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    request = opening()[0]["content"]
+    first = store.conversation_id(request, "session-a")
+    second = store.conversation_id(request, "session-b")
+    assert first != second
+    assert store.conversation_id(request, "session-a") == first
+
+    store.start(first, opening())
+    assert store.append(first, 1, {"content": "Use Kafka", "role": "user", "name": "CloudArchitect"})
+    # Starting the other session's run must not reset the first one
+    store.start(second, opening())
+    messages, completed = store.load(first)
+    assert len(messages) == 2 and not completed
+    assert store.load(second)[0] == opening()
+
+
+def test_unscoped_runs_never_resume_each_other():
+    request = opening()[0]["content"]
+    assert ConversationCheckpointStore.conversation_id(request) != ConversationCheckpointStore.conversation_id(request)
+
+
+def test_request_hash_is_stored_as_a_lookup_hint(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    store = ConversationCheckpointStore(path)
+    request = opening()[0]["content"]
+    store.start(store.conversation_id(request, "job:1"), opening())
+    with sqlite3.connect(path) as conn:
+        hashes = [row[0] for row in conn.execute("SELECT request_hash FROM conversations")]
+    assert hashes == [store.request_hash(request)]
+
+
+def test_expired_checkpoints_are_pruned(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    store = ConversationCheckpointStore(path, ttl_seconds=60)
+    old, fresh = store.conversation_id("old", "s"), store.conversation_id("fresh", "s")
+    store.start(old, opening("old"))
+    store.complete(old)
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE conversations SET updated_at = ?", (time.time() - 120,))
+    store.start(fresh, opening("fresh"))
+    store.complete(fresh)
+    assert store.load(old) == (None, False)
+    assert store.load(fresh)[1] is True
+
+
+def test_append_loses_to_a_turn_saved_after_its_read(tmp_path, monkeypatch):
+    import checkpoints
+
+    path = str(tmp_path / "checkpoints.sqlite3")
+    store, hedge = ConversationCheckpointStore(path), ConversationCheckpointStore(path)
+    store.start("conv", opening())
+    real_loads = checkpoints.json.loads
+    raced = []
+
+    def loads_then_race(text):
+        # The hedge saves its reply between this append's read and its write
+        if not raced:
+            raced.append(None)
+            raced[0] = hedge.append("conv", 1, {"content": "hedge", "role": "user", "name": "CloudArchitect"})
+        return real_loads(text)
+
+    monkeypatch.setattr(checkpoints.json, "loads", loads_then_race)
+    assert not store.append("conv", 1, {"content": "primary", "role": "user", "name": "CloudArchitect"})
+    monkeypatch.setattr(checkpoints.json, "loads", real_loads)
+    assert raced == [True]
+    messages, _ = store.load("conv")
+    assert [msg["content"] for msg in messages[1:]] == ["hedge"]
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import compaction
+from compaction import ContextCompactor, build_compactor, estimate_tokens
+
+
+def answer(name, points=3, filler=400):
+    lines = [f"{i}. {name} recommends option {i}" for i in range(1, points + 1)]
+    return "\n".join(lines) + "\n" + "Supporting detail. " * filler
+
+
+def transcript(*names):
+    return [{"content": "Design a payments platform. " * 200, "role": "user", "name": "BusinessUser"}] + [
+        {"content": answer(name), "role": "user", "name": name} for name in names
+    ]
+
+
+class CountingExtractor:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, content):
+        self.calls += 1
+        return [line for line in content.splitlines() if line[:1].isdigit()]
+
+
+def tokens(messages):
+    return sum(estimate_tokens(msg["content"]) for msg in messages)
+
+
+def test_oldest_answers_are_compacted_first():
+    messages = transcript("CloudArchitect", "SecurityArchitect", "DataArchitect")
+    full = tokens(messages)
+    # Room for everything except about one answer
+    budget = full - estimate_tokens(messages[1]["content"]) + 100
+    view = ContextCompactor(CountingExtractor(), token_budget=budget, keep_recent=1).compact(messages)
+    assert view[1]["content"].startswith("[Key points from CloudArchitect's earlier answer]")
+    assert view[2]["content"] == messages[2]["content"]
+    assert view[3]["content"] == messages[3]["content"]
+    assert tokens(view) <= budget
+    # The stored transcript is not modified
+    assert messages[1]["content"] == answer("CloudArchitect")
+
+
+def test_recent_answers_and_opening_stay_verbatim():
+    messages = transcript("CloudArchitect", "SecurityArchitect", "DataArchitect")
+    view = ContextCompactor(CountingExtractor(), token_budget=10, keep_recent=2).compact(messages)
+    assert view[0] == messages[0]
+    assert view[1]["content"].startswith("[Key points from CloudArchitect")
+    assert view[2:] == messages[2:]
+
+
+def test_repeated_view_hits_the_cache():
+    extractor = CountingExtractor()
+    compactor = ContextCompactor(extractor, token_budget=10, keep_recent=1)
+    messages = transcript("CloudArchitect", "SecurityArchitect", "DataArchitect")
+    first = compactor.compact(messages[:3])
+    assert extractor.calls == 1
+    # The next speaker's view repeats the earlier answers; each is extracted once
+    second = compactor.compact(messages)
+    assert extractor.calls == 2
+    assert second[1] == first[1]
+
+
+def test_model_summarizer_is_used_when_configured(monkeypatch):
+    requests = []
+
+    def create(**params):
+        requests.append(params)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="- Use Kafka")])
+
+    client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    make_summarizer = compaction.make_anthropic_summarizer
+    monkeypatch.setattr(compaction, "make_anthropic_summarizer", lambda model: make_summarizer(model, client=client))
+    monkeypatch.setattr(compaction, "COMPACTION_MODEL", "cheap-model")
+    extractor = CountingExtractor()
+    view = build_compactor(extractor, token_budget=10).compact(transcript("CloudArchitect", "SecurityArchitect"))
+
+    assert view[1]["content"] == "[Key points from CloudArchitect's earlier answer]\n- Use Kafka"
+    assert [params["model"] for params in requests] == ["cheap-model"]
+    assert extractor.calls == 0
+
+
+def test_local_key_points_without_a_model(monkeypatch):
+    monkeypatch.setattr(compaction, "COMPACTION_MODEL", "")
+    compactor = build_compactor(CountingExtractor(), token_budget=10)
+    assert compactor.summarizer is None
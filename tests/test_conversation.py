@@ -0,0 +1,78 @@
+import json
+
+from conversation import speaker_view
+from structured_output import parse_structured_response
+
+
+SUMMARY = {"recommendations": ["Use Kafka"], "risks": [], "costs": [], "components": {"databases": ["PostgreSQL"]}}
+ANSWER = "We recommend Kafka for the event backbone.\n\n```json\n" + json.dumps(SUMMARY) + "\n```"
+
+
+def test_speaker_view_drops_other_speakers_structured_blocks():
+    messages = [
+        {"content": "Design a payments platform", "role": "user", "name": "BusinessUser"},
+        {"content": ANSWER, "role": "user", "name": "CloudArchitect"},
+    ]
+    view = speaker_view("LeadArchitect", messages)
+    assert view[1]["content"] == "We recommend Kafka for the event backbone."
+    assert view[1]["role"] == "user"
+    # The stored transcript keeps the block for the report pipeline
+    assert parse_structured_response(messages[1]["content"])["components"]["databases"] == ["PostgreSQL"]
+
+
+def test_speaker_view_keeps_own_turns_verbatim():
+    messages = [{"content": ANSWER, "role": "user", "name": "CloudArchitect"}]
+    view = speaker_view("CloudArchitect", messages)
+    assert view == [{"content": ANSWER, "role": "assistant", "name": "CloudArchitect"}]
+
+
+class StubAgent:
+    """Agent that answers from a script; ``None`` entries decline to reply"""
+
+    def __init__(self, name, replies=None):
+        self.name = name
+        self.replies = list(replies or [])
+        self.calls = 0
+
+    def generate_reply(self, messages=None, sender=None):
+        self.calls += 1
+        return self.replies.pop(0) if self.replies else f"{self.name} answer"
+
+
+def stub_runner(tmp_path, agents):
+    from types import SimpleNamespace
+
+    from checkpoints import ConversationCheckpointStore
+    from conversation import ConversationRunner
+    from hedging import HedgedCaller, LatencyTracker
+    from scheduler import TurnScheduler
+    from slo import SLOController
+
+    scheduler = TurnScheduler(capacity=2, batch_reserve=0)
+    group_chat = SimpleNamespace(agents=agents, max_round=len(agents), messages=[])
+    return ConversationRunner(
+        None, group_chat, store=ConversationCheckpointStore(str(tmp_path / "checkpoints.sqlite3")),
+        max_retries=0, retry_backoff=0, caller=HedgedCaller(LatencyTracker(), hedge=False),
+        scheduler=scheduler, slo=SLOController(scheduler)
+    )
+
+
+def test_run_stopped_mid_panel_resumes_at_missing_speaker(tmp_path):
+    import pytest
+
+    from conversation import TurnFailedError
+
+    user = StubAgent("BusinessUser")
+    cloud, security, lead = StubAgent("CloudArchitect"), StubAgent("SecurityArchitect", [None]), StubAgent("LeadArchitect")
+    agents = [user, cloud, security, lead]
+
+    with pytest.raises(TurnFailedError) as failure:
+        stub_runner(tmp_path, agents).run(user, "Design a payments platform", scope="session")
+    assert failure.value.speaker_name == "SecurityArchitect"
+    assert failure.value.completed_turns == 1
+
+    runner = stub_runner(tmp_path, agents)
+    messages = runner.run(user, "Design a payments platform", scope="session")
+    assert runner.resumed_turns == 1
+    assert [msg["name"] for msg in messages] == ["BusinessUser", "CloudArchitect", "SecurityArchitect", "LeadArchitect"]
+    assert (cloud.calls, security.calls, lead.calls) == (1, 2, 1)
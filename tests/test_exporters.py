@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from analytics import TABLES, ReportAnalytics
+from exporters import EXPORTERS, ParquetReportWriter, report_schemas
+
+pytest.importorskip("pyarrow", exc_type=ImportError)
+
+
+def make_report(index, timestamp="2024-01-01 10:00:00", priority="High"):
+    return {
+        "metadata": {
+            "report_id": f"report-{index}",
+            "timestamp": timestamp,
+            "user_request": f"Design service {index}",
+            "categories": ["Security", "Scalability"],
+            "priority": priority,
+            "total_agents": 1,
+            "total_recommendations": 2,
+        },
+        "agent_summaries": {
+            "CloudArchitect": {
+                "role": "Cloud Architect", "focus_area": "Cloud", "count": 2,
+                "recommendations": ["Use a CDN", "Autoscale the API tier"],
+            },
+        },
+        "risk_assessment": [f"Vendor lock-in risk {index}"],
+        "components": {"databases": ["PostgreSQL"], "caches": ["Redis", "CDN"]},
+    }
+
+
+def assert_same_tables(loaded, expected):
+    for name, schema in report_schemas().items():
+        assert list(getattr(loaded, name).columns) == schema.names
+        pd.testing.assert_frame_equal(
+            getattr(loaded, name).reset_index(drop=True),
+            getattr(expected, name)[schema.names].reset_index(drop=True),
+            check_dtype=False, check_categorical=False,
+        )
+
+
+def test_parquet_writer_output_loads_into_analytics(tmp_path):
+    reports = [make_report(i) for i in range(3)] + [make_report(3, timestamp=None, priority=None)]
+    with ParquetReportWriter(str(tmp_path), batch_size=2) as writer:
+        for report in reports:
+            writer.write(report)
+
+    loaded = ReportAnalytics.from_parquet(str(tmp_path))
+    expected = ReportAnalytics.from_reports(reports)
+    assert_same_tables(loaded, expected)
+    pd.testing.assert_frame_equal(loaded.recommendation_counts(), expected.recommendation_counts())
+    pd.testing.assert_frame_equal(loaded.component_frequency(), expected.component_frequency())
+
+
+def test_analytics_parquet_round_trip_uses_exporter_schema(tmp_path):
+    expected = ReportAnalytics.from_reports([make_report(i) for i in range(3)])
+    expected.to_parquet(str(tmp_path))
+
+    import pyarrow.parquet as pq
+    for name, schema in report_schemas().items():
+        # Parquet has no second resolution, so only the timestamp unit may differ
+        assert pq.read_schema(tmp_path / f"{name}.parquet").names == schema.names
+    assert_same_tables(ReportAnalytics.from_parquet(str(tmp_path)), expected)
+
+
+def test_parquet_export_zip_loads_into_analytics(tmp_path):
+    archive = tmp_path / "tables.zip"
+    archive.write_bytes(EXPORTERS["parquet"].export(make_report(0), pd.DataFrame()))
+    loaded = ReportAnalytics.from_parquet(str(archive))
+    assert sorted(TABLES) == sorted(report_schemas())
+    assert loaded.reports["report_id"].tolist() == ["report-0"]
+    assert loaded.risks["text"].tolist() == ["Vendor lock-in risk 0"]
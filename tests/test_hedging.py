@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hedging import HedgedCaller, LatencyTracker, MockLLMBackend
+from test_conversation import StubAgent, stub_runner
+
+
+def scripted_latency(*delays):
+    """Latency distribution that returns ``delays`` in order, one per call"""
+    remaining = list(delays)
+    return lambda rng: remaining.pop(0)
+
+
+def tracker_with(seconds, samples=20):
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(samples):
+        tracker.record("CloudArchitect", seconds)
+    return tracker
+
+
+@pytest.mark.parametrize("p95, floor", [(0.3, 0.05), (0.05, 0.3)])
+def test_hedge_fires_after_p95_or_floor_and_first_reply_wins(p95, floor):
+    backend = MockLLMBackend(scripted_latency(5.0, 0.01))
+    caller = HedgedCaller(tracker_with(p95), ThreadPoolExecutor(max_workers=2), hedge=True, min_hedge_delay=floor)
+    assert caller.hedge_delay("CloudArchitect") == max(p95, floor)
+
+    started = time.perf_counter()
+    reply = caller.call("CloudArchitect", lambda cancel: backend.complete("design", cancel), deadline=10)
+    elapsed = time.perf_counter() - started
+
+    assert reply == "mock reply to: design"
+    assert max(p95, floor) <= elapsed < max(p95, floor) + 1.0
+    assert (caller.hedges_fired, caller.hedges_won, backend.calls) == (1, 1, 2)
+    # The slow primary observes the cancellation instead of running to completion
+    time.sleep(0.1)
+    assert backend.cancelled == 1
+
+
+def test_no_hedge_without_latency_history():
+    backend = MockLLMBackend(scripted_latency(0.2))
+    caller = HedgedCaller(LatencyTracker(min_samples=5), ThreadPoolExecutor(max_workers=2), hedge=True, min_hedge_delay=0.01)
+    assert caller.call("CloudArchitect", lambda cancel: backend.complete("design", cancel), deadline=10)
+    assert (caller.hedges_fired, backend.calls) == (0, 1)
+
+
+def test_timeout_at_deadline():
+    backend = MockLLMBackend(scripted_latency(5.0))
+    caller = HedgedCaller(LatencyTracker(), ThreadPoolExecutor(max_workers=2), hedge=False)
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        caller.call("CloudArchitect", lambda cancel: backend.complete("design", cancel), deadline=0.2)
+    assert 0.2 <= time.perf_counter() - started < 1.0
+    time.sleep(0.1)
+    assert backend.cancelled == 1
+
+
+class SlowThenFastAgent(StubAgent):
+    """First call ignores cancellation and answers late, like an in-flight HTTP request"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.primary_finished = threading.Event()
+
+    def generate_reply(self, messages=None, sender=None):
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(0.5)
+            self.primary_finished.set()
+            return "slow primary"
+        return "fast hedge"
+
+
+def test_losing_attempt_is_discarded_by_the_checkpoint(tmp_path):
+    user, cloud = StubAgent("BusinessUser"), SlowThenFastAgent("CloudArchitect")
+    runner = stub_runner(tmp_path, [user, cloud])
+    runner.caller = HedgedCaller(tracker_with(0.05), ThreadPoolExecutor(max_workers=2), hedge=True, min_hedge_delay=0.1)
+
+    messages = runner.run(user, "Design a payments platform", scope="session")
+    assert [msg["content"] for msg in messages[1:]] == ["fast hedge"]
+
+    # The primary finishes after the hedge won; its append loses and the stored turn stands
+    assert cloud.primary_finished.wait(5)
+    time.sleep(0.1)
+    stored, completed = runner.store.load(runner.store.conversation_id("Design a payments platform", "session"))
+    assert completed
+    assert [msg["content"] for msg in stored[1:]] == ["fast hedge"]
+    assert runner.turn_stats[0]["hedged"]
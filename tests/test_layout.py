@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from layout import RING_TYPES, layout_signature, radial_layout, spoke_segments
+
+
+def components(**counts):
+    return {component_type: [f"{component_type} {i}" for i in range(count)] for component_type, count in counts.items()}
+
+
+@pytest.mark.parametrize("counts", [
+    {"apis": 1, "databases": 1},
+    {"apis": 40, "microservices": 3, "cloud_services": 60, "security": 2},
+    {component_type: 25 for component_type in RING_TYPES},
+])
+def test_rings_are_spaced_and_nodes_never_overlap(counts):
+    layout = radial_layout(layout_signature(components(**counts)), min_spacing=1.0, ring_gap=1.0)
+    radii, ring = layout["radii"], layout["ring"]
+
+    # Each ring has its own radius, at least one ring gap outside the previous one
+    assert np.all(np.diff(radii) >= 1.0 - 1e-9)
+    assert len(layout["x"]) == sum(counts.values())
+
+    points = np.column_stack([layout["x"], layout["y"]])
+    for ring_number in np.unique(ring):
+        on_ring = points[ring == ring_number]
+        assert np.allclose(np.hypot(on_ring[:, 0], on_ring[:, 1]), radii[ring_number])
+        if len(on_ring) > 1:
+            distances = np.linalg.norm(on_ring[:, None] - on_ring[None, :], axis=-1)
+            np.fill_diagonal(distances, np.inf)
+            assert distances.min() >= 1.0 - 1e-9
+
+
+def test_layout_arrays_are_read_only():
+    layout = radial_layout(layout_signature(components(apis=3)))
+    with pytest.raises(ValueError):
+        layout["x"][0] = 0.0
+
+
+def test_equal_signatures_share_one_cached_layout():
+    radial_layout.cache_clear()
+    first = radial_layout(layout_signature(components(apis=4, databases=2)))
+    # A different dict with the same counts per type
+    second = radial_layout(layout_signature({"databases": ["a", "b"], "apis": ["w", "x", "y", "z"]}))
+    assert second is first
+    assert radial_layout.cache_info().hits == 1
+
+
+def test_spokes_are_nan_separated_segments_from_the_centre():
+    x, y = np.array([1.0, 2.0, 3.0]), np.array([4.0, 5.0, 6.0])
+    edge_x, edge_y = spoke_segments(x, y, center=(0.5, -0.5))
+    assert len(edge_x) == len(edge_y) == 9
+    assert np.all(np.isnan(edge_x[2::3])) and np.all(np.isnan(edge_y[2::3]))
+    assert np.all(edge_x[0::3] == 0.5) and np.all(edge_y[0::3] == -0.5)
+    assert np.array_equal(edge_x[1::3], x) and np.array_equal(edge_y[1::3], y)
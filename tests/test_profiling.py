@@ -0,0 +1,50 @@
+import json
+import os
+
+import profiling
+from profiling import MemoryProfiler, admin_authorized, session_label
+
+
+def test_admin_panel_needs_the_configured_token(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "")
+    assert not admin_authorized("")
+    assert not admin_authorized(None)
+
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "s3cret")
+    assert admin_authorized("s3cret")
+    assert not admin_authorized("wrong")
+    assert not admin_authorized(None)
+
+
+def test_dumps_are_pruned_oldest_first_across_pids(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "MAX_DUMPS", 2)
+    # A later process with a smaller pid must not lose its dumps to an older, larger pid
+    for name, mtime in [("memory_9_100.000.json", 100), ("memory_9_200.000.json", 200), ("memory_10_300.000.json", 300)]:
+        path = tmp_path / name
+        path.write_text("{}")
+        os.utime(path, (mtime, mtime))
+
+    profiler = MemoryProfiler(dump_dir=str(tmp_path))
+    written = profiler._dump({"label": "request", "timestamp": 400.0})
+
+    remaining = sorted(os.listdir(tmp_path))
+    assert os.path.basename(written) in remaining
+    assert "memory_10_300.000.json" in remaining
+    assert len(remaining) == 2
+
+
+def test_sessions_are_labelled_and_expire(tmp_path, monkeypatch):
+    profiler = MemoryProfiler(dump_dir="", session_ttl=60)
+    clock = [1000.0]
+    monkeypatch.setattr(profiling.time, "time", lambda: clock[0])
+
+    profiler.account_session("abc123", {"messages": ["x" * 100]})
+    assert list(profiler.sessions) == [session_label("abc123")]
+    assert "abc123" not in json.dumps(profiler.report())
+
+    clock[0] += 120
+    profiler.account_session("def456", {})
+    assert list(profiler.sessions) == [session_label("def456")]
+
+    profiler.forget_session("def456")
+    assert profiler.sessions == {}
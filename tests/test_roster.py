@@ -0,0 +1,66 @@
+import pytest
+
+from roster import SPECIALISTS, RosterPlanner
+
+
+def plan(user_request="", categories=(), priority="Medium", **kwargs):
+    return RosterPlanner().plan(user_request, list(categories), priority, **kwargs)
+
+
+@pytest.mark.parametrize("user_request, categories, priority", [
+    ("Move our Kafka cluster to AWS", ["Open Source"], "Low"),
+    ("Choose a cloud region for the API", ["Cloud Architecture"], "High"),
+    ("", [], "Medium"),
+])
+def test_lead_architect_is_always_on_the_roster(user_request, categories, priority):
+    assert "LeadArchitect" in plan(user_request, categories, priority)["specialists"]
+
+
+@pytest.mark.parametrize("kwargs", [{"priority": "Critical"}, {"force_full_panel": True}])
+def test_critical_or_forced_requests_get_the_full_panel(kwargs):
+    roster = plan("Tune our Postgres indexes", ["Open Source"], **kwargs)
+    assert roster["specialists"] == SPECIALISTS
+    assert (roster["skipped"], roster["llm_calls_saved"]) == ([], 0)
+
+
+def test_request_without_domain_signal_gets_the_full_panel():
+    roster = plan("Help us design something good", ["Integration"], "Low")
+    assert roster["specialists"] == SPECIALISTS
+    assert roster["reason"].startswith("No clear domain signal")
+
+
+def test_skipped_specialists_are_reported():
+    roster = plan("Run this on AWS Lambda", ["Cloud Architecture"], "Low")
+    assert roster["specialists"] == ["CloudArchitect", "LeadArchitect"]
+    assert roster["skipped"] == ["HeadOfArchitecture", "OSSArchitect"]
+    assert roster["llm_calls_saved"] == 2
+
+
+def test_category_outweighs_a_keyword():
+    scores = RosterPlanner().score("Self-host it next to our cloud", ["Open Source"])
+    # One category (2) against one keyword (1) for each side
+    assert scores["OSSArchitect"] > scores["CloudArchitect"] == 1
+    roster = plan("Self-host it next to our cloud", ["Open Source"], "Low", max_specialists=2)
+    assert roster["specialists"] == ["OSSArchitect", "LeadArchitect"]
+
+
+@pytest.mark.parametrize("max_specialists", [1, 2, 3])
+def test_max_specialists_caps_the_roster_and_keeps_lead_architect(max_specialists):
+    roster = plan("Migrate from AWS to self-hosted Kafka", ["Cost Optimization"], "Critical",
+                  max_specialists=max_specialists)
+    assert len(roster["specialists"]) == max_specialists
+    assert "LeadArchitect" in roster["specialists"]
+    assert roster["reason"].endswith(f"capped at {max_specialists} specialists under load")
+
+
+def test_group_chat_rounds_follow_the_roster(monkeypatch):
+    pytest.importorskip("autogen")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    from app import ArchitectureAgents
+
+    agents = ArchitectureAgents()
+    _, group_chat = agents.create_group_chat(roster=["CloudArchitect", "LeadArchitect"])
+    assert sorted(agent.name for agent in group_chat.agents) == ["BusinessUser", "CloudArchitect", "LeadArchitect"]
+    assert group_chat.max_round == 3
+    _, full_chat = agents.create_group_chat()
+    assert full_chat.max_round == len(SPECIALISTS) + 1
@@ -0,0 +1,118 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hedging import HedgedCaller, LatencyTracker
+from scheduler import SharedTurnScheduler, TurnScheduler
+
+
+def hold_slot(path, priority, batch, hold_seconds, results):
+    """Child process: take one shared slot, report the grant time, hold it"""
+    scheduler = SharedTurnScheduler(path, capacity=1, batch_reserve=0, poll_interval=0.01)
+    with scheduler.slot(priority, user=priority, team="batch" if batch else "product", batch=batch):
+        results.put((priority, time.time()))
+        time.sleep(hold_seconds)
+
+
+def wait_for_waiters(scheduler, count, timeout=20.0):
+    give_up = time.time() + timeout
+    while sum(scheduler.queue_depth().values()) < count:
+        assert time.time() < give_up, "turns never started waiting"
+        time.sleep(0.01)
+
+
+def test_interactive_turn_preempts_batch_turn_of_another_process(tmp_path):
+    path = str(tmp_path / "scheduler.sqlite3")
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    scheduler = SharedTurnScheduler(path, capacity=1, batch_reserve=0, poll_interval=0.01)
+
+    holder = context.Process(target=hold_slot, args=(path, "Low", True, 4.0, results))
+    holder.start()
+    assert results.get(timeout=30)[0] == "Low"
+
+    # A second worker process queues a batch turn first; the interactive Critical turn arrives later
+    waiting_batch = context.Process(target=hold_slot, args=(path, "Low", True, 0.0, results))
+    waiting_batch.start()
+    wait_for_waiters(scheduler, 1)
+    critical_granted = []
+    interactive = threading.Thread(target=lambda: critical_granted.append(_take_slot(scheduler, "Critical")))
+    interactive.start()
+    interactive.join(timeout=30)
+    batch_granted_at = results.get(timeout=30)[1]
+    holder.join(timeout=30)
+    waiting_batch.join(timeout=30)
+
+    assert critical_granted and critical_granted[0] < batch_granted_at
+
+
+def _take_slot(scheduler, priority):
+    with scheduler.slot(priority, user="alice", team="product"):
+        granted_at = time.time()
+        time.sleep(0.2)
+    return granted_at
+
+
+def test_capacity_and_batch_reserve_are_shared_between_schedulers(tmp_path):
+    path = str(tmp_path / "scheduler.sqlite3")
+    # Two scheduler objects stand in for two processes sharing one database
+    ui = SharedTurnScheduler(path, capacity=2, batch_reserve=1, poll_interval=0.01)
+    worker = SharedTurnScheduler(path, capacity=2, batch_reserve=1, poll_interval=0.01)
+    worker.owner, ui.owner = "worker", "ui"
+
+    with worker.slot("Low", batch=True):
+        assert ui.in_use() == 1
+        blocked = threading.Event()
+
+        def second_batch_turn():
+            with worker.slot("Low", user="other", batch=True):
+                blocked.set()
+
+        thread = threading.Thread(target=second_batch_turn, daemon=True)
+        thread.start()
+        time.sleep(0.3)
+        # The last slot is reserved for interactive work, whichever process asks
+        assert not blocked.is_set()
+        with ui.slot("High") as ticket:
+            assert ticket.granted and ui.in_use() == 2
+    thread.join(timeout=5)
+    assert blocked.is_set()
+    assert ui.wait_stats()["High"]["count"] == 1
+
+
+def test_leases_of_dead_processes_expire(tmp_path):
+    path = str(tmp_path / "scheduler.sqlite3")
+    crashed = SharedTurnScheduler(path, capacity=1, batch_reserve=0, lease_seconds=0.5, poll_interval=0.01)
+    crashed.owner = "crashed"
+    crashed._start_heartbeat = lambda: None  # a dead process stops renewing its lease
+    slot = crashed.slot("Low", batch=True)
+    slot.__enter__()
+
+    alive = SharedTurnScheduler(path, capacity=1, batch_reserve=0, lease_seconds=0.5, poll_interval=0.01)
+    started = time.time()
+    with alive.slot("High"):
+        assert time.time() - started >= 0.4
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_timed_out_call_keeps_its_slot_until_it_finishes(tmp_path, shared):
+    if shared:
+        scheduler = SharedTurnScheduler(str(tmp_path / "scheduler.sqlite3"), capacity=1, batch_reserve=0, poll_interval=0.01)
+    else:
+        scheduler = TurnScheduler(capacity=1, batch_reserve=0)
+    caller = HedgedCaller(LatencyTracker(), ThreadPoolExecutor(max_workers=2), hedge=False)
+    # Like an HTTP request in flight: it cannot observe the cancellation
+    finished = []
+    uncancellable = lambda cancel: (time.sleep(0.6), finished.append(time.perf_counter()))
+
+    with pytest.raises(TimeoutError):
+        with scheduler.slot("Medium") as ticket:
+            caller.call("CloudArchitect", uncancellable, deadline=0.1, in_flight=ticket.in_flight)
+
+    # The retry waits for the abandoned call rather than running next to it
+    with scheduler.slot("Medium"):
+        granted = time.perf_counter()
+    assert finished and granted >= finished[0]
@@ -0,0 +1,35 @@
+from scheduler import TurnScheduler
+from slo import SharedSLOController, SLOController
+from worker_pool import JobQueue
+
+
+def test_queued_jobs_raise_pressure(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    controller = SLOController(TurnScheduler(capacity=1), job_queue=queue, job_backlog_slo=2)
+    assert controller.evaluate()["level"] == 0
+
+    for _ in range(4):
+        queue.enqueue({"request": "x"})
+    signals = controller.signals()
+    assert signals["queued_jobs"] == 4
+    assert signals["pressure"] == 2.0
+    assert controller.evaluate()["level"] > 0
+
+
+def test_processes_share_samples_and_level(tmp_path):
+    path = str(tmp_path / "slo.sqlite3")
+    options = dict(scheduler=TurnScheduler(capacity=1), latency_slo=1.0, cooldown_seconds=3600)
+    ui = SharedSLOController(path, **options)
+    worker = SharedSLOController(path, **options)
+
+    # Slow turns recorded by a worker process are seen by the UI process
+    for _ in range(5):
+        worker.record_turn(3.0)
+    assert ui.signals()["p95_latency"] == 3.0
+    raised = ui.evaluate()["level"]
+    assert raised > 0
+
+    # Once the samples age out, the level held by the UI still applies to the worker during the cooldown
+    fresh = SharedSLOController(path, **dict(options, window_seconds=0.0))
+    assert fresh.signals()["p95_latency"] == 0.0
+    assert fresh.evaluate()["level"] == raised
@@ -0,0 +1,14 @@
+from structured_output import parse_structured_response, structured_block
+
+
+def test_parsed_summary_belongs_to_the_caller():
+    answer = "Use Kafka.\n\n" + structured_block(
+        {"recommendations": ["Use Kafka"], "risks": [], "costs": [], "components": {"apis": ["Gateway"]}}
+    )
+    first = parse_structured_response(answer)
+    first["recommendations"].append("Injected by an earlier report")
+    first["components"]["apis"].clear()
+
+    second = parse_structured_response(answer)
+    assert second["recommendations"] == ["Use Kafka"]
+    assert second["components"]["apis"] == ["Gateway"]
@@ -0,0 +1,58 @@
+import sqlite3
+import time
+
+from transcripts import TranscriptCodec, TranscriptStore
+
+
+def make_messages(text="We recommend PostgreSQL with read replicas. " * 40):
+    return [
+        {"content": "Design a payments platform", "role": "user", "name": "BusinessUser"},
+        {"content": text, "role": "user", "name": "CloudArchitect"},
+    ]
+
+
+def spill_one(store):
+    """Put two transcripts into a store that only has room for one; the first spills"""
+    first = store.put(make_messages())
+    store.put(make_messages("A different answer. " * 40))
+    assert store.stats()["spilled"] == 1
+    return first
+
+
+def test_spilled_transcript_reloads(tmp_path):
+    store = TranscriptStore(memory_limit=1, spill_path=str(tmp_path / "spill.sqlite3"))
+    key = spill_one(store)
+    assert [dict(msg) for msg in store.get(key)] == make_messages()
+
+
+def test_expired_spilled_transcripts_are_swept_at_startup(tmp_path):
+    path = str(tmp_path / "spill.sqlite3")
+    key = spill_one(TranscriptStore(memory_limit=1, spill_path=path))
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE messages SET spilled_at = ?", (time.time() - 7200,))
+
+    restarted = TranscriptStore(memory_limit=1, spill_path=path, spill_ttl_seconds=3600)
+    assert restarted.sweep() == 0  # already swept when the store first opened the spill file
+    assert restarted.get(key) is None
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
+
+
+def test_spill_with_unknown_codec_is_treated_as_missing(tmp_path):
+    path = str(tmp_path / "spill.sqlite3")
+    codec = TranscriptCodec(b"private dictionary", "zlib")
+    store = TranscriptStore(memory_limit=1, spill_path=path, codec=codec)
+    key = spill_one(store)
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM codecs")
+        conn.execute("UPDATE messages SET codec = 'zlib:unknown'")
+    assert store.get(key) is None
+
+
+def test_reads_do_not_keep_decoded_content(tmp_path):
+    store = TranscriptStore(spill_path=str(tmp_path / "spill.sqlite3"))
+    transcript = store.get(store.put(make_messages()))
+    before = store.memory_bytes
+    assert transcript[1]["content"] == make_messages()[1]["content"]
+    assert transcript.to_dicts() == make_messages()
+    assert store.memory_bytes == before < len(make_messages()[1]["content"])
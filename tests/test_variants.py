@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("autogen")
+
+import variants
+from checkpoints import ConversationCheckpointStore
+from hedging import HedgedCaller, LatencyTracker
+from roster import SPECIALISTS
+from scheduler import TurnScheduler
+from slo import SLOController
+from test_conversation import StubAgent
+from variants import SYNTHESIS_SPECIALIST, VariantRunner, compare_variants, expand_variants
+
+
+class StubAgentsSystem:
+    """``ArchitectureAgents`` stand-in: counting stub agents and a round-robin chat per roster"""
+
+    def __init__(self):
+        self.agents = {name: StubAgent(name) for name in SPECIALISTS}
+        self.agents["user_proxy"] = StubAgent("BusinessUser")
+
+    def create_group_chat(self, roster=None):
+        agents = [
+            agent for agent in self.agents.values()
+            if roster is None or agent.name in roster or agent is self.agents["user_proxy"]
+        ]
+        return None, SimpleNamespace(agents=agents, max_round=len(agents), messages=[])
+
+
+@pytest.fixture
+def resumed_turns(monkeypatch):
+    """Turns each ConversationRunner found checkpointed, in run order"""
+    resumed = []
+
+    class RecordingRunner(variants.ConversationRunner):
+        def run(self, *args, **kwargs):
+            messages = super().run(*args, **kwargs)
+            resumed.append(self.resumed_turns)
+            return messages
+
+    monkeypatch.setattr(variants, "ConversationRunner", RecordingRunner)
+    return resumed
+
+
+def variant_runner(tmp_path, system):
+    scheduler = TurnScheduler(capacity=2, batch_reserve=0)
+    return VariantRunner(
+        system, store=ConversationCheckpointStore(str(tmp_path / "checkpoints.sqlite3")),
+        max_retries=0, retry_backoff=0, caller=HedgedCaller(LatencyTracker(), hedge=False),
+        scheduler=scheduler, slo=SLOController(scheduler)
+    )
+
+
+def test_specialists_run_once_and_only_synthesis_runs_per_variant(tmp_path, resumed_turns):
+    system = StubAgentsSystem()
+    runner = variant_runner(tmp_path, system)
+    compared = expand_variants([["Security"], ["Scalability"], ["Cost Optimization"]], ["Medium"])
+
+    result = runner.run("Design a payments platform", compared, force_full_panel=True, scope="session")
+
+    calls = {agent.name: agent.calls for agent in system.agents.values()}
+    assert calls == {
+        "HeadOfArchitecture": 1, "CloudArchitect": 1, "OSSArchitect": 1,
+        "LeadArchitect": len(compared), "BusinessUser": 0,
+    }
+    assert result["shared_roster"] == [name for name in SPECIALISTS if name != SYNTHESIS_SPECIALIST]
+    assert result["llm_calls"] == 3 + len(compared)
+    assert result["llm_calls_saved"] == len(SPECIALISTS) * len(compared) - result["llm_calls"]
+
+    # The shared run starts fresh; every variant resumes with its specialist answers already stored
+    assert resumed_turns == [0] + [3] * len(compared)
+    for variant_result in result["variants"]:
+        assert [stat["speaker"] for stat in variant_result["turn_stats"]] == [SYNTHESIS_SPECIALIST]
+        assert [msg["name"] for msg in variant_result["messages"][1:]] == SPECIALISTS
+        assert variant_result["messages"][0]["content"].rstrip().endswith("for the categories and priority above only.")
+
+
+def test_variant_seeds_only_its_roster(tmp_path, resumed_turns):
+    system = StubAgentsSystem()
+    compared = [{"categories": ["Open Source"], "urgency": "Low"}, {"categories": ["Cloud Architecture"], "urgency": "Low"}]
+
+    result = variant_runner(tmp_path, system).run("Design our event pipeline", compared, scope="session")
+
+    assert result["shared_roster"] == ["CloudArchitect", "OSSArchitect"]
+    assert [agent.calls for agent in system.agents.values()] == [0, 1, 1, 2, 0]
+    rosters = [[msg["name"] for msg in variant_result["messages"][1:]] for variant_result in result["variants"]]
+    assert rosters == [["OSSArchitect", "LeadArchitect"], ["CloudArchitect", "LeadArchitect"]]
+    assert resumed_turns == [0, 1, 1]
+
+
+def test_compare_variants_has_one_row_per_variant():
+    from app import build_report
+
+    messages = [
+        {"content": "Design a payments platform", "role": "user", "name": "BusinessUser"},
+        {"content": "1. Use Kafka for events\n2. Encrypt data at rest", "role": "user", "name": "LeadArchitect"},
+    ]
+    reports = []
+    for urgency in ["Low", "Critical", "Medium"]:
+        _, report = build_report(messages, "Design a payments platform", ["Security"], urgency,
+                                 extra_metadata={"roster": ["LeadArchitect"]})
+        reports.append((f"{urgency} · Security", report))
+
+    frame = compare_variants(reports)
+
+    assert len(frame) == len(reports)
+    # Ordered by priority, most urgent first
+    assert list(frame["Variant"]) == ["Critical · Security", "Medium · Security", "Low · Security"]
+    assert set(frame["Specialists"]) == {"LeadArchitect"}
+    assert compare_variants([]).empty
@@ -0,0 +1,129 @@
+import sys
+import threading
+import time
+
+import batch_runner
+import worker_pool
+from worker_pool import JobQueue, WorkerPool, worker_loop
+
+
+def enqueue(queue, priority):
+    return queue.enqueue({"user_request": f"{priority} request: event-driven platform on aws", "categories": [],
+                          "urgency": priority}, priority=priority)
+
+
+def test_claim_filters_by_priority(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"))
+    critical, low = enqueue(queue, "Critical"), enqueue(queue, "Low")
+    job = queue.claim("batch", kind="conversation", priorities=["Low"], status="batched")
+    assert job["id"] == low
+    assert queue.claim("batch", kind="conversation", priorities=["Low"], status="batched") is None
+    assert queue.get(low)["status"] == "batched"
+    assert queue.get(critical)["status"] == "queued"
+
+
+def test_requeue_stale_respects_heartbeat_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"))
+    held, abandoned = enqueue(queue, "Low"), enqueue(queue, "Low")
+    queue.claim("batch", priorities=["Low"], status="batched")
+    queue.claim("batch", priorities=["Low"], status="batched")
+    time.sleep(0.2)
+    queue.heartbeat([held])
+    assert queue.requeue_stale(older_than=0.1) == 1
+    assert queue.get(held)["status"] == "batched"
+    assert queue.get(abandoned)["status"] == "queued"
+
+
+def test_batch_runner_from_queue_leaves_interactive_jobs(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "local")
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "queue.sqlite3")
+    queue = JobQueue(path)
+    interactive = [enqueue(queue, priority) for priority in ("Critical", "High", "Medium")]
+    batch = [enqueue(queue, "Low"), enqueue(queue, "Low")]
+
+    monkeypatch.setattr(sys, "argv", ["batch_runner.py", "--from-queue", "--local", "--queue", path])
+    batch_runner.main()
+
+    assert [queue.get(job_id)["status"] for job_id in batch] == ["done", "done"]
+    assert [queue.get(job_id)["status"] for job_id in interactive] == ["queued"] * 3
+    assert queue.requeue_stale(older_than=0) == 0
+
+
+def test_concurrent_claimers_never_share_a_job(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = JobQueue(path)
+    job_ids = [queue.enqueue({"seconds": 0}, kind="sleep") for _ in range(40)]
+    claimed = []
+
+    def claimer(worker_id):
+        # Each claimer has its own connections, like separate worker processes
+        own_queue = JobQueue(path)
+        while True:
+            job = own_queue.claim(worker_id)
+            if job is None:
+                return
+            claimed.append(job["id"])
+
+    threads = [threading.Thread(target=claimer, args=(f"worker-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == job_ids
+    assert all(queue.get(job_id)["attempts"] == 1 for job_id in job_ids)
+
+
+def test_claim_orders_by_priority_then_deadline(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"))
+    now = time.time()
+    low = queue.enqueue({}, priority="Low", deadline=now)
+    medium_late = queue.enqueue({}, priority="Medium", deadline=now + 600)
+    medium_soon = queue.enqueue({}, priority="Medium", deadline=now + 60)
+    critical = queue.enqueue({}, priority="Critical", deadline=now + 3600)
+    order = [queue.claim("worker")["id"] for _ in range(4)]
+    assert order == [critical, medium_soon, medium_late, low]
+
+
+def test_running_job_keeps_its_lease(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = JobQueue(path)
+    job_id = queue.enqueue({"seconds": 1.0}, kind="sleep")
+    worker = threading.Thread(target=worker_loop, args=(path, "worker"),
+                              kwargs={"exit_when_idle": True, "heartbeat_interval": 0.05})
+    worker.start()
+    time.sleep(0.6)
+    # Longer than the stale threshold since the claim, but the heartbeat is fresh
+    assert queue.requeue_stale(older_than=0.3) == 0
+    assert queue.get(job_id)["status"] == "running"
+    worker.join()
+    assert queue.get(job_id)["status"] == "done"
+    assert queue.get(job_id)["attempts"] == 1
+
+
+def test_pool_requeues_lapsed_jobs_while_running(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = JobQueue(path)
+    job_id = queue.enqueue({}, kind="sleep")
+    pool = WorkerPool(workers=0, queue_path=path, requeue_interval=0.05, stale_after=0.2)
+    pool.start()
+    # Claimed after the startup sweep by a worker that then dies without finishing
+    queue.claim("dead-worker")
+    time.sleep(0.6)
+    pool.stop()
+    assert queue.get(job_id)["status"] == "queued"
+
+
+def test_failed_job_stores_the_traceback(tmp_path, monkeypatch):
+    def explode(payload, deadline=None, job_id=None):
+        raise ValueError("boom")
+
+    monkeypatch.setitem(worker_pool.JOB_HANDLERS, "explode", explode)
+    path = str(tmp_path / "queue.sqlite3")
+    queue = JobQueue(path)
+    job_id = queue.enqueue({}, kind="explode")
+    worker_loop(path, "worker", exit_when_idle=True)
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"].startswith("Traceback")
+    assert "ValueError: boom" in job["error"]
@@ -0,0 +1,406 @@
+"""
+Compact, memory-bounded transcript storage for Streamlit sessions.
+
+Message content is compressed with zstd (``zstandard``, when installed) or
+zlib, both primed with a dictionary of typical agent output, and held in
+``__slots__`` records. ``CompressedTranscript`` is a read-only sequence of
+mappings, so ``ArchitectureReportGenerator`` and the render helpers read
+``msg.get("content")`` exactly as they would from a plain message dict.
+
+``TranscriptStore`` keeps transcripts for all sessions of the process under
+one memory cap. When the cap is exceeded, the least recently used
+transcripts spill to a local SQLite file. They are loaded back
+transparently on their next access. Spilled transcripts not read back
+within ``SPILL_TTL_SECONDS`` are swept at startup and on every spill.
+Session state only holds the transcript key. Content is decoded on every
+read and never cached, so everything the store keeps counts against the cap;
+readers that go over a transcript several times decode it once with
+``to_dicts``.
+
+Train a dictionary from completed checkpointed conversations with:
+
+    python transcripts.py train
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Any, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+TRANSCRIPT_MEMORY_BYTES = int(float(os.getenv("ARCHITECTURE_TRANSCRIPT_MEMORY_MB", "64")) * 1024 * 1024)
+DEFAULT_SPILL_PATH = os.getenv("ARCHITECTURE_TRANSCRIPT_SPILL", os.path.join(".transcripts", "spill.sqlite3"))
+# Sessions rarely reopen a report after a day; older spilled transcripts belong to sessions that are gone
+SPILL_TTL_SECONDS = float(os.getenv("ARCHITECTURE_TRANSCRIPT_SPILL_TTL_SECONDS", str(24 * 3600)))
+DICTIONARY_PATH = os.getenv("ARCHITECTURE_TRANSCRIPT_DICT", os.path.join(".transcripts", "agent_output.dict"))
+
+# zlib only looks back 32 KiB, so a larger preset dictionary would be wasted
+ZLIB_DICTIONARY_BYTES = 32 * 1024
+
+# Used as a raw-content dictionary until one is trained on real conversations
+SEED_PHRASES = [
+    "## Architecture Request", "**Request Categories:**", "**Priority Level:**",
+    "Please provide your expert recommendations from your specialized perspective.",
+    "**Recommendations:**", "**Risks:**", "**Cost Considerations:**", "**Implementation Plan:**",
+    "I recommend", "We recommend", "should consider", "Key considerations", "Trade-offs",
+    "scalability", "availability", "maintainability", "observability", "latency", "throughput",
+    "microservices", "API gateway", "load balancer", "message queue", "event-driven architecture",
+    "Kubernetes", "Docker", "serverless", "AWS", "Azure", "GCP", "multi-region", "auto-scaling",
+    "PostgreSQL", "Redis", "Kafka", "RabbitMQ", "Elasticsearch", "object storage", "CDN",
+    "OAuth 2.0", "encryption at rest and in transit", "role-based access control", "compliance",
+    "Prometheus", "Grafana", "OpenTelemetry", "centralized logging", "monitoring and alerting",
+    "vendor lock-in", "operational overhead", "open source license", "total cost of ownership",
+    "The main risk is", "A key challenge is", "Consider the operational cost of",
+    "Head of Architecture", "Cloud Architect", "OSS Architect", "Lead Architect",
+]
+
+
+class TranscriptCodec:
+    """Dictionary-primed compressor for message content (zstd when available, else zlib)"""
+
+    def __init__(self, dictionary: bytes = b"", algorithm: Optional[str] = None, level: int = 9):
+        self.algorithm = algorithm or ("zstd" if zstandard is not None else "zlib")
+        if self.algorithm == "zstd" and zstandard is None:
+            raise ImportError("zstandard is required to decode zstd transcripts. Install it with `pip install zstandard`.")
+        self.dictionary = dictionary if self.algorithm == "zstd" else dictionary[-ZLIB_DICTIONARY_BYTES:]
+        self.level = level
+        self.name = f"{self.algorithm}:{hashlib.sha1(self.dictionary).hexdigest()[:12]}"
+        # zstd (de)compressor objects are not thread-safe
+        self._local = threading.local()
+
+    def _zstd(self):
+        if not hasattr(self._local, "compressor"):
+            dictionary = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+            self._local.decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return self._local.compressor, self._local.decompressor
+
+    def compress(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        if self.algorithm == "zstd":
+            return self._zstd()[0].compress(data)
+        compressor = zlib.compressobj(self.level, zdict=self.dictionary) if self.dictionary else zlib.compressobj(self.level)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, blob: bytes) -> str:
+        if self.algorithm == "zstd":
+            return self._zstd()[1].decompress(blob).decode("utf-8")
+        decompressor = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+        return (decompressor.decompress(blob) + decompressor.flush()).decode("utf-8")
+
+
+def train_dictionary(samples: List[str], size: int = 16 * 1024) -> bytes:
+    """Build a compression dictionary from typical agent answers
+
+    With zstd this is a trained dictionary. For zlib, which only takes raw
+    content, it is the most frequent lines, with the most common last, where
+    zlib finds matches cheapest.
+    """
+    if zstandard is not None and len(samples) >= 8:
+        try:
+            return zstandard.train_dictionary(size, [sample.encode("utf-8") for sample in samples]).as_bytes()
+        except zstandard.ZstdError:
+            pass  # Too little sample data to train; use the raw-content dictionary below
+    counts = Counter(line.strip() for sample in samples for line in sample.splitlines() if len(line.strip()) > 3)
+    dictionary = b""
+    for line, _ in counts.most_common():
+        entry = line.encode("utf-8") + b"\n"
+        if len(dictionary) + len(entry) > min(size, ZLIB_DICTIONARY_BYTES):
+            break
+        dictionary = entry + dictionary
+    return dictionary
+
+
+# Codecs by name, so any record (including spilled ones) can find its decoder
+_CODECS: Dict[str, TranscriptCodec] = {}
+
+
+def register_codec(codec: TranscriptCodec) -> TranscriptCodec:
+    return _CODECS.setdefault(codec.name, codec)
+
+
+@lru_cache(maxsize=1)
+def default_codec() -> TranscriptCodec:
+    """Codec primed with the trained dictionary file when present, else the seed phrases"""
+    if os.path.exists(DICTIONARY_PATH):
+        with open(DICTIONARY_PATH, "rb") as f:
+            dictionary = f.read()
+    else:
+        dictionary = "\n".join(SEED_PHRASES).encode("utf-8")
+    return register_codec(TranscriptCodec(dictionary))
+
+
+class MessageRecord(Mapping):
+    """Read-only message with compressed content, usable wherever a message dict is read"""
+
+    __slots__ = ("name", "role", "codec", "blob")
+    _KEYS = ("content", "role", "name")
+
+    def __init__(self, name: Optional[str], role: str, codec: str, blob: bytes):
+        self.name = name
+        self.role = role
+        self.codec = codec
+        self.blob = blob
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any], codec: TranscriptCodec) -> "MessageRecord":
+        return cls(message.get("name"), message.get("role", "user"), codec.name, codec.compress(message.get("content") or ""))
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "content":
+            return _CODECS[self.codec].decompress(self.blob)
+        if key == "role":
+            return self.role
+        if key == "name":
+            return self.name
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(name={self.name!r}, role={self.role!r}, {len(self.blob)} compressed bytes)"
+
+
+class CompressedTranscript(Sequence):
+    """Immutable sequence of ``MessageRecord``s"""
+
+    __slots__ = ("records",)
+
+    def __init__(self, records: List[MessageRecord]):
+        self.records = tuple(records)
+
+    @classmethod
+    def from_messages(cls, messages: List[Dict[str, Any]], codec: Optional[TranscriptCodec] = None) -> "CompressedTranscript":
+        # Registered so the records (and their spilled copies) can find their decoder
+        codec = register_codec(codec) if codec is not None else default_codec()
+        return cls([MessageRecord.from_message(message, codec) for message in messages])
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size: compressed content plus per-record overhead"""
+        return sum(len(record.blob) + 120 for record in self.records) + 64
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Plain message dicts, e.g. for JSON serialization"""
+        return [dict(record) for record in self.records]
+
+
+class TranscriptStore:
+    """Process-wide LRU of compressed transcripts with a memory cap and SQLite spill"""
+
+    def __init__(self, memory_limit: int = TRANSCRIPT_MEMORY_BYTES, spill_path: str = DEFAULT_SPILL_PATH,
+                 codec: Optional[TranscriptCodec] = None, spill_ttl_seconds: float = SPILL_TTL_SECONDS):
+        self.memory_limit = memory_limit
+        self.spill_path = spill_path
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self.codec = codec
+        self._transcripts: "OrderedDict[str, CompressedTranscript]" = OrderedDict()
+        self._memory_bytes = 0
+        self._spill_ready = False
+        self._lock = threading.RLock()
+        self.spilled = 0
+        self.reloaded = 0
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._spill_ready:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.spill_path, timeout=30, isolation_level="IMMEDIATE")
+        try:
+            with conn:
+                if not self._spill_ready:
+                    conn.execute(
+                        """CREATE TABLE IF NOT EXISTS messages (
+                            transcript_key TEXT NOT NULL,
+                            position INTEGER NOT NULL,
+                            name TEXT,
+                            role TEXT NOT NULL,
+                            codec TEXT NOT NULL,
+                            content BLOB NOT NULL,
+                            spilled_at REAL,
+                            PRIMARY KEY (transcript_key, position)
+                        )"""
+                    )
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+                    if "spilled_at" not in columns:
+                        conn.execute("ALTER TABLE messages ADD COLUMN spilled_at REAL")
+                    conn.execute(
+                        """CREATE TABLE IF NOT EXISTS codecs (
+                            name TEXT PRIMARY KEY,
+                            algorithm TEXT NOT NULL,
+                            dictionary BLOB NOT NULL
+                        )"""
+                    )
+                    self._sweep(conn)
+                    self._spill_ready = True
+                yield conn
+        finally:
+            conn.close()
+
+    def _sweep(self, conn: sqlite3.Connection) -> int:
+        # Rows from before spilled_at existed have no timestamp and are as stale as it gets
+        return conn.execute(
+            "DELETE FROM messages WHERE spilled_at IS NULL OR spilled_at < ?",
+            (time.time() - self.spill_ttl_seconds,)
+        ).rowcount
+
+    def sweep(self) -> int:
+        """Delete expired spilled messages now; returns how many rows were removed"""
+        with self._connect() as conn:
+            return self._sweep(conn)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def put(self, messages: List[Dict[str, Any]]) -> str:
+        """Compress and store a transcript, returning the key to keep in session state"""
+        transcript = CompressedTranscript.from_messages(messages, self.codec)
+        key = uuid.uuid4().hex
+        with self._lock:
+            self._insert(key, transcript)
+        return key
+
+    def get(self, key: str) -> Optional[CompressedTranscript]:
+        """The transcript for ``key``, reloading it from disk if it was spilled"""
+        with self._lock:
+            transcript = self._transcripts.get(key)
+            if transcript is not None:
+                self._transcripts.move_to_end(key)
+                return transcript
+            transcript = self._load_spilled(key)
+            if transcript is not None:
+                self.reloaded += 1
+                self._insert(key, transcript)
+            return transcript
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            transcript = self._transcripts.pop(key, None)
+            if transcript is not None:
+                self._memory_bytes -= transcript.nbytes
+            if self._spill_ready or os.path.exists(self.spill_path):
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM messages WHERE transcript_key = ?", (key,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_memory": len(self._transcripts),
+                "memory_bytes": self._memory_bytes,
+                "memory_limit": self.memory_limit,
+                "spilled": self.spilled,
+                "reloaded": self.reloaded,
+            }
+
+    def _insert(self, key: str, transcript: CompressedTranscript) -> None:
+        self._transcripts[key] = transcript
+        self._memory_bytes += transcript.nbytes
+        # Always keep the newest transcript resident, even if it alone exceeds the cap
+        while self._memory_bytes > self.memory_limit and len(self._transcripts) > 1:
+            old_key, old = self._transcripts.popitem(last=False)
+            self._spill(old_key, old)
+            self._memory_bytes -= old.nbytes
+
+    def _spill(self, key: str, transcript: CompressedTranscript) -> None:
+        with self._connect() as conn:
+            for codec_name in {record.codec for record in transcript.records}:
+                codec = _CODECS[codec_name]
+                conn.execute(
+                    "INSERT OR IGNORE INTO codecs (name, algorithm, dictionary) VALUES (?, ?, ?)",
+                    (codec.name, codec.algorithm, codec.dictionary)
+                )
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO messages (transcript_key, position, name, role, codec, content, spilled_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(key, i, record.name, record.role, record.codec, record.blob, now)
+                 for i, record in enumerate(transcript.records)]
+            )
+            self._sweep(conn)
+        self.spilled += 1
+
+    def _load_spilled(self, key: str) -> Optional[CompressedTranscript]:
+        if not (self._spill_ready or os.path.exists(self.spill_path)):
+            return None
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, role, codec, content FROM messages WHERE transcript_key = ? ORDER BY position", (key,)
+            ).fetchall()
+            readable = bool(rows)
+            for codec_name in {row[2] for row in rows} - set(_CODECS):
+                codec_row = conn.execute(
+                    "SELECT algorithm, dictionary FROM codecs WHERE name = ?", (codec_name,)
+                ).fetchone()
+                if codec_row is None:
+                    # Without its dictionary the content can't be decoded; drop it like an expired transcript
+                    readable = False
+                    break
+                register_codec(TranscriptCodec(bytes(codec_row[1]), codec_row[0]))
+            if rows:
+                conn.execute("DELETE FROM messages WHERE transcript_key = ?", (key,))
+        if not readable:
+            return None
+        return CompressedTranscript([MessageRecord(name, role, codec, bytes(blob)) for name, role, codec, blob in rows])
+
+
+# Shared by every session in the process so the memory cap is global
+TRANSCRIPTS = TranscriptStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript compression utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="Train a dictionary from checkpointed conversations")
+    train_parser.add_argument("--checkpoints", default=None, help="Checkpoint database (default: ARCHITECTURE_CHECKPOINT_DB)")
+    train_parser.add_argument("--out", default=DICTIONARY_PATH)
+    train_parser.add_argument("--size", type=int, default=16 * 1024)
+    args = parser.parse_args()
+
+    import json
+    from checkpoints import DEFAULT_CHECKPOINT_PATH
+
+    conn = sqlite3.connect(args.checkpoints or DEFAULT_CHECKPOINT_PATH)
+    try:
+        rows = conn.execute("SELECT messages FROM conversations WHERE completed = 1").fetchall()
+    finally:
+        conn.close()
+    samples = [msg.get("content") or "" for (messages,) in rows for msg in json.loads(messages)[1:]]
+    dictionary = train_dictionary(samples, args.size)
+
+    directory = os.path.dirname(args.out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.out, "wb") as f:
+        f.write(dictionary)
+    print(f"Wrote {len(dictionary)} byte dictionary from {len(samples)} answers to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
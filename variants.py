@@ -0,0 +1,154 @@
+"""
+Variant fan-out: compare advice across category and priority selections.
+
+Architects often submit one request several times with different categories
+or urgency to compare the advice, and each submission re-runs every
+specialist although the request text dominates their answers.
+``VariantRunner`` runs the specialists once against a shared opening that
+lists every variant's categories and priorities, then re-runs only the
+synthesis turn (the Lead Architect) per variant. Each variant transcript is
+the variant's own opening, the shared answers of the specialists on its
+roster and its own synthesis, so it gets its own detailed report. N variants
+cost (shared specialists + N) LLM calls instead of roughly 4N.
+
+Variant transcripts are seeded into the checkpoint store as unfinished
+conversations, so ``ConversationRunner`` resumes them and generates only the
+synthesis turn. A failed synthesis resumes the same way.
+"""
+
+import itertools
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+from checkpoints import ConversationCheckpointStore
+from conversation import ConversationRunner
+from roster import SPECIALISTS, RosterPlanner
+from scheduler import PRIORITY_RANK
+
+
+# The specialist whose turn is re-run per variant; every roster includes it
+SYNTHESIS_SPECIALIST = "LeadArchitect"
+
+VARIANT_SYNTHESIS_NOTE = """
+        The specialist answers below were written for all compared variants of this request.
+        Synthesize them for the categories and priority above only.
+        """
+
+
+def expand_variants(category_sets: List[List[str]], priorities: List[str]) -> List[Dict[str, Any]]:
+    """Every combination of category set and priority, without duplicates, in input order"""
+    variants, seen = [], set()
+    for categories, urgency in itertools.product(category_sets, priorities):
+        key = (tuple(sorted(categories)), urgency)
+        if key not in seen:
+            seen.add(key)
+            variants.append({"categories": list(categories), "urgency": urgency})
+    return variants
+
+
+def variant_label(variant: Dict[str, Any]) -> str:
+    """Short display name such as ``"High · Security, Scalability"``"""
+    return f"{variant['urgency']} · {', '.join(variant['categories']) or 'No categories'}"
+
+
+class VariantRunner:
+    """Run shared specialist analysis once and the synthesis turn once per variant"""
+
+    def __init__(self, agents_system, store: Optional[ConversationCheckpointStore] = None,
+                 planner: Optional[RosterPlanner] = None, **runner_options):
+        self.agents_system = agents_system
+        self.store = store or ConversationCheckpointStore()
+        self.planner = planner or RosterPlanner()
+        # Passed through to every ConversationRunner (compactor, hedge, user, team, ...)
+        self.runner_options = runner_options
+
+    def run(self, user_request: str, variants: List[Dict[str, Any]], pattern_context: str = "",
+            force_full_panel: bool = False, max_specialists: Optional[int] = None,
+            scope: Optional[str] = None) -> Dict[str, Any]:
+        """Return the shared transcript, one transcript per variant and the LLM calls used and saved"""
+        from app import format_request
+
+        initiator = self.agents_system.agents["user_proxy"]
+        plans = [
+            self.planner.plan(user_request, variant["categories"], variant["urgency"], force_full_panel,
+                              max_specialists=max_specialists)
+            for variant in variants
+        ]
+
+        # Shared analysis: every specialist any variant needs, except the synthesizer
+        shared_roster = [
+            specialist for specialist in SPECIALISTS
+            if specialist != SYNTHESIS_SPECIALIST and any(specialist in plan["specialists"] for plan in plans)
+        ]
+        categories = list(dict.fromkeys(category for variant in variants for category in variant["categories"]))
+        priorities = sorted({variant["urgency"] for variant in variants}, key=lambda p: PRIORITY_RANK.get(p, 2))
+        shared_request = format_request(user_request, categories, " / ".join(priorities), pattern_context)
+        shared_messages = [{"content": shared_request, "role": "user", "name": initiator.name}]
+        turn_stats = []
+        if shared_roster:
+            manager, group_chat = self.agents_system.create_group_chat(roster=shared_roster)
+            runner = ConversationRunner(
+                manager, group_chat, store=self.store, priority=priorities[0] if priorities else "Medium",
+                **self.runner_options
+            )
+            shared_messages = runner.run(initiator, shared_request, scope=scope)
+            turn_stats.extend(runner.turn_stats)
+        shared_turns = {msg.get("name"): msg for msg in shared_messages[1:]}
+
+        results = []
+        for variant, plan in zip(variants, plans):
+            opening = format_request(user_request, variant["categories"], variant["urgency"], pattern_context)
+            opening += VARIANT_SYNTHESIS_NOTE
+            conversation_id = self.store.conversation_id(opening, scope)
+            # Seed the variant with the shared answers so only the synthesis turn is generated
+            self.store.start(conversation_id, [{"content": opening, "role": "user", "name": initiator.name}] + [
+                shared_turns[specialist] for specialist in plan["specialists"] if specialist in shared_turns
+            ])
+            manager, group_chat = self.agents_system.create_group_chat(roster=plan["specialists"])
+            runner = ConversationRunner(manager, group_chat, store=self.store, priority=variant["urgency"],
+                                        **self.runner_options)
+            messages = runner.run(initiator, opening, conversation_id=conversation_id)
+            turn_stats.extend(runner.turn_stats)
+            results.append({
+                "variant": variant,
+                "label": variant_label(variant),
+                "roster_plan": plan,
+                "messages": messages,
+                "turn_stats": runner.turn_stats,
+            })
+
+        separate_calls = sum(len(plan["specialists"]) for plan in plans)
+        return {
+            "shared_messages": shared_messages,
+            "shared_roster": shared_roster,
+            "variants": results,
+            "turn_stats": turn_stats,
+            "llm_calls": len(turn_stats),
+            "llm_calls_saved": max(separate_calls - len(turn_stats), 0),
+        }
+
+
+def compare_variants(reports: List[Tuple[str, Dict]]) -> pd.DataFrame:
+    """Side-by-side comparison of ``(label, detailed_report)`` pairs, one row per variant"""
+    rows = []
+    for label, report in reports:
+        metadata = report["metadata"]
+        synthesis = report["agent_summaries"].get(SYNTHESIS_SPECIALIST, {}).get("recommendations", [])
+        rows.append({
+            "Variant": label,
+            "Priority": metadata["priority"],
+            "Categories": ", ".join(metadata["categories"]),
+            "Specialists": ", ".join(metadata.get("roster", [])),
+            "Recommendations": metadata["total_recommendations"],
+            "Risks": len(report["risk_assessment"]),
+            "Cost Considerations": len(report["cost_considerations"]),
+            "Components": sum(len(items) for items in report.get("components", {}).values()),
+            "Lead Recommendation": synthesis[0] if synthesis else "",
+        })
+    frame = pd.DataFrame(rows)
+    if not frame.empty:
+        frame = frame.sort_values(
+            "Priority", key=lambda column: column.map(lambda p: PRIORITY_RANK.get(p, 2)), kind="stable"
+        ).reset_index(drop=True)
+    return frame
@@ -0,0 +1,398 @@
+"""
+Multi-process worker pool for architecture conversations.
+
+UI processes enqueue conversation jobs into a durable SQLite queue; worker
+processes (on this host or any host sharing the queue file) claim jobs, run
+the ``ArchitectureAgents`` conversation plus report and figure generation,
+and write the results back. Jobs are claimed by priority class, then
+deadline, then arrival. A claimed job holds a heartbeat lease while it
+runs: workers renew it from a background thread, and jobs handed to the
+Message Batches runner are ``batched`` rather than ``running`` and renew
+it while their batch is in flight. The pool requeues jobs whose lease has
+lapsed at startup and then periodically, so a job whose worker died is run
+again but a slow one is not run twice. Start a pool with:
+
+    python worker_pool.py --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any, Iterator, Optional
+
+from scheduler import PRIORITY_CLASSES, PRIORITY_RANK, request_deadline
+
+DEFAULT_QUEUE_PATH = os.getenv("ARCHITECTURE_JOB_QUEUE", os.path.join(".jobs", "queue.sqlite3"))
+DEFAULT_WORKERS = int(os.getenv("ARCHITECTURE_WORKERS", str(os.cpu_count() or 1)))
+STALE_JOB_SECONDS = float(os.getenv("ARCHITECTURE_STALE_JOB_SECONDS", "1800"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("ARCHITECTURE_JOB_HEARTBEAT_SECONDS", "60"))
+REQUEUE_INTERVAL_SECONDS = float(os.getenv("ARCHITECTURE_REQUEUE_INTERVAL_SECONDS", "300"))
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars from pandas frames serialize as their Python equivalents
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class JobQueue:
+    """Durable SQLite job queue shared by UI processes and workers"""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    priority TEXT NOT NULL DEFAULT 'Medium',
+                    priority_rank INTEGER NOT NULL DEFAULT 2,
+                    deadline REAL,
+                    heartbeat REAL
+                )"""
+            )
+            # Queues created before jobs carried a priority
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "priority" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN priority TEXT NOT NULL DEFAULT 'Medium'")
+                conn.execute("ALTER TABLE jobs ADD COLUMN priority_rank INTEGER NOT NULL DEFAULT 2")
+                conn.execute("ALTER TABLE jobs ADD COLUMN deadline REAL")
+            if "heartbeat" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_schedule ON jobs (status, priority_rank, deadline, id)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level="IMMEDIATE")
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, payload: Dict, kind: str = "conversation", priority: str = "Medium",
+                deadline: Optional[float] = None) -> int:
+        """Add a job and return its id"""
+        priority = priority if priority in PRIORITY_RANK else "Medium"
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, enqueued_at, priority, priority_rank, deadline) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), now, priority, PRIORITY_RANK[priority],
+                 deadline if deadline is not None else request_deadline(priority, now))
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id: str, kind: Optional[str] = None, priorities: Optional[List[str]] = None,
+              status: str = "running") -> Optional[Dict]:
+        """Atomically take the most urgent queued job (of ``kind`` and ``priorities``, if given), or None
+
+        ``status`` is ``running`` for workers and ``batched`` for jobs held by a
+        Message Batches run, which must renew the lease with ``heartbeat``.
+        """
+        priority_filter = json.dumps(priorities) if priorities is not None else None
+        while True:
+            with self._connect() as conn:
+                # The implicit transaction only starts at the UPDATE, so another worker may take
+                # the row in between; the status check makes the claim a compare-and-set
+                row = conn.execute(
+                    "SELECT id, kind, payload, priority, deadline FROM jobs WHERE status = 'queued' "
+                    "AND (? IS NULL OR kind = ?) AND (? IS NULL OR priority IN (SELECT value FROM json_each(?))) "
+                    "ORDER BY priority_rank, deadline, id LIMIT 1",
+                    (kind, kind, priority_filter, priority_filter)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, started_at = ?, heartbeat = ?, attempts = attempts + 1 "
+                    "WHERE id = ? AND status = 'queued'",
+                    (status, worker_id, now, now, row["id"])
+                ).rowcount
+            if claimed:
+                break
+        return {"id": row["id"], "kind": row["kind"], "payload": json.loads(row["payload"]),
+                "priority": row["priority"], "deadline": row["deadline"]}
+
+    def complete(self, job_id: int, result: Any) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result, default=_json_default), time.time(), job_id)
+            )
+
+    def fail(self, job_id: int, error: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def heartbeat(self, job_ids: List[int]) -> None:
+        """Renew the lease of claimed jobs that are still being worked on"""
+        with self._connect() as conn:
+            conn.executemany("UPDATE jobs SET heartbeat = ? WHERE id = ?", [(time.time(), job_id) for job_id in job_ids])
+
+    def requeue_stale(self, older_than: float = STALE_JOB_SECONDS) -> int:
+        """Return jobs whose worker died mid-run (no heartbeat for ``older_than`` seconds) to the queue"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE status IN ('running', 'batched') "
+                "AND COALESCE(heartbeat, started_at) < ?",
+                (time.time() - older_than,)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """Job status, with the decoded result once it is done"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def wait_stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue-wait count, mean and max (seconds) of claimed jobs per priority class"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT priority, COUNT(*), AVG(started_at - enqueued_at), MAX(started_at - enqueued_at), "
+                "SUM(started_at > deadline) FROM jobs WHERE started_at IS NOT NULL GROUP BY priority"
+            ).fetchall()
+        stats = {priority: {"count": 0, "mean": 0.0, "max": 0.0, "deadline_misses": 0} for priority in PRIORITY_CLASSES}
+        for priority, count, mean, longest, misses in rows:
+            stats[priority] = {"count": count, "mean": mean, "max": longest, "deadline_misses": misses or 0}
+        return stats
+
+
+@contextmanager
+def job_lease(queue: JobQueue, job_ids: List[int], interval: float = JOB_HEARTBEAT_SECONDS) -> Iterator[None]:
+    """Renew the lease on claimed jobs from a background thread while the ``with`` body runs"""
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(interval):
+            queue.heartbeat(job_ids)
+
+    thread = threading.Thread(target=renew, name="job-lease", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def job_scope(job_id: Optional[int]) -> Optional[str]:
+    """Checkpoint scope of a queued job, shared by the worker pool and the batch runner"""
+    return None if job_id is None else f"job:{job_id}"
+
+
+def queued_job_degradation(payload: Dict) -> Dict:
+    """Degradation level for a queued job, whichever backend drains it
+
+    A job was accepted when it was queued, so it is degraded (never shed) by
+    the worse of the level at submission and the level seen now.
+    """
+    from slo import DEGRADATION_LEVELS, MAX_QUEUED_LEVEL, SLO_CONTROLLER
+
+    level = min(max(payload.get("degradation_level", 0), SLO_CONTROLLER.evaluate()["level"]), MAX_QUEUED_LEVEL)
+    return DEGRADATION_LEVELS[level]
+
+
+def run_conversation_job(payload: Dict, deadline: Optional[float] = None, job_id: Optional[int] = None) -> Dict:
+    """Run one advisory conversation and all of its post-processing as batch work"""
+    from app import ArchitectureAgents, ArchitectureReportGenerator, format_request
+    from compaction import build_compactor
+    from conversation import ConversationRunner
+    from patterns import grounding_context
+    from roster import RosterPlanner
+
+    user_request = payload["user_request"]
+    categories = payload.get("categories", [])
+    urgency = payload.get("urgency", "Medium")
+
+    degradation = queued_job_degradation(payload)
+
+    agents_system = ArchitectureAgents(
+        structured_output=payload.get("structured_output", False), max_tokens=degradation["max_tokens"]
+    )
+    roster_plan = RosterPlanner().plan(
+        user_request, categories, urgency, payload.get("force_full_panel", False),
+        max_specialists=degradation["max_specialists"]
+    )
+    group_chat_manager, group_chat = agents_system.create_group_chat(roster=roster_plan["specialists"])
+    compactor = None
+    if payload.get("turn_token_budget"):
+        compactor = build_compactor(
+            ArchitectureReportGenerator()._extract_key_points,
+            token_budget=int(payload["turn_token_budget"])
+        )
+
+    runner = ConversationRunner(
+        group_chat_manager, group_chat, compactor=compactor, hedge=payload.get("hedge", False),
+        priority=urgency, user=payload.get("user", "anonymous"), team=payload.get("team", "default"),
+        batch=True, deadline=deadline
+    )
+    pattern_context, pattern_ids = ("", [])
+    if payload.get("ground_patterns", True):
+        pattern_context, pattern_ids = grounding_context(user_request, categories)
+    messages = runner.run(
+        agents_system.agents["user_proxy"], format_request(user_request, categories, urgency, pattern_context),
+        scope=job_scope(job_id)
+    )
+    return conversation_job_result(payload, messages, roster_plan, runner.turn_stats, pattern_ids, degradation)
+
+
+def conversation_job_result(payload: Dict, messages: List[Dict], roster_plan: Dict, turn_stats: List[Dict],
+                            grounding_patterns: Optional[List[str]] = None,
+                            degradation: Optional[Dict] = None) -> Dict:
+    """Report, figures and transcript of a finished conversation job, in the form the UI renders"""
+    from app import build_figures, build_report
+
+    user_request = payload["user_request"]
+    summary_table, detailed_report = build_report(
+        messages, user_request, payload.get("categories", []), payload.get("urgency", "Medium"),
+        extra_metadata={
+            "roster": roster_plan["specialists"],
+            "llm_calls_saved": roster_plan["llm_calls_saved"],
+            "grounding_patterns": grounding_patterns or [],
+            "degradation_level": degradation["level"] if degradation else 0,
+            "degradation_mode": degradation["name"] if degradation else "normal",
+        }
+    )
+    figures = build_figures(detailed_report, user_request)
+    return {
+        "messages": messages,
+        "summary_table": summary_table.to_dict("records"),
+        "detailed_report": detailed_report,
+        "figures": {name: fig.to_json() for name, fig in figures.items()},
+        "turn_stats": turn_stats,
+    }
+
+
+def run_sleep_job(payload: Dict, deadline: Optional[float] = None, job_id: Optional[int] = None) -> Dict:
+    """Stand-in job that holds a worker for a fixed time (used by the throughput benchmark)"""
+    time.sleep(payload.get("seconds", 0.1))
+    return {"slept": payload.get("seconds", 0.1)}
+
+
+JOB_HANDLERS: Dict[str, Callable[..., Dict]] = {
+    "conversation": run_conversation_job,
+    "sleep": run_sleep_job,
+}
+
+
+def worker_loop(queue_path: str, worker_id: str, poll_interval: float = 0.5,
+                stop_event: Optional[Any] = None, exit_when_idle: bool = False,
+                heartbeat_interval: float = JOB_HEARTBEAT_SECONDS) -> None:
+    """Claim and run jobs until stopped"""
+    queue = JobQueue(queue_path)
+    while stop_event is None or not stop_event.is_set():
+        job = queue.claim(worker_id)
+        if job is None:
+            if exit_when_idle:
+                return
+            time.sleep(poll_interval)
+            continue
+        try:
+            with job_lease(queue, [job["id"]], heartbeat_interval):
+                result = JOB_HANDLERS[job["kind"]](job["payload"], deadline=job["deadline"], job_id=job["id"])
+        except Exception:
+            queue.fail(job["id"], traceback.format_exc())
+        else:
+            queue.complete(job["id"], result)
+
+
+class WorkerPool:
+    """Spawn N worker processes draining a shared job queue"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, queue_path: str = DEFAULT_QUEUE_PATH,
+                 poll_interval: float = 0.5, exit_when_idle: bool = False,
+                 requeue_interval: float = REQUEUE_INTERVAL_SECONDS, stale_after: float = STALE_JOB_SECONDS):
+        self.workers = workers
+        self.queue_path = queue_path
+        self.poll_interval = poll_interval
+        self.exit_when_idle = exit_when_idle
+        self.requeue_interval = requeue_interval
+        self.stale_after = stale_after
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._processes: List[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        JobQueue(self.queue_path).requeue_stale(self.stale_after)
+        threading.Thread(target=self._requeue_loop, name="job-requeue", daemon=True).start()
+        host = socket.gethostname()
+        for i in range(self.workers):
+            process = self._context.Process(
+                target=worker_loop,
+                args=(self.queue_path, f"{host}:{os.getpid()}:{i}", self.poll_interval,
+                      self._stop_event, self.exit_when_idle),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def _requeue_loop(self) -> None:
+        # Workers can die at any time, not only before a pool starts
+        queue = JobQueue(self.queue_path)
+        while not self._stop_event.wait(self.requeue_interval):
+            queue.requeue_stale(self.stale_after)
+
+    def stop(self, timeout: float = 30) -> None:
+        """Let workers finish their current job, then exit"""
+        self._stop_event.set()
+        self.join(timeout)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        for process in self._processes:
+            process.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run architecture conversation workers")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH)
+    args = parser.parse_args()
+
+    pool = WorkerPool(workers=args.workers, queue_path=args.queue)
+    pool.start()
+    print(f"Started {args.workers} worker(s) on {args.queue}")
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()